@@ -9,7 +9,7 @@ as a starting point
 """
 
 from os import getcwd, mkdir
-from os.path import join, isdir
+from os.path import join, isdir, isfile
 import logging
 import time
 from argparse import ArgumentParser
@@ -17,9 +17,13 @@ from argparse import ArgumentParser
 import numpy as np
 import wx
 
+from foilix.foil import Foil
+from foilix.foil_generators.fitting import seed_positions
+from foilix.foils_eval import best_foils
 from foilix.optimization.pso import PsoAlgorithm
 from foilix.optimization.scoring import YachtAppendageNurbsSectionScorer, \
-    YachtAppendageParsecSectionScorer
+    YachtAppendageParsecSectionScorer, YachtAppendageBlendSectionScorer
+from foilix.shape_matrix import ShapeMatrix
 from foilix.ui.logging_frame import NewLoggingFrame
 from foilix.read_config import read_config
 
@@ -97,7 +101,39 @@ def optimize_with_pso_parsec():
     return constraints, so
 
 
-def main(parameterization):
+def optimize_with_pso_blend(nb_basis_foils):
+    r"""Blend of the nb_basis_foils best foils of the data digging step"""
+    dat_files = [join(config["foil_dat_folder"], f)
+                 for f in best_foils(join(getcwd(), "data_digging.csv"),
+                                     nb_basis_foils)]
+    basis = ShapeMatrix.from_foils([Foil.from_dat_file(f) for f in dat_files])
+
+    # weight of each basis foil
+    constraints = np.array([(0., 1.)] * len(dat_files))
+
+    so = YachtAppendageBlendSectionScorer(basis,
+                                          angles_of_attack=config["aoa_spec"],
+                                          aoa_ld=config["aoa_ld"],
+                                          reynolds=config["reynolds_numbers"],
+                                          ncrits=config["ncrits"],
+                                          iterlim=200,
+                                          inv_min_drag_scaling=config["inv_min_drag_scaling"])
+
+    return constraints, so
+
+
+def initial_positions(parameterization, nb_seeds):
+    r"""Parameters fitted on the nb_seeds best foils of the data digging
+    step (step 1), None if there are no data digging results"""
+    data_digging_csv_file = join(getcwd(), "data_digging.csv")
+    if nb_seeds == 0 or not isfile(data_digging_csv_file):
+        return None
+    dat_files = [join(config["foil_dat_folder"], f)
+                 for f in best_foils(data_digging_csv_file, nb_seeds)]
+    return seed_positions(dat_files, parameterization)
+
+
+def main(parameterization, nb_seeds=4, nb_basis_foils=6):
 
     if parameterization == "nurbs":
         constraints, so = optimize_with_pso_nurbs()
@@ -105,8 +141,17 @@ def main(parameterization):
     elif parameterization == "parsec":
         constraints, so = optimize_with_pso_parsec()
         global_best_data_file = "global_best_parsec.data"
+    elif parameterization == "blend":
+        constraints, so = optimize_with_pso_blend(nb_basis_foils)
+        global_best_data_file = "global_best_blend.data"
     else:
-        raise ValueError("Parameterization must be nurbs or parsec")
+        raise ValueError("Parameterization must be nurbs, parsec or blend")
+
+    if parameterization == "blend":
+        # the basis foils themselves
+        positions = np.eye(len(constraints))[:nb_seeds]
+    else:
+        positions = initial_positions(so.parameterization_type, nb_seeds)
 
     algo = PsoAlgorithm(constraints,
                         so,
@@ -115,7 +160,8 @@ def main(parameterization):
                         omega=-0.2,  # Particle velocity scaling factor
                         phi_p=0.0,  # Scaling factor to search away from the particle’s best known position
                         phi_g=2.8,  # Scaling factor to search away from the swarm’s best known position
-                        save_global_best=join(getcwd(), global_best_data_file))
+                        save_global_best=join(getcwd(), global_best_data_file),
+                        initial_positions=positions)
 
     app = wx.App()
     dlg = NewLoggingFrame()
@@ -152,14 +198,25 @@ if __name__ == "__main__":
     parser.add_argument('-p', '--parsec',
                         action='store_true',
                         help="Use PARSEC parameterization")
+    parser.add_argument('-b', '--blend',
+                        action='store_true',
+                        help="Use a blend of the best data digging foils")
+    parser.add_argument('--basis',
+                        type=int,
+                        default=6,
+                        help="Number of foils of the blend")
+    parser.add_argument('-s', '--seeds',
+                        type=int,
+                        default=4,
+                        help="Number of particles that start from the best "
+                             "foils of the data digging step")
     args = parser.parse_args()
-    if args.nurbs is True:
-        if args.parsec is True:
-            raise ValueError("Specify a single parameterization to use")
-        else:
-            main("nurbs")
-    else:
-        if args.parsec is True:
-            main("parsec")
-        else:
-            raise ValueError("Specify which parameterization to use")
+    parameterizations = [name for name, selected in (("nurbs", args.nurbs),
+                                                     ("parsec", args.parsec),
+                                                     ("blend", args.blend))
+                         if selected is True]
+    if len(parameterizations) > 1:
+        raise ValueError("Specify a single parameterization to use")
+    elif len(parameterizations) == 0:
+        raise ValueError("Specify which parameterization to use")
+    main(parameterizations[0], args.seeds, args.basis)
@@ -0,0 +1,3 @@
+# coding=utf-8
+
+r"""Benchmarks __init__"""
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Compare the cold start times of the text files (pandas parsing)
+and of the memory-mapped binary store on the shipped foil_data
+
+The binary files are created in a temporary folder
+
+"""
+
+from __future__ import print_function, division
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from foilix.binary_store import convert_folder, load_foil_data
+
+logger = logging.getLogger(__name__)
+
+FOIL_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "../../foil_data")
+
+
+def binary_store_benchmark():
+    r"""Runs the benchmark"""
+    tmp_folder = tempfile.mkdtemp()
+    try:
+        foil_ids = sorted(os.path.splitext(f)[0]
+                          for f in os.listdir(FOIL_DATA_FOLDER)
+                          if f.endswith(".csv"))
+        for foil_id in foil_ids:
+            shutil.copy(os.path.join(FOIL_DATA_FOLDER, "%s.csv" % foil_id),
+                        tmp_folder)
+
+        t0 = time.time()
+        convert_folder(tmp_folder)
+        t1 = time.time()
+        for foil_id in foil_ids:
+            pd.read_csv(os.path.join(FOIL_DATA_FOLDER, "%s.csv" % foil_id))
+        t2 = time.time()
+        for foil_id in foil_ids:
+            pd.read_csv(os.path.join(FOIL_DATA_FOLDER, "%s.ndf" % foil_id),
+                        skiprows=1,
+                        delimiter=r"\s+")
+        t3 = time.time()
+        for foil_id in foil_ids:
+            # touch the data so that the pages are actually read
+            np.nanmin(load_foil_data(tmp_folder, foil_id)[:, 5])
+        t4 = time.time()
+
+        logger.info("%i foils" % len(foil_ids))
+        logger.info("Conversion to binary : %.3f s" % (t1 - t0))
+        logger.info("pandas csv read      : %.3f s" % (t2 - t1))
+        logger.info("pandas ndf read      : %.3f s" % (t3 - t2))
+        logger.info("binary memory map    : %.3f s" % (t4 - t3))
+    finally:
+        shutil.rmtree(tmp_folder)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+    binary_store_benchmark()
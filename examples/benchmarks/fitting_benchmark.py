@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Time and accuracy of the PARSEC and NURBS fits of all the shipped foils
+
+The accuracy is the RMS y distance (chord units) between the fitted
+surfaces and the resampled foil surfaces.
+
+"""
+
+from __future__ import print_function, division
+
+import logging
+import os
+import time
+
+import numpy as np
+
+from foilix.foil import Foil
+from foilix.foil_catalog import list_dat_files
+from foilix.foil_generators.fitting import fitters
+from foilix.shape_matrix import ShapeMatrix
+
+logger = logging.getLogger(__name__)
+
+FOIL_DAT_FOLDER = os.path.join(os.path.dirname(__file__), "../../foil_dat")
+
+
+def fitting_benchmark():
+    r"""Runs the benchmark"""
+    t0 = time.time()
+    shape_matrix = ShapeMatrix.from_foils(
+        [Foil.from_dat_file(os.path.join(FOIL_DAT_FOLDER, f))
+         for f in list_dat_files(FOIL_DAT_FOLDER)])
+    logger.info("Resampled %i foils in %.2f s" % (len(shape_matrix.names),
+                                                  time.time() - t0))
+    for name, fitter in sorted(fitters.items()):
+        t0 = time.time()
+        _, rms = fitter(shape_matrix)
+        logger.info("%10s : %.2f s, RMS distance median %.1e, "
+                    "90th percentile %.1e" %
+                    (name, time.time() - t0, np.nanmedian(rms),
+                     np.nanpercentile(rms, 90)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+    fitting_benchmark()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Memory and time of the Foil model on all the shipped .dat files
+
+The memory of the (N, 2) point arrays is compared to the memory of the
+same points as a tuple of tuples of floats (the former representation).
+The geometric properties are computed twice: the second pass uses the
+cached values.
+
+"""
+
+from __future__ import print_function, division
+
+import logging
+import os
+import time
+import tracemalloc
+
+from foilix.foil import Foil
+
+logger = logging.getLogger(__name__)
+
+FOIL_DAT_FOLDER = os.path.join(os.path.dirname(__file__), "../../foil_dat")
+
+
+def _properties(foils):
+    return [(foil.is_symmetrical(),
+             foil.y_spread,
+             foil.max_y_x,
+             foil.min_y_x,
+             foil.has_closed_te) for foil in foils]
+
+
+def foil_benchmark():
+    r"""Runs the benchmark"""
+    dat_files = sorted(os.path.join(FOIL_DAT_FOLDER, f)
+                       for f in os.listdir(FOIL_DAT_FOLDER)
+                       if f.endswith(".dat"))
+
+    t0 = time.time()
+    foils = [Foil.from_dat_file(f) for f in dat_files]
+    t1 = time.time()
+    _properties(foils)
+    t2 = time.time()
+    _properties(foils)
+    t3 = time.time()
+
+    tracemalloc.start()
+    arrays = [Foil(foil.name, foil.points) for foil in foils]
+    array_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    tuples = [tuple(tuple(p) for p in foil.points.tolist()) for foil in foils]
+    tuple_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    logger.info("%i foils, %i points" % (len(foils),
+                                         sum(len(f.points) for f in foils)))
+    logger.info("Loading             : %.3f s" % (t1 - t0))
+    logger.info("Properties          : %.1f ms" % (1e3 * (t2 - t1)))
+    logger.info("Cached properties   : %.1f ms" % (1e3 * (t3 - t2)))
+    logger.info("Points as arrays    : %.2f MB" % (array_bytes / 1e6))
+    logger.info("Points as tuples    : %.2f MB" % (tuple_bytes / 1e6))
+    return arrays, tuples
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+    foil_benchmark()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Compare the regular grid interpolation model to the libra RBF model
+on the shipped foil_data
+
+Build times and query throughputs are logged for each model. Without
+libra, only the grid model is timed.
+
+"""
+
+from __future__ import print_function, division
+
+import logging
+import os
+import time
+
+import numpy as np
+
+from foilix.grid_data_model import GridDataModel
+
+logger = logging.getLogger(__name__)
+
+FOIL_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "../../foil_data")
+
+
+def random_queries(ranges, nb_queries):
+    r"""Random query points within the model ranges"""
+    return {name: np.random.uniform(low, high, nb_queries)
+            for name, (low, high) in ranges.items()}
+
+
+def grid_vs_rbf_benchmark(nb_foils=5, nb_queries=1000):
+    r"""Runs the benchmark
+
+    Parameters
+    ----------
+    nb_foils : int
+        Number of .ndf files of foil_data to use
+    nb_queries : int
+        Number of random query points for each model
+
+    """
+    try:
+        from libra.data_model_import import \
+            create_partial_data_model_from_file
+    except ImportError:
+        logger.warning("libra is not installed, only timing the grid model")
+        create_partial_data_model_from_file = None
+
+    ndf_files = sorted(f for f in os.listdir(FOIL_DATA_FOLDER)
+                       if f.endswith(".ndf"))[:nb_foils]
+
+    for ndf_file in ndf_files:
+        path = os.path.join(FOIL_DATA_FOLDER, ndf_file)
+
+        t0 = time.time()
+        gm = GridDataModel.from_ndf_file(path)
+        t1 = time.time()
+        if create_partial_data_model_from_file is not None:
+            pm = create_partial_data_model_from_file(path)
+        t2 = time.time()
+
+        queries = random_queries(gm.input_continuous_ranges, nb_queries)
+        single_queries = [{name: values[i] for name, values in queries.items()}
+                          for i in range(nb_queries)]
+
+        t3 = time.time()
+        gm.interpolate(queries)
+        t4 = time.time()
+        for q in single_queries:
+            gm.interpolate(q)
+        t5 = time.time()
+
+        logger.info("%s : %i holes in the grid" % (ndf_file, gm.nb_holes))
+        logger.info("  build - grid : %.4f s" % (t1 - t0))
+        logger.info("  queries/s - grid vectorized : %.0f, grid : %.0f" %
+                    (nb_queries / (t4 - t3), nb_queries / (t5 - t4)))
+
+        if create_partial_data_model_from_file is not None:
+            for q in single_queries:
+                pm.interpolate(q)
+            t6 = time.time()
+            logger.info("  build - rbf : %.4f s, queries/s - rbf : %.0f" %
+                        (t2 - t1, nb_queries / (t6 - t5)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+    grid_vs_rbf_benchmark()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Import time of the core modules (python -X importtime, Python >= 3.7)
+
+Each module is imported in a fresh interpreter. The benchmark fails
+(exit code 1) if a module takes longer than its threshold to import or
+if it imports a plotting, GUI or heavy scientific package that should
+only be imported when it is used.
+
+"""
+
+from __future__ import print_function, division
+
+import logging
+import subprocess
+import sys
+
+logger = logging.getLogger(__name__)
+
+# cumulative import time thresholds (ms), numpy included
+THRESHOLDS = {"foilix.foil": 250,
+              "foilix.foil_generators.parsec": 250,
+              "foilix.foil_generators.nurbs": 250,
+              "foilix.xfoil.polar": 250,
+              "foilix.optimization.pso": 250,
+              "foilix.optimization.scoring": 250,
+              "foilix.grid_data_model": 250,
+              "foilix.polar_table": 250,
+              "foilix.data_api": 300}
+
+# packages that the core modules must not import
+DEFERRED_PACKAGES = ("matplotlib", "scipy", "pandas", "libra", "wx", "PyQt5")
+
+
+def import_times(module):
+    r"""Cumulative import times of a module and of the modules it imports
+
+    Returns
+    -------
+    dict : {module name: cumulative import time in ms}
+
+    Raises
+    ------
+    ImportError if the module cannot be imported
+
+    """
+    process = subprocess.Popen([sys.executable, "-X", "importtime",
+                                "-c", "import %s" % module],
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise ImportError(stderr.decode("utf-8").strip().splitlines()[-1])
+    times = dict()
+    for line in stderr.decode("utf-8").splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1000.
+    return times
+
+
+def import_time_benchmark():
+    r"""Runs the benchmark
+
+    Returns
+    -------
+    bool : True if all the modules are within their thresholds and do not
+           import deferred packages
+
+    """
+    ok = True
+    for module, threshold in sorted(THRESHOLDS.items()):
+        try:
+            times = import_times(module)
+        except ImportError as e:
+            logger.warning("%-32s skipped (%s)" % (module, str(e)))
+            continue
+        deferred = sorted(set(name.split(".")[0] for name in times) &
+                          set(DEFERRED_PACKAGES))
+        status = "ok"
+        if times[module] > threshold or len(deferred) > 0:
+            status = "FAILED"
+            ok = False
+        logger.info("%-32s %7.1f ms (threshold %i ms) %s %s" %
+                    (module, times[module], threshold, status,
+                     "imports %s" % ", ".join(deferred) if deferred else ""))
+    return ok
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+    sys.exit(0 if import_time_benchmark() is True else 1)
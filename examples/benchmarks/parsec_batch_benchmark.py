@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Time of the construction and validation of symmetrical PARSEC foils,
+one PARSEC instance per foil versus a single PARSEC.batch()
+
+"""
+
+from __future__ import print_function, division
+
+import logging
+import time
+
+import numpy as np
+
+from foilix.foil_generators.parsec import PARSEC, PARAMETERS, \
+    symmetrical_parameters
+
+logger = logging.getLogger(__name__)
+
+
+def parsec_batch_benchmark(nb_foils=2000, seed=0):
+    r"""Runs the benchmark
+
+    Parameters
+    ----------
+    nb_foils : int
+        Number of random symmetrical foils (swarm particles)
+    seed : int
+        Random generator seed
+
+    """
+    rng = np.random.RandomState(seed)
+    # thickness, rle, x, curvature, te angle as in the symmetrical scorer
+    positions = np.column_stack((rng.uniform(0.06, 0.14, nb_foils),
+                                 rng.uniform(0.005, 0.02, nb_foils),
+                                 rng.uniform(0.2, 0.45, nb_foils),
+                                 rng.uniform(-1., 0., nb_foils),
+                                 rng.uniform(2., 14., nb_foils)))
+    parameters = symmetrical_parameters(positions)
+
+    t0 = time.time()
+    scalar_valid = np.array(
+        [PARSEC(dict(zip(PARAMETERS, row))).is_valid() for row in parameters])
+    scalar_time = time.time() - t0
+
+    t0 = time.time()
+    batch_valid = PARSEC.batch(parameters).is_valid()
+    batch_time = time.time() - t0
+
+    logger.info("%i foils, %i valid" % (nb_foils, scalar_valid.sum()))
+    logger.info("PARSEC loop : %.3f s, PARSEC.batch : %.3f s (x %.0f)" %
+                (scalar_time, batch_time, scalar_time / batch_time))
+    logger.info("Same validity : %s" % np.all(scalar_valid == batch_valid))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+    parsec_batch_benchmark()
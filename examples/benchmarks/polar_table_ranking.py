@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Rank the whole pre-computed database with vectorized PolarTable queries
+
+The score is the yacht appendage score used by eval_foils
+(average L/D at the aoa_ld angles + scaled inverse of the minimum drag),
+evaluated on grid values of reynolds and ncrit
+
+"""
+
+from __future__ import print_function, division
+
+import logging
+import os
+import time
+
+import numpy as np
+
+from foilix.polar_table import PolarTable
+
+logger = logging.getLogger(__name__)
+
+FOIL_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "../../foil_data")
+
+
+def polar_table_ranking(reynolds_numbers=(15e3, 30e3, 45e3, 60e3),
+                        ncrits=(2., 3.),
+                        aoa_ld=(3., 4., 5.),
+                        inv_min_drag_scaling=0.25):
+    r"""Runs the example"""
+    t0 = time.time()
+    table = PolarTable.from_folder(FOIL_DATA_FOLDER)
+    t1 = time.time()
+
+    re_indices = [table.axis_index('reynolds', r) for r in reynolds_numbers]
+    nc_indices = [table.axis_index('ncrit', n) for n in ncrits]
+    aoa_indices = [table.axis_index('aoa', a) for a in aoa_ld]
+
+    # (foil, ncrit, reynolds, aoa) restricted to the operating range
+    ld = table.lift_to_drag(mach=0.)
+    ld = ld[:, nc_indices][:, :, re_indices]
+    cd = table.get('cd', mach=0.)[:, nc_indices][:, :, re_indices]
+
+    avg_ld = np.nanmean(ld[..., aoa_indices], axis=(1, 2, 3))
+    avg_min_drag = np.nanmean(np.nanmin(cd, axis=3), axis=(1, 2))
+    scores = avg_ld + (1. / avg_min_drag) * inv_min_drag_scaling
+    ranking = np.argsort(-scores)
+    t2 = time.time()
+
+    for i in ranking[:10]:
+        print("%20s %.3f" % (table.foil_ids[i], scores[i]))
+    logger.info("Table build : %.3f s, ranking of %i foils : %.4f s" %
+                (t1 - t0, len(table.foil_ids), t2 - t1))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+    polar_table_ranking()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Time and quality of the repaneling of the symmetrical foils
+
+The quality of a repaneling is measured by the maximum ratio of the lengths
+of adjacent panels and by the leading and trailing edge panel lengths
+relative to the mean panel length.
+
+With --xfoil, each foil is also repaneled by XFOIL (repanel_xfoil(), one
+XFOIL process per foil, on a copy of the .dat file in a temporary folder)
+and the distances between the 2 repanelings and the quality of the XFOIL
+repaneling are logged. An XFOIL run that does not save its repaneling
+within XFOIL_TIMEOUT seconds is killed and the foil is skipped.
+
+"""
+
+from __future__ import print_function, division
+
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from foilix.filters import symmetrical_dat_files
+from foilix.foil import Foil
+from foilix.repanel import repanel_foils, repanel_xfoil
+
+logger = logging.getLogger(__name__)
+
+FOIL_DAT_FOLDER = os.path.join(os.path.dirname(__file__), "../../foil_dat")
+
+# seconds
+XFOIL_TIMEOUT = 10.
+
+
+def panel_quality(points):
+    r"""Maximum adjacent panel length ratio, leading edge and trailing edge
+    panel lengths relative to the mean panel length"""
+    lengths = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    ratios = lengths[1:] / lengths[:-1]
+    le = int(np.argmin(points[:, 0]))
+    return (np.maximum(ratios, 1. / ratios).max(),
+            min(lengths[le - 1], lengths[le]) / lengths.mean(),
+            0.5 * (lengths[0] + lengths[-1]) / lengths.mean())
+
+
+def _distance_to_polyline(points, polyline):
+    a, ab = polyline[:-1], np.diff(polyline, axis=0)
+    u = np.clip(np.sum((points[:, np.newaxis] - a) * ab, axis=2) /
+                np.maximum(np.sum(ab ** 2, axis=1), 1e-24), 0., 1.)
+    return np.linalg.norm(a + u[:, :, np.newaxis] * ab -
+                          points[:, np.newaxis], axis=2).min(axis=1).max()
+
+
+def _xfoil_reference(dat_file, nb_panels, tmp_folder):
+    r"""XFOIL repaneling of a copy of dat_file in tmp_folder, None if XFOIL
+    failed or timed out"""
+    shutil.copy(dat_file, tmp_folder)
+    name, extension = os.path.splitext(os.path.basename(dat_file))
+    reference = os.path.join(tmp_folder,
+                             "%s__p__%i%s" % (name, nb_panels, extension))
+    process = multiprocessing.Process(
+        target=repanel_xfoil,
+        args=(os.path.join(tmp_folder, os.path.basename(dat_file)),
+              nb_panels))
+    process.start()
+    process.join(XFOIL_TIMEOUT)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        logger.warning("%s : XFOIL timed out" % name)
+        return None
+    try:
+        return Foil.from_dat_file(reference)
+    except (IOError, OSError, ValueError):
+        logger.warning("%s : no XFOIL repaneling" % name)
+        return None
+
+
+def repanel_benchmark(nb_panels=161, xfoil=False):
+    r"""Runs the benchmark"""
+    dat_files = symmetrical_dat_files(FOIL_DAT_FOLDER)
+    foils = [Foil.from_dat_file(f) for f in dat_files]
+
+    t0 = time.time()
+    repaneled = repanel_foils(foils, nb_panels)
+    t1 = time.time()
+    logger.info("Repaneled %i foils with %i points in %.3f s" %
+                (len(foils), nb_panels, t1 - t0))
+
+    quality = np.array([panel_quality(points) for points in repaneled])
+    logger.info("Max adjacent panel ratio : %.2f (median %.2f)" %
+                (quality[:, 0].max(), np.median(quality[:, 0])))
+    logger.info("LE panel / mean panel    : %.2f (median)" %
+                np.median(quality[:, 1]))
+    logger.info("TE panel / mean panel    : %.2f (median)" %
+                np.median(quality[:, 2]))
+
+    if xfoil is True:
+        tmp_folder = tempfile.mkdtemp()
+        try:
+            t0 = time.time()
+            distances, xfoil_quality = list(), list()
+            for dat_file, points in zip(dat_files, repaneled):
+                reference = _xfoil_reference(dat_file, nb_panels, tmp_folder)
+                if reference is None:
+                    continue
+                distances.append(_distance_to_polyline(points,
+                                                       reference.points))
+                xfoil_quality.append(panel_quality(reference.points))
+                logger.info("%s : max distance to XFOIL repaneling %.1e" %
+                            (reference.name, distances[-1]))
+            logger.info("XFOIL repaneling : %i of %i foils in %.1f s" %
+                        (len(distances), len(dat_files), time.time() - t0))
+        finally:
+            shutil.rmtree(tmp_folder)
+        if len(distances) > 0:
+            xfoil_quality = np.array(xfoil_quality)
+            logger.info("Distance to XFOIL        : %.1e (median %.1e)" %
+                        (max(distances), np.median(distances)))
+            logger.info("XFOIL max adjacent ratio : %.2f (median %.2f)" %
+                        (xfoil_quality[:, 0].max(),
+                         np.median(xfoil_quality[:, 0])))
+            logger.info("XFOIL LE panel / mean    : %.2f (median)" %
+                        np.median(xfoil_quality[:, 1]))
+            logger.info("XFOIL TE panel / mean    : %.2f (median)" %
+                        np.median(xfoil_quality[:, 2]))
+    return quality
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+    repanel_benchmark(xfoil="--xfoil" in sys.argv)
@@ -0,0 +1,312 @@
+# coding: utf-8
+
+r"""Error-driven selection of the reynolds and ncrit values of the
+pre-computed data
+
+The polars vary smoothly with the Reynolds number and ncrit: computing
+an xfoil sweep for every value of a fine fixed grid wastes most of them.
+The adaptive sampler starts from a coarse subset of the candidate values
+(log-spaced for the Reynolds numbers) and computes the sweep in the middle
+of an interval only to check the interpolation between its ends. The
+interval is split further where the check sweep differs from the linear
+interpolation (the interpolation of GridDataModel) by more than a tolerance.
+
+Every computed sweep is kept and the selected values always form a
+mach x ncrit x reynolds x aoa tensor grid, so that the data files are
+used by data_api like the ones of data_create.create_data().
+
+"""
+
+from __future__ import division
+
+import logging
+
+import numpy as np
+
+from corelib.core.files import p_
+
+from foilix.data_create import compute_records, format_lines, \
+    write_data_files, _split_formats
+from foilix.binary_store import convert_foil
+
+logger = logging.getLogger(__name__)
+
+# maximum absolute interpolation errors
+default_tolerances = {"cl": 0.02, "cd": 0.001, "cm": 0.005}
+
+# position of the outputs in the records of compute_records()
+_output_positions = {"cl": 4, "cd": 5, "cdp": 6, "cm": 7,
+                     "top_xtr": 8, "bot_xtr": 9}
+
+
+def initial_indices(values, nb_values, log=False):
+    r"""Indices of a coarse subset of sorted candidate values
+
+    The subset is made of the candidates that are the closest to nb_values
+    evenly spaced values (log-spaced if log is True), ends included
+
+    Parameters
+    ----------
+    values : list or ndarray
+    nb_values : int
+    log : bool, optional
+
+    Returns
+    -------
+    list[int] : sorted indices
+
+    """
+    values = np.asarray(values, dtype=float)
+    scaled = np.log(values) if log is True else values
+    targets = np.linspace(scaled[0], scaled[-1], max(2, nb_values))
+    indices = np.argmin(np.abs(scaled[:, np.newaxis] - targets), axis=0)
+    return sorted(set(int(i) for i in indices) | {0, len(values) - 1})
+
+
+def middle_index(values, i, j, log=False):
+    r"""Index strictly between i and j of the candidate value closest to the
+    middle of values[i] and values[j], None if i and j are adjacent"""
+    if j - i < 2:
+        return None
+    scaled = np.log(values) if log is True else np.asarray(values, dtype=float)
+    middle = (scaled[i] + scaled[j]) / 2.
+    return i + 1 + int(np.argmin(np.abs(scaled[i + 1:j] - middle)))
+
+
+class AdaptiveSampler(object):
+    r"""Adaptive selection of the reynolds and ncrit values of a foil
+
+    Parameters
+    ----------
+    foil_id : str
+    ncrits : list
+        Candidate ncrit values, sorted
+    reynoldss : list
+        Candidate reynolds values, sorted
+    machs : list
+    aoas : list
+        xfoil format (start, end, step) specification of angles of attack
+    iterlim : int, optional
+    tolerances : dict, optional
+        {output name: maximum absolute interpolation error}
+    nb_initial_reynolds : int, optional
+        Number of log-spaced reynolds values of the initial grid
+    compute : callable, optional
+        Function with the compute_records() signature
+
+    """
+    def __init__(self,
+                 foil_id,
+                 ncrits,
+                 reynoldss,
+                 machs,
+                 aoas,
+                 iterlim=200,
+                 tolerances=None,
+                 nb_initial_reynolds=5,
+                 compute=compute_records):
+        self.foil_id = foil_id
+        self.ncrits = list(ncrits)
+        self.reynoldss = list(reynoldss)
+        self.machs = list(machs)
+        self.aoas = aoas
+        self.iterlim = iterlim
+        self.tolerances = default_tolerances if tolerances is None \
+            else tolerances
+        self.nb_initial_reynolds = nb_initial_reynolds
+        self.compute = compute
+
+        self._records = dict()
+        self.selected_ncrits = list()
+        self.selected_reynoldss = list()
+
+    @property
+    def nb_sweeps(self):
+        r"""Number of computed xfoil sweeps"""
+        return len(self._records)
+
+    @property
+    def nb_candidate_sweeps(self):
+        r"""Number of xfoil sweeps of the full candidate grid"""
+        return len(self.machs) * len(self.ncrits) * len(self.reynoldss)
+
+    def records(self, mach, ncrit, reynolds):
+        r"""Records of a sweep, computed on first use"""
+        key = (mach, ncrit, reynolds)
+        if key not in self._records:
+            self._records[key] = self.compute(self.foil_id,
+                                              ncrit,
+                                              reynolds,
+                                              mach,
+                                              self.aoas,
+                                              iterlim=self.iterlim)
+        return self._records[key]
+
+    def _outputs(self, mach, ncrit, reynolds):
+        r"""(n_aoa, n_checked_outputs) array of a sweep"""
+        positions = [_output_positions[name] for name in self.tolerances]
+        return np.array([[r[p] for p in positions]
+                         for r in self.records(mach, ncrit, reynolds)],
+                        dtype=float)
+
+    def _error_ratio(self, check, low, high, t):
+        r"""Largest ratio of interpolation error to tolerance
+
+        check is compared to the linear interpolation of low and high at
+        t (0 for low, 1 for high), NaN values are ignored. The ratio is
+        infinite if there is no value to compare (e.g. the check sweep did
+        not converge at all): xfoil struggles there, the interval is split
+        further
+        """
+        errors = np.abs(check - ((1. - t) * low + t * high))
+        ratios = errors / np.array(list(self.tolerances.values()))
+        if np.all(np.isnan(ratios)):
+            logger.debug("No converged value to check the interpolation")
+            return np.inf
+        return np.nanmax(ratios)
+
+    def _refine(self, values, selected, converged, other_values, key, log):
+        r"""Check the middle of the pending intervals of an axis
+
+        Parameters
+        ----------
+        values : list
+            Candidate values of the refined axis
+        selected : list[int]
+            Selected indices of the refined axis, updated in place
+        converged : set
+            (i, j) intervals of selected indices that passed the check,
+            updated in place
+        other_values : list
+            Selected values of the other axis (ncrit or reynolds)
+        key : callable
+            key(mach, value, other_value) -> (mach, ncrit, reynolds)
+        log : bool
+            Are the intervals split in log scale?
+
+        Returns
+        -------
+        bool : were values added?
+
+        """
+        added = False
+        pending = [interval for interval in zip(selected[:-1], selected[1:])
+                   if interval not in converged]
+        while len(pending) > 0:
+            i, j = pending.pop()
+            k = middle_index(values, i, j, log=log)
+            if k is None or k in selected:
+                continue
+            # the data models interpolate linearly, even in reynolds
+            t = (values[k] - values[i]) / (values[j] - values[i])
+            ratio = max(self._error_ratio(self._outputs(*key(m, values[k], o)),
+                                          self._outputs(*key(m, values[i], o)),
+                                          self._outputs(*key(m, values[j], o)),
+                                          t)
+                        for m in self.machs for o in other_values)
+            selected.append(k)
+            selected.sort()
+            added = True
+            if ratio > 1.:
+                pending.extend([(i, k), (k, j)])
+            else:
+                converged.update([(i, k), (k, j)])
+        return added
+
+    def run(self):
+        r"""Select the reynolds and ncrit values
+
+        Returns
+        -------
+        tuple(list, list) : selected ncrits, selected reynolds numbers
+
+        """
+        re_selected = initial_indices(self.reynoldss,
+                                      self.nb_initial_reynolds,
+                                      log=True)
+        nc_selected = initial_indices(self.ncrits, 2)
+        re_converged, nc_converged = set(), set()
+
+        refined = True
+        while refined is True:
+            refined = self._refine(
+                self.reynoldss,
+                re_selected,
+                re_converged,
+                [self.ncrits[i] for i in nc_selected],
+                lambda m, re, nc: (m, nc, re),
+                log=True)
+            refined = self._refine(
+                self.ncrits,
+                nc_selected,
+                nc_converged,
+                [self.reynoldss[i] for i in re_selected],
+                lambda m, nc, re: (m, nc, re),
+                log=False) or refined
+
+        self.selected_ncrits = [self.ncrits[i] for i in nc_selected]
+        self.selected_reynoldss = [self.reynoldss[i] for i in re_selected]
+
+        # complete the tensor grid (sweeps of the values selected last)
+        for mach in self.machs:
+            for ncrit in self.selected_ncrits:
+                for reynolds in self.selected_reynoldss:
+                    self.records(mach, ncrit, reynolds)
+
+        logger.info("%s : %i of %i xfoil sweeps, %i saved" %
+                    (self.foil_id,
+                     self.nb_sweeps,
+                     self.nb_candidate_sweeps,
+                     self.nb_candidate_sweeps - self.nb_sweeps))
+        return self.selected_ncrits, self.selected_reynoldss
+
+    def csv_lines(self):
+        r"""csv lines of the selected grid, in the create_data() order"""
+        lines = []
+        for mach in self.machs:
+            for ncrit in self.selected_ncrits:
+                for reynolds in self.selected_reynoldss:
+                    lines.extend(format_lines(self.records(mach,
+                                                           ncrit,
+                                                           reynolds),
+                                              "csv"))
+        return lines
+
+
+def create_adaptive_data(foil_id,
+                         ncrits,
+                         reynoldss,
+                         machs,
+                         aoas,
+                         iterlim=200,
+                         formats=None,
+                         tolerances=None,
+                         nb_initial_reynolds=5):
+    r"""Create the data files of a foil on an adaptively selected grid
+
+    Same parameters as data_create.create_data(), ncrits and reynoldss are
+    the candidate values
+
+    Returns
+    -------
+    int : number of saved xfoil sweeps
+
+    """
+    formats, binary = _split_formats(formats)
+    foil_data_folder = p_(__file__, "../foil_data")
+
+    sampler = AdaptiveSampler(foil_id,
+                              ncrits,
+                              reynoldss,
+                              machs,
+                              aoas,
+                              iterlim=iterlim,
+                              tolerances=tolerances,
+                              nb_initial_reynolds=nb_initial_reynolds)
+    sampler.run()
+    write_data_files(foil_data_folder, foil_id, sampler.csv_lines(), formats)
+
+    if binary is True:
+        convert_foil(foil_data_folder, foil_id)
+
+    return sampler.nb_candidate_sweeps - sampler.nb_sweeps
@@ -0,0 +1,129 @@
+# coding: utf-8
+
+r"""Binary store for the pre-computed foil data
+
+The .csv and .ndf text files have to be parsed each time they are used.
+The binary store keeps the numerical columns of each foil .csv file in a
+<foil_id>.npy file (the .npy header holds the dtype and shape) that is
+memory-mapped when read: nothing is parsed.
+
+The text files remain the export format written by data_create.
+
+"""
+
+import logging
+from os import listdir
+from os.path import join, isfile, getmtime, splitext
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# columns of the binary arrays (same order as in the .csv and .ndf files)
+columns = ('mach', 'ncrit', 'reynolds', 'aoa',
+           'cl', 'cd', 'cdp', 'cm', 'top_xtr', 'bot_xtr')
+input_columns = columns[:4]
+output_columns = columns[4:]
+
+
+def binary_file_path(foil_data_folder, foil_id):
+    r"""Path to the binary data file of a foil"""
+    return join(foil_data_folder, "%s.npy" % foil_id)
+
+
+def is_up_to_date(foil_data_folder, foil_id):
+    r"""Is there a binary file that is newer than the .csv file?
+
+    Parameters
+    ----------
+    foil_data_folder : str
+    foil_id : str
+
+    Returns
+    -------
+    bool
+
+    """
+    npy_file = binary_file_path(foil_data_folder, foil_id)
+    csv_file = join(foil_data_folder, "%s.csv" % foil_id)
+    if not isfile(npy_file):
+        return False
+    if isfile(csv_file) and getmtime(csv_file) > getmtime(npy_file):
+        return False
+    return True
+
+
+def convert_foil(foil_data_folder, foil_id, dtype=np.float64):
+    r"""Convert the .csv data file of a foil to the binary format
+
+    The rows of non converged computations (NaN values) are kept
+
+    Parameters
+    ----------
+    foil_data_folder : str
+    foil_id : str
+    dtype : numpy dtype, optional
+        np.float64 (default) or np.float32
+
+    Returns
+    -------
+    str : path to the binary file
+
+    """
+    csv_file = join(foil_data_folder, "%s.csv" % foil_id)
+    # the warnings column may contain commas, only read the numerical ones
+    data = np.genfromtxt(csv_file,
+                         delimiter=",",
+                         skip_header=1,
+                         usecols=range(len(columns)),
+                         dtype=np.float64,
+                         ndmin=2)
+    path = binary_file_path(foil_data_folder, foil_id)
+    np.save(path, data.astype(dtype))
+    logger.debug("Converted %s to %s" % (csv_file, path))
+    return path
+
+
+def convert_folder(foil_data_folder, dtype=np.float64, force=False):
+    r"""Convert all the .csv data files of a folder to the binary format
+
+    Parameters
+    ----------
+    foil_data_folder : str
+    dtype : numpy dtype, optional
+    force : bool, optional
+        If False (default), up to date binary files are not regenerated
+
+    Returns
+    -------
+    int : number of converted files
+
+    """
+    foil_ids = [splitext(f)[0] for f in listdir(foil_data_folder)
+                if f.endswith(".csv")]
+    nb_converted = 0
+    for foil_id in foil_ids:
+        if force is True or not is_up_to_date(foil_data_folder, foil_id):
+            convert_foil(foil_data_folder, foil_id, dtype=dtype)
+            nb_converted += 1
+    logger.info("Converted %i of %i foils in %s" % (nb_converted,
+                                                    len(foil_ids),
+                                                    foil_data_folder))
+    return nb_converted
+
+
+def load_foil_data(foil_data_folder, foil_id):
+    r"""Memory-map the binary data of a foil
+
+    Parameters
+    ----------
+    foil_data_folder : str
+    foil_id : str
+
+    Returns
+    -------
+    numpy.memmap of shape (n_rows, len(columns))
+
+    """
+    return np.load(binary_file_path(foil_data_folder, foil_id),
+                   mmap_mode='r')
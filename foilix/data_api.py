@@ -2,29 +2,73 @@
 
 import logging
 
-from os.path import join
+from os import environ
+from os.path import join, split, splitext, abspath
 
-import pandas as pd
+import numpy as np
 
-from corelib.core.memoize import memoize
 from corelib.core.profiling import timeit
 # from corelib.core.files import p_
 
-from libra.data_model_import import create_partial_data_model_from_file
+from foilix.grid_data_model import GridDataModel
+from foilix.binary_store import load_foil_data, is_up_to_date, \
+    input_columns, output_columns
+from foilix.model_cache import ModelCache
+from foilix.data_metadata import read_metadata, resolve_foil_id
 
 
+logger = logging.getLogger(__name__)
+
 # foil_data_folder = p_(__file__, "../foil_data")
 
+# interpolation models, bounded in memory and invalidated when the .ndf
+# file changes (set model_cache.max_bytes to change the budget)
+model_cache = ModelCache()
+
+# client of the query server used by get_data_tuple(), see set_query_server()
+_query_client = None
+
+# order of the values in the tuples and arrays returned by the data api
+data_keys = ('cl', 'cd', 'cdp', 'cm', 'top_xtr', 'bot_xtr')
+
+# order of the derivatives in the gradients returned by the data api
+gradient_keys = ('aoa', 'reynolds', 'ncrit')
+
+
+def _data_file_path(foil_data_folder, foil_id, extension="ndf"):
+    r"""Path to the data file of a foil, the data file of the kept foil for
+    a geometric duplicate skipped by data_create"""
+    return join(foil_data_folder,
+                "%s.%s" % (resolve_foil_id(foil_data_folder, foil_id),
+                           extension))
+
 
 def foil_file_summary_csv(foil_data_folder, foil_id):
-    return data_file_summary_csv(join(foil_data_folder, "%s.csv" % foil_id))
+    return data_file_summary_csv(_data_file_path(foil_data_folder, foil_id,
+                                                 "csv"))
 
 
 def foil_file_summary_ndf(foil_data_folder, foil_id):
-    return data_file_summary_ndf(join(foil_data_folder, "%s.ndf" % foil_id))
+    return data_file_summary_ndf(_data_file_path(foil_data_folder, foil_id))
+
+
+def _metadata(data_file_path):
+    r"""Up to date sidecar metadata of a data file, None if there is none"""
+    foil_data_folder, foil_id = split(splitext(data_file_path)[0])
+    return read_metadata(foil_data_folder, foil_id)
+
+
+def _tuple_ranges(ranges):
+    return {name: tuple(r) for name, r in ranges.items()}
 
 
 def data_file_summary_csv(csv_file_path):
+    metadata = _metadata(csv_file_path)
+    if metadata is not None:
+        return metadata["nb_rows"], metadata["nb_valid_rows"], \
+            _tuple_ranges(metadata["ranges"])
+
+    import pandas as pd
     df = pd.read_csv(csv_file_path)
     ranges = {'mach': (df['mach'].min(), df['mach'].max()),
               'ncrit': (df['ncrit'].min(), df['ncrit'].max()),
@@ -33,43 +77,192 @@ def data_file_summary_csv(csv_file_path):
     return df.shape[0], df.dropna(how='any').shape[0], ranges
 
 
+def foil_file_summary_npy(foil_data_folder, foil_id):
+    return data_file_summary_npy(load_foil_data(
+        foil_data_folder, resolve_foil_id(foil_data_folder, foil_id)))
+
+
+def data_file_summary_npy(data):
+    r"""Summary of the memory-mapped binary data of a foil
+
+    Parameters
+    ----------
+    data : ndarray
+        As returned by foilix.binary_store.load_foil_data
+
+    """
+    inputs = data[:, :len(input_columns)]
+    ranges = {name: (inputs[:, i].min(), inputs[:, i].max())
+              for i, name in enumerate(input_columns)}
+    return data.shape[0], int((~np.isnan(data).any(axis=1)).sum()), ranges
+
+
 def data_file_summary_ndf(ndf_file_path):
+    metadata = _metadata(ndf_file_path)
+    if metadata is not None:
+        # the .ndf file only has the converged rows
+        return metadata["nb_valid_rows"], metadata["nb_valid_rows"], \
+            _tuple_ranges(metadata["valid_ranges"])
+
+    import pandas as pd
     df = pd.read_csv(ndf_file_path, skiprows=1, delimiter=r"\s+")
     pm = create_interpolation_model(ndf_file_path)
     return df.shape[0], df.dropna(how='any').shape[0], pm.input_continuous_ranges
 
 
-@memoize
-@timeit
+def cache_stats():
+    r"""Hit, miss, eviction and invalidation counters of the model cache
+
+    Returns
+    -------
+    dict
+
+    """
+    return model_cache.stats
+
+
+def model_key(kind, ndf_file_path):
+    r"""Key of a model in the model cache
+
+    Parameters
+    ----------
+    kind : str
+        "grid" or "rbf"
+    ndf_file_path : str
+
+    """
+    return kind, abspath(ndf_file_path)
+
+
 def create_interpolation_model(ndf_file_path):
+    r"""Interpolation model for a .ndf file, from the model cache
+
+    See build_interpolation_model(). The RBF model of a file that is not on
+    a regular grid is only cached under its "rbf" key (the "grid" key
+    caches None).
+
+    """
+    gm = model_cache.get(model_key("grid", ndf_file_path),
+                         ndf_file_path,
+                         lambda: build_grid_model(ndf_file_path))
+    if gm is None:
+        return create_rbf_interpolation_model(ndf_file_path)
+    return gm
+
+
+def build_interpolation_model(ndf_file_path):
+    r"""Create the interpolation model for a .ndf file
+
+    The files written by data_create are on a regular grid: the model
+    is a GridDataModel (see build_grid_model()).
+    A file that is not on a regular grid uses the libra RBF model.
+
+    """
+    gm = build_grid_model(ndf_file_path)
+    if gm is None:
+        return create_rbf_interpolation_model(ndf_file_path)
+    return gm
+
+
+@timeit
+def build_grid_model(ndf_file_path):
+    r"""GridDataModel of a .ndf file, None if it is not on a regular grid
+
+    The model is built from the binary store if it is up to date. The
+    small holes (non converged XFOIL computations) of the grid are
+    filled along the aoa and reynolds axes (see foilix.hole_filling), the
+    libra RBF model is only used for the query points that touch a
+    remaining hole.
+
+    """
+    foil_data_folder, foil_id = split(splitext(ndf_file_path)[0])
+    try:
+        if is_up_to_date(foil_data_folder, foil_id):
+            data = load_foil_data(foil_data_folder, foil_id)
+            gm = GridDataModel.from_rows(input_columns,
+                                         data[:, :len(input_columns)],
+                                         output_columns,
+                                         data[:, len(input_columns):])
+        else:
+            gm = GridDataModel.from_ndf_file(ndf_file_path)
+    except ValueError:
+        logger.info("%s is not on a regular grid, "
+                    "using an RBF model" % ndf_file_path)
+        return None
+    if gm.is_full_grid is False:
+        gm = gm.with_filled_holes()
+    if gm.is_full_grid is False:
+        gm.fallback = lambda: create_rbf_interpolation_model(ndf_file_path)
+    return gm
+
+
+def create_rbf_interpolation_model(ndf_file_path):
+    r"""libra RBF interpolation model for a .ndf file, from the model cache"""
+    return model_cache.get(model_key("rbf", ndf_file_path),
+                           ndf_file_path,
+                           lambda: build_rbf_interpolation_model(ndf_file_path))
+
+
+@timeit
+def build_rbf_interpolation_model(ndf_file_path):
+    from libra.data_model_import import create_partial_data_model_from_file
     pm = create_partial_data_model_from_file(ndf_file_path)
     # print(pm.input_continuous_ranges)
     return pm
 
 
+def input_ranges(ndf_file_path):
+    r"""(min, max) of each input of the data model of a .ndf file
+
+    The ranges are read from the sidecar metadata if it is up to date,
+    the data model is used otherwise
+
+    Returns
+    -------
+    dict
+
+    """
+    metadata = _metadata(ndf_file_path)
+    if metadata is not None:
+        return _tuple_ranges(metadata["valid_ranges"])
+    return create_interpolation_model(ndf_file_path).input_continuous_ranges
+
+
+def _check_range(input_ranges, name, values):
+    r"""Check that values lie in the data model range of the input name
+
+    Parameters
+    ----------
+    input_ranges : dict
+        The input_continuous_ranges of the data model
+    name : str
+        Input name (mach, ncrit, reynolds or aoa)
+    values : float or array of floats
+
+    Raises
+    ------
+    ValueError if a value is outside of the data model range
+
+    """
+    values = np.atleast_1d(values)
+    low, high = input_ranges[name]
+    outside = values[(values < low) | (values > high)]
+    if len(outside) > 0:
+        raise ValueError("%s (%.2f) outside of data model range "
+                         "(%.2f to %.2f)" % (name, outside[0], low, high))
+
+
 @timeit
 def get_data_dict(foil_data_folder, foil_id, mach, ncrit, reynolds, aoa):
-    pm = create_interpolation_model(join(foil_data_folder, "%s.ndf" % foil_id))
-    ir = pm.input_continuous_ranges
-
-    if not (ir['mach'][0] <= mach <= ir['mach'][1]):
-        raise ValueError("mach (%.2f) outside of data model range "
-                         "(%.2f to %.2f)" % (mach,
-                                             ir['mach'][0],
-                                             ir['mach'][1]))
-    if not (ir['ncrit'][0] <= ncrit <= ir['ncrit'][1]):
-        raise ValueError("ncrit (%.2f) outside of data model range "
-                         "(%.2f to %.2f)" % (ncrit,
-                                             ir['ncrit'][0],
-                                             ir['ncrit'][1]))
-    if not (ir['reynolds'][0] <= reynolds <= ir['reynolds'][1]):
-        raise ValueError("reynolds (%.2f) outside of data model range "
-                         "(%.2f to %.2f)" % (reynolds,
-                                             ir['reynolds'][0],
-                                             ir['reynolds'][1]))
-    if not (ir['aoa'][0] <= aoa <= ir['aoa'][1]):
-        raise ValueError("aoa (%.2f) outside of data model range "
-                         "(%.2f to %.2f)" % (aoa, ir['aoa'][0], ir['aoa'][1]))
+    ndf_file_path = _data_file_path(foil_data_folder, foil_id)
+    ir = input_ranges(ndf_file_path)
+
+    _check_range(ir, 'mach', mach)
+    _check_range(ir, 'ncrit', ncrit)
+    _check_range(ir, 'reynolds', reynolds)
+    _check_range(ir, 'aoa', aoa)
+
+    pm = create_interpolation_model(ndf_file_path)
 
     r_initial = pm.interpolate({'mach': mach,
                                 'ncrit': ncrit,
@@ -84,8 +277,202 @@ def get_data_dict(foil_data_folder, foil_id, mach, ncrit, reynolds, aoa):
 
 
 def get_data_tuple(foil_data_folder, foil_id, mach, ncrit, reynolds, aoa):
+    if _query_client is not None:
+        return _query_client.get_data_tuple(foil_data_folder, foil_id,
+                                            mach, ncrit, reynolds, aoa)
     r = get_data_dict(foil_data_folder, foil_id, mach, ncrit, reynolds, aoa)
-    return r['cl'], r['cd'], r['cdp'], r['cm'], r['top_xtr'], r['bot_xtr']
+    return tuple(r[k] for k in data_keys)
+
+
+def get_data_points(foil_data_folder, foil_id, points):
+    r"""Interpolate the pre-computed data at scattered points
+
+    Parameters
+    ----------
+    foil_data_folder : str
+    foil_id : str
+    points : ndarray of shape (n, 4)
+        The columns are mach, ncrit, reynolds, aoa
+
+    Returns
+    -------
+    ndarray of shape (n, 6)
+        The columns are (cl, cd, cdp, cm, top_xtr, bot_xtr)
+
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, len(input_columns))
+    ndf_file_path = _data_file_path(foil_data_folder, foil_id)
+    ir = input_ranges(ndf_file_path)
+    for i, name in enumerate(input_columns):
+        _check_range(ir, name, points[:, i])
+
+    pm = create_interpolation_model(ndf_file_path)
+    r = pm.interpolate({name: points[:, i]
+                        for i, name in enumerate(input_columns)})
+    return np.column_stack([np.asarray(r[key], dtype=float).reshape(-1)
+                            for key in data_keys])
+
+
+def get_data_with_gradient(foil_data_folder, foil_id, mach, ncrit, reynolds,
+                           aoa):
+    r"""Interpolated data and its gradient with respect to aoa, reynolds
+    and ncrit, in a single vectorized query
+
+    The gradient is the analytic gradient of the multilinear interpolation
+    on the grid. Central finite differences of the model are used for the
+    points that touch a remaining hole of the grid and for the models that
+    are not grid models.
+
+    Parameters
+    ----------
+    foil_data_folder : str
+    foil_id : str
+    mach : float or array of floats
+    ncrit : float or array of floats
+    reynolds : float or array of floats
+    aoa : float or array of floats
+        The parameters are broadcast together
+
+    Returns
+    -------
+    tuple(ndarray, ndarray)
+        Values of shape broadcast_shape + (6,), in the data_keys order, and
+        gradients of shape broadcast_shape + (6, 3), in the gradient_keys
+        order (aoa, reynolds, ncrit) along the last axis
+
+    """
+    mach, ncrit, reynolds, aoa = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (mach, ncrit, reynolds, aoa)])
+    shape = aoa.shape
+    points = np.column_stack([v.ravel() for v in (mach, ncrit, reynolds, aoa)])
+
+    ndf_file_path = _data_file_path(foil_data_folder, foil_id)
+    ir = input_ranges(ndf_file_path)
+    for i, name in enumerate(input_columns):
+        _check_range(ir, name, points[:, i])
+
+    pm = create_interpolation_model(ndf_file_path)
+    # columns of the points used for the gradient_keys
+    columns = [list(input_columns).index(name) for name in gradient_keys]
+    if isinstance(pm, GridDataModel):
+        values, gradients = pm.interpolate_points_with_gradient(points)
+        outputs = [pm.output_names.index(key) for key in data_keys]
+        values = values[:, outputs]
+        gradients = gradients[:, outputs][:, :, columns]
+        missing = np.isnan(values).any(axis=1) | \
+            np.isnan(gradients).any(axis=(1, 2))
+    else:
+        values = np.empty((len(points), len(data_keys)))
+        gradients = np.empty((len(points), len(data_keys), len(columns)))
+        missing = np.ones(len(points), dtype=bool)
+
+    if missing.any():
+        values[missing], gradients[missing] = \
+            _finite_difference_gradients(pm, points[missing], ir, columns)
+
+    return values.reshape(shape + (len(data_keys),)), \
+        gradients.reshape(shape + (len(data_keys), len(columns)))
+
+
+def _finite_difference_gradients(pm, points, ir, columns):
+    r"""Values and central finite differences gradients of a data model,
+    one sided at the range ends, in a single call to the model. The
+    gradient along an axis of zero width (e.g. a single ncrit in the data)
+    is 0"""
+    names = list(input_columns)
+    steps = [np.maximum(np.abs(points[:, c]) * 1e-4, 1e-4) for c in columns]
+
+    perturbed = [points]
+    lows, highs = [], []
+    for c, step in zip(columns, steps):
+        low, high = points.copy(), points.copy()
+        low[:, c] = np.maximum(points[:, c] - step, ir[names[c]][0])
+        high[:, c] = np.minimum(points[:, c] + step, ir[names[c]][1])
+        lows.append(low[:, c])
+        highs.append(high[:, c])
+        perturbed.extend([low, high])
+
+    stacked = np.vstack(perturbed)
+    r = pm.interpolate({name: stacked[:, i] for i, name in enumerate(names)})
+    data = np.column_stack([np.asarray(r[key], dtype=float).reshape(-1)
+                            for key in data_keys])
+    data = data.reshape(len(perturbed), len(points), len(data_keys))
+
+    gradients = np.zeros((len(points), len(data_keys), len(columns)))
+    for k in range(len(columns)):
+        widths = (highs[k] - lows[k])[:, np.newaxis]
+        np.divide(data[2 + 2 * k] - data[1 + 2 * k], widths,
+                  out=gradients[:, :, k], where=widths > 0.)
+    return data[0], gradients
+
+
+def set_query_server(address):
+    r"""Send the get_data_tuple() queries to a query server
+
+    Parameters
+    ----------
+    address : str, tuple or None
+        Unix socket path or (host, port) of a foilix.query_server server,
+        None to interpolate in the process again
+
+    """
+    global _query_client
+    if address is None:
+        _query_client = None
+    else:
+        from foilix.query_server import QueryClient
+        _query_client = QueryClient(address)
+
+
+@timeit
+def get_data_array(foil_data_folder, foil_id, mach, ncrits, reynolds, aoas):
+    r"""Interpolate the pre-computed data on a reynolds x ncrit x aoa grid
+
+    The ranges are checked once and all the grid points are interpolated
+    in a single call to the data model
+
+    Parameters
+    ----------
+    foil_data_folder : str
+    foil_id : str
+    mach : float
+    ncrits : list[float]
+    reynolds : list[float]
+    aoas : list[float]
+
+    Returns
+    -------
+    ndarray of shape (len(reynolds), len(ncrits), len(aoas), 6)
+        The last axis is (cl, cd, cdp, cm, top_xtr, bot_xtr)
+
+    """
+    ndf_file_path = _data_file_path(foil_data_folder, foil_id)
+    ir = input_ranges(ndf_file_path)
+
+    ncrits = np.atleast_1d(np.asarray(ncrits, dtype=float))
+    reynolds = np.atleast_1d(np.asarray(reynolds, dtype=float))
+    aoas = np.atleast_1d(np.asarray(aoas, dtype=float))
+
+    _check_range(ir, 'mach', mach)
+    _check_range(ir, 'ncrit', ncrits)
+    _check_range(ir, 'reynolds', reynolds)
+    _check_range(ir, 'aoa', aoas)
+
+    pm = create_interpolation_model(ndf_file_path)
+    reynolds_grid, ncrit_grid, aoa_grid = np.meshgrid(reynolds,
+                                                      ncrits,
+                                                      aoas,
+                                                      indexing='ij')
+
+    r = pm.interpolate({'mach': np.full(aoa_grid.size, float(mach)),
+                        'ncrit': ncrit_grid.ravel(),
+                        'reynolds': reynolds_grid.ravel(),
+                        'aoa': aoa_grid.ravel()})
+
+    data = np.empty(shape=aoa_grid.shape + (len(data_keys),))
+    for k, key in enumerate(data_keys):
+        data[..., k] = np.asarray(r[key], dtype=float).reshape(aoa_grid.shape)
+    return data
 
 
 # def avgs(foil_id, machs, ncrits, reynolds):
@@ -104,6 +491,11 @@ def get_data_tuple(foil_data_folder, foil_id, mach, ncrit, reynolds, aoa):
 #     raise NotImplementedError
 
 
+# e.g. FOILIX_QUERY_SERVER=/tmp/foilix.sock or localhost:8765
+if "FOILIX_QUERY_SERVER" in environ:
+    set_query_server(environ["FOILIX_QUERY_SERVER"])
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO,
                         format='%(asctime)s :: %(levelname)6s :: %(module)20s '
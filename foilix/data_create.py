@@ -1,6 +1,10 @@
 # coding: utf-8
 
 import logging
+import multiprocessing
+import shutil
+from os import makedirs, rename, rmdir
+from os.path import join, isfile, isdir
 
 import numpy as np
 
@@ -9,6 +13,8 @@ from corelib.core.timeout import timeout
 # from corelib.core.profiling import timeit
 
 from foilix.xfoil.xfoil import oper_visc_alpha
+from foilix.binary_store import convert_foil
+from foilix.data_metadata import write_metadata, write_duplicate_metadata
 
 # Python 2 compatibility.
 try:
@@ -21,6 +27,176 @@ logger = logging.getLogger(__name__)
 # avoid spaces in error messages
 error_messages = {u' WARNING: Poor input coordinate distribution\n': "poor_input_coordinate_distribution"}
 
+headers = {"csv": "mach,ncrit,reynolds,aoa,cl,cd,cdp,cm,top_xtr,bot_xtr,warnings\n",
+           "ndf": "0 0 0 0 2 2 2 2 2 2\n"
+                  "mach ncrit reynolds aoa cl cd cdp cm top_xtr bot_xtr\n"}
+
+# values are (format, nb items in format) tuples
+line_formats = {"csv": ("%.2f,%.2f,%.1f,%.2f,%f,%f,%f,%f,%f,%f,%s", 11),
+                "ndf": ("%.2f %.2f %.1f %.2f %f %f %f %f %f %f", 10)}
+
+write_error_lines = {"csv": True, "ndf": False}
+
+# number of decimals used to match the xfoil angles to the requested angles
+AOA_DECIMALS = 6
+
+
+def _angles_of_attack(aoas):
+    r"""Angles of attack of an xfoil format (start, end, step) specification,
+    end included"""
+    return np.arange(aoas[0], aoas[1] + aoas[2] / 2., aoas[2])
+
+
+def _split_formats(formats):
+    r"""Check the formats and split the text formats from the npy format
+
+    Returns
+    -------
+    tuple(list, bool) : text formats, is the npy format requested?
+
+    """
+    if formats is None:
+        formats = ["csv", "ndf"]
+
+    if "npy" in formats and "csv" not in formats:
+        msg = "The npy format requires the csv format"
+        raise ValueError(msg)
+
+    return [format_ for format_ in formats if format_ != "npy"], \
+        "npy" in formats
+
+
+def compute_records(foil_id, ncrit, reynolds, mach, aoas, iterlim=200):
+    r"""Compute the records of a (foil, mach, ncrit, reynolds) xfoil sweep
+
+    There is one record per angle of attack of the aoas specification:
+    the angles that xfoil could not compute have NaN values.
+
+    Parameters
+    ----------
+    foil_id : str
+    ncrit : float
+    reynolds : float
+    mach : float
+    aoas : list
+        xfoil format (start, end, step) specification of angles of attack
+    iterlim : int
+
+    Returns
+    -------
+    list of tuples :
+        [(mach, ncrit, reynolds, aoa, cl, cd, cdp, cm, top_xtr, bot_xtr,
+          warnings), ...]
+
+    """
+    angles = _angles_of_attack(aoas)
+    nans = (float('nan'),) * 6
+
+    try:
+        results = get_data(foil_id,
+                           ncrit,
+                           reynolds,
+                           mach,
+                           aoas,
+                           iterlim=iterlim)
+    except TimeoutError:
+        msg = "%s timedout for mach: %f, ncrit: %f, " \
+              "reynolds: %f" % (foil_id, mach, ncrit, reynolds)
+        logger.error(msg)
+        return [(mach, ncrit, reynolds, aoa) + nans + (["timedout"],)
+                for aoa in angles]
+
+    results_by_aoa = dict()
+    for result in results:
+        key = round(result[0], AOA_DECIMALS)
+        if key in results_by_aoa:
+            msg = "aoa twice or more results !!"
+            raise AssertionError(msg)
+        results_by_aoa[key] = result
+
+    records = []
+    for aoa in angles:
+        try:
+            _, cl, cd, cdp, cm, top_xtr, bot_xtr, warnings = \
+                results_by_aoa[round(aoa, AOA_DECIMALS)]
+        except KeyError:
+            records.append((mach, ncrit, reynolds, aoa) + nans +
+                           (["could_not_be_computed"],))
+            continue
+        # Goal of the following lines is to replace a
+        # warning with spaces by a warning without spaces
+        # spaces are not good for later use of data files !
+        new_warnings = [error_messages.get(w, w) for w in warnings]
+        records.append((mach, ncrit, reynolds, aoa,
+                        cl, cd, cdp, cm, top_xtr, bot_xtr, new_warnings))
+    return records
+
+
+def format_lines(records, format_):
+    r"""Data file lines of records
+
+    Parameters
+    ----------
+    records : list of tuples
+        As returned by compute_records()
+    format_ : str
+        "csv" or "ndf"
+
+    Returns
+    -------
+    list[str] : lines, with their end of line
+
+    """
+    line_format, nb_items = line_formats[format_]
+    lines = []
+    for record in records:
+        if np.isnan(record[4]) and write_error_lines[format_] is False:
+            continue
+        items = tuple(record[:10]) + (str(record[10]),)
+        lines.append("%s\n" % (line_format % items[:nb_items]))
+    return lines
+
+
+def _csv_line_to_ndf_line(line):
+    r"""ndf line of a csv line, None for the lines of non computed angles
+
+    Both formats use the same number formats, the ndf line is made of
+    the 10 first csv fields
+    """
+    fields = line.split(",", 10)[:10]
+    if fields[4] == "nan":
+        return None
+    return "%s\n" % " ".join(fields)
+
+
+def write_data_files(foil_data_folder, foil_id, csv_lines, formats):
+    r"""Write the data files of a foil (one write per file) and its
+    sidecar metadata file
+
+    Parameters
+    ----------
+    foil_data_folder : str
+    foil_id : str
+    csv_lines : list[str]
+        The data lines in csv format, the other formats are derived from them
+    formats : list[str]
+        Text formats
+
+    """
+    for format_ in formats:
+        if format_ == "csv":
+            lines = csv_lines
+        else:
+            lines = [l for l in (_csv_line_to_ndf_line(c) for c in csv_lines)
+                     if l is not None]
+        with open(join(foil_data_folder, "%s.%s" % (foil_id, format_)),
+                  'w') as f:
+            f.write(headers[format_])
+            f.writelines(lines)
+
+    # written last so that it is not older than the data files
+    write_metadata(foil_data_folder, foil_id, csv_lines)
+
 
 def create_data(foil_id,
                 ncrits,
@@ -41,137 +217,216 @@ def create_data(foil_id,
         xfoil format (start, end, step) specification of angles of attack
     iterlim : int
     formats : list
-        List of output formats
+        List of output formats ("csv", "ndf" and/or "npy")
+        The "npy" binary format is converted from the "csv" format
 
     """
-    if formats is None:
-        formats = ["csv", "ndf"]
+    formats, binary = _split_formats(formats)
+    foil_data_folder = p_(__file__, "../foil_data")
+
+    csv_lines = []
+    for mach in machs:
+        for ncrit in ncrits:
+            for reynolds in reynoldss:
+                records = compute_records(foil_id,
+                                          ncrit,
+                                          reynolds,
+                                          mach,
+                                          aoas,
+                                          iterlim=iterlim)
+                csv_lines.extend(format_lines(records, "csv"))
 
-    header = {"csv": "mach,ncrit,reynolds,aoa,cl,cd,cdp,cm,top_xtr,bot_xtr,warnings\n",
-              "ndf": "0 0 0 0 2 2 2 2 2 2\n"
-                     "mach ncrit reynolds aoa cl cd cdp cm top_xtr bot_xtr\n"}
+    write_data_files(foil_data_folder, foil_id, csv_lines, formats)
 
-    # values are (format, nb items in format) tuples
-    line_format = {"csv": ("%.2f,%.2f,%.1f,%.2f,%f,%f,%f,%f,%f,%f,%s", 11),
-                   "ndf": ("%.2f %.2f %.1f %.2f %f %f %f %f %f %f", 10)}
+    if binary is True:
+        convert_foil(foil_data_folder, foil_id)
 
-    foil_data_file = {"csv": p_(__file__, "../foil_data/%s.csv" % foil_id),
-                      "ndf": p_(__file__, "../foil_data/%s.ndf" % foil_id)}
 
-    write_error_lines = {"csv": True, "ndf": False}
+def shard_path(shard_folder, foil_id, mach, ncrit, reynolds):
+    r"""Path to the shard file of a (foil, mach, ncrit, reynolds) task"""
+    return join(shard_folder,
+                foil_id,
+                "%.2f_%.2f_%.1f.csv" % (mach, ncrit, reynolds))
 
-    for format_ in formats:
-        with open(foil_data_file[format_], 'w') as f:
-            f.write(header[format_])
 
+def compute_shard(task):
+    r"""Compute a (foil, mach, ncrit, reynolds) task and write its shard
+
+    The shard holds the csv lines of the task (no header). It is written
+    to a temporary file that is renamed when complete, so that an
+    interrupted task never leaves a shard behind.
+
+    Parameters
+    ----------
+    task : tuple
+        (foil_id, mach, ncrit, reynolds, aoas, iterlim, shard_folder)
+
+    Returns
+    -------
+    str : path to the shard
+
+    """
+    foil_id, mach, ncrit, reynolds, aoas, iterlim, shard_folder = task
+    records = compute_records(foil_id,
+                              ncrit,
+                              reynolds,
+                              mach,
+                              aoas,
+                              iterlim=iterlim)
+    path = shard_path(shard_folder, foil_id, mach, ncrit, reynolds)
+    with open("%s.tmp" % path, 'w') as f:
+        f.writelines(format_lines(records, "csv"))
+    rename("%s.tmp" % path, path)
+    return path
+
+
+def merge_shards(foil_id,
+                 ncrits,
+                 reynoldss,
+                 machs,
+                 shard_folder,
+                 foil_data_folder,
+                 formats=None,
+                 remove_shards=False):
+    r"""Merge the shards of a foil into its data files
+
+    The lines are written in the same mach, ncrit, reynolds order as
+    create_data()
+
+    Parameters
+    ----------
+    remove_shards : bool, optional
+        Remove the shards of the foil once its data files are written (the
+        shard folder too, if it is then empty). The shards are kept if the
+        merge fails, so that the generation can resume.
+
+    Raises
+    ------
+    IOError if a shard is missing
+
+    """
+    formats, binary = _split_formats(formats)
+
+    csv_lines = []
     for mach in machs:
         for ncrit in ncrits:
             for reynolds in reynoldss:
-                try:
-                    results = get_data(foil_id,
-                                       ncrit,
-                                       reynolds,
-                                       mach,
-                                       aoas,
-                                       iterlim=iterlim)
-
-                    for _, aoa in enumerate(
-                            np.arange(aoas[0],
-                                      aoas[1] + aoas[2] / 2.,
-                                      aoas[2])):
-                        # is the answer in results?
-                        record = [r for r in results if r[0] == aoa]
-                        if len(record) == 1:
-                            _, cl, cd, cdp, cm, top_xtr, bot_xtr, warnings = \
-                                record[0]
-                            # Goal of the following lines is to replace a
-                            # warning with spaces by a warning without spaces
-                            # spaces are not good for later use of data files !
-                            new_warnings = []
-                            for w in warnings:
-                                try:
-                                    new_warnings.append(error_messages[w])
-                                except KeyError:
-                                    new_warnings.append(w)
-                            for format_ in formats:
-                                data_line = line_format[format_][0] % (mach,
-                                                                       ncrit,
-                                                                       reynolds,
-                                                                       aoa,
-                                                                       cl,
-                                                                       cd,
-                                                                       cdp,
-                                                                       cm,
-                                                                       top_xtr,
-                                                                       bot_xtr,
-                                                                       str(new_warnings))[:line_format[format_][1]]
-                                # print(data_line)
-                                with open(foil_data_file[format_], 'a') as f:
-                                    f.write("%s\n" % data_line)
-                        else:
-                            if len(record) > 1:
-                                msg = "aoa twice or more results !!"
-                                raise AssertionError(msg)
-
-                            _, cl, cd, cdp, cm, top_xtr, bot_xtr, warnings = \
-                                (aoa,
-                                 float('nan'),
-                                 float('nan'),
-                                 float('nan'),
-                                 float('nan'),
-                                 float('nan'),
-                                 float('nan'),
-                                 ["could_not_be_computed"])
-
-                            for format_ in formats:
-                                data_line = line_format[format_][0] % (mach,
-                                                                       ncrit,
-                                                                       reynolds,
-                                                                       aoa,
-                                                                       cl,
-                                                                       cd,
-                                                                       cdp,
-                                                                       cm,
-                                                                       top_xtr,
-                                                                       bot_xtr,
-                                                                       str(warnings))[:line_format[format_][1]]
-                                # print(data_line)
-                                if write_error_lines[format_] is True:
-                                    with open(foil_data_file[format_], 'a') as f:
-                                        f.write("%s\n" % data_line)
-                except TimeoutError:
-                    msg = "%s timedout for mach: %f, ncrit: %f, " \
-                          "reynolds: %f" % (foil_id, mach, ncrit, reynolds)
-                    logger.error(msg)
-                    for _, aoa in enumerate(
-                            np.arange(aoas[0],
-                                      aoas[1] + aoas[2] / 2.,
-                                      aoas[2])):
-                        _, cl, cd, cdp, cm, top_xtr, bot_xtr, warnings = \
-                            (aoa,
-                             float('nan'),
-                             float('nan'),
-                             float('nan'),
-                             float('nan'),
-                             float('nan'),
-                             float('nan'),
-                             ["timedout"])
-                        for format_ in formats:
-                            data_line = line_format[format_][0] % (mach,
-                                                                   ncrit,
-                                                                   reynolds,
-                                                                   aoa,
-                                                                   cl,
-                                                                   cd,
-                                                                   cdp,
-                                                                   cm,
-                                                                   top_xtr,
-                                                                   bot_xtr,
-                                                                   str(warnings))[:line_format[format_][1]:]
-                            # print(data_line)
-                            if write_error_lines[format_] is True:
-                                with open(foil_data_file[format_], 'a') as f:
-                                    f.write("%s\n" % data_line)
+                path = shard_path(shard_folder, foil_id, mach, ncrit, reynolds)
+                if not isfile(path):
+                    msg = "Missing shard %s" % path
+                    raise IOError(msg)
+                with open(path) as f:
+                    csv_lines.extend(f.readlines())
+
+    write_data_files(foil_data_folder, foil_id, csv_lines, formats)
+
+    if binary is True:
+        convert_foil(foil_data_folder, foil_id)
+
+    if remove_shards is True:
+        shutil.rmtree(join(shard_folder, foil_id))
+        try:
+            rmdir(shard_folder)
+        except OSError:  # other foils still have shards
+            pass
+
+
+def create_data_parallel(foil_ids,
+                         ncrits,
+                         reynoldss,
+                         machs,
+                         aoas,
+                         iterlim=200,
+                         formats=None,
+                         processes=None,
+                         shard_folder=None,
+                         foil_dat_folder=None):
+    r"""Create the data files of many foils with a pool of xfoil processes
+
+    Each (foil, mach, ncrit, reynolds) xfoil sweep is a task that writes a
+    shard file. The tasks that already have a shard are skipped, so that an
+    interrupted generation resumes where it stopped. The shards of each
+    foil are merged into its data files once all its tasks are done, and
+    removed once merged.
+
+    Parameters
+    ----------
+    foil_ids : list[str]
+    ncrits : list
+    reynoldss : list
+    machs : list
+    aoas : list
+        xfoil format (start, end, step) specification of angles of attack
+    iterlim : int
+    formats : list
+        List of output formats ("csv", "ndf" and/or "npy")
+    processes : int, optional
+        Number of worker processes, default is the number of CPUs
+    shard_folder : str, optional
+        Default is foil_data/shards
+    foil_dat_folder : str, optional
+        If given, the foils of foil_ids that are geometric duplicates of
+        another foil of foil_ids (see foilix.shape_search) are skipped: their
+        metadata file points to the data of the kept foil, which data_api
+        uses for them
+
+    Returns
+    -------
+    list[str] : the ids of the foils whose data files were written
+                (foil_ids without the skipped duplicates)
+
+    """
+    _split_formats(formats)
+    foil_data_folder = p_(__file__, "../foil_data")
+    duplicates = dict()
+    if foil_dat_folder is not None:
+        from foilix.shape_search import duplicate_foil_ids
+        duplicates = duplicate_foil_ids(foil_dat_folder, foil_ids)
+        foil_ids = [f for f in foil_ids if f not in duplicates]
+    if shard_folder is None:
+        shard_folder = join(foil_data_folder, "shards")
+
+    tasks = []
+    nb_tasks = 0
+    for foil_id in foil_ids:
+        if not isdir(join(shard_folder, foil_id)):
+            makedirs(join(shard_folder, foil_id))
+        for mach in machs:
+            for ncrit in ncrits:
+                for reynolds in reynoldss:
+                    nb_tasks += 1
+                    if isfile(shard_path(shard_folder,
+                                         foil_id,
+                                         mach,
+                                         ncrit,
+                                         reynolds)):
+                        continue
+                    tasks.append((foil_id, mach, ncrit, reynolds,
+                                  aoas, iterlim, shard_folder))
+
+    logger.info("%i tasks, %i already computed" % (nb_tasks,
+                                                    nb_tasks - len(tasks)))
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for i, path in enumerate(pool.imap_unordered(compute_shard, tasks)):
+            logger.info("%i/%i : %s" % (i + 1, len(tasks), path))
+    finally:
+        pool.close()
+        pool.join()
+
+    for foil_id in foil_ids:
+        merge_shards(foil_id,
+                     ncrits,
+                     reynoldss,
+                     machs,
+                     shard_folder,
+                     foil_data_folder,
+                     formats=formats,
+                     remove_shards=True)
+    for foil_id, kept_foil_id in sorted(duplicates.items()):
+        write_duplicate_metadata(foil_data_folder, foil_id, kept_foil_id)
+    return foil_ids
 
 
 @timeout(60)
@@ -255,17 +510,18 @@ if __name__ == "__main__":
         logger.info("Processing %i symmetrical foils" % len(sym_foil_ids))
 
         if True:
-            for foil_id in sym_foil_ids:
-                logger.info("Processing %s" % foil_id)
-                create_data(foil_id,
-                            ncrits=[1., 2., 3., 4.],
-                            # reynoldss=[5e4, 1e5, 1.5e5, 2e5],
-                            reynoldss=np.arange(5e3, 3e5 + 1, 5e3),
-                            machs=[0.],
-                            aoas=[0., 15., 1.],
-                            iterlim=200,
-                            formats=["csv", "ndf"])
+            sym_foil_ids = create_data_parallel(sym_foil_ids,
+                                                ncrits=[1., 2., 3., 4.],
+                                                # reynoldss=[5e4, 1e5, 1.5e5, 2e5],
+                                                reynoldss=np.arange(5e3, 3e5 + 1, 5e3),
+                                                machs=[0.],
+                                                aoas=[0., 15., 1.],
+                                                iterlim=200,
+                                                formats=["csv", "ndf", "npy"],
+                                                foil_dat_folder="../foil_dat")
 
+            for foil_id in sym_foil_ids:
+                logger.info("Checking %s" % foil_id)
                 ta = time.time()
                 df = pd.read_csv("../foil_data/%s.csv" % foil_id)
                 tb = time.time()
@@ -279,4 +535,4 @@ if __name__ == "__main__":
                                   delimiter=r"\s+")
                 logger.info("%i records in ndf file" % df2.shape[0])
     else:
-        raise EnvironmentError("Generating the data works better with Python 2")
\ No newline at end of file
+        raise EnvironmentError("Generating the data works better with Python 2")
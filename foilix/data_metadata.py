@@ -0,0 +1,205 @@
+# coding: utf-8
+
+r"""Sidecar metadata of the pre-computed foil data files
+
+data_create writes a <foil_id>.json file next to the .csv and .ndf files
+with the row counts, the input ranges, the grid shape and a hash of the
+data lines. The data summaries and the range checks of data_api read it
+instead of parsing the data files.
+
+"""
+
+import hashlib
+import json
+import logging
+from os import stat
+from os.path import join
+
+import numpy as np
+
+from foilix.binary_store import input_columns
+
+logger = logging.getLogger(__name__)
+
+# metadata file path -> (modification times of the metadata, csv and ndf
+# files, parsed metadata), the metadata is parsed again if a time changed
+_cache = dict()
+
+
+def metadata_file_path(foil_data_folder, foil_id):
+    r"""Path to the metadata file of a foil"""
+    return join(foil_data_folder, "%s.json" % foil_id)
+
+
+def build_metadata(csv_lines):
+    r"""Metadata of the csv lines of a foil data file
+
+    Parameters
+    ----------
+    csv_lines : list[str]
+        The data lines of the .csv file, header excluded
+
+    Returns
+    -------
+    dict
+        nb_rows : number of rows (the .csv file rows)
+        nb_valid_rows : number of converged rows (the .ndf file rows)
+        ranges : {input name: [min, max]} of all the rows
+        valid_ranges : {input name: [min, max]} of the converged rows
+        grid_shape : number of distinct values of each input
+        hash : sha1 of the data lines
+
+    """
+    data = np.array([line.split(",", 10)[:10] for line in csv_lines],
+                    dtype=float).reshape(-1, 10)
+    inputs = data[:, :len(input_columns)]
+    valid = ~np.isnan(data).any(axis=1)
+
+    def _ranges(rows):
+        if rows.shape[0] == 0:
+            return {name: None for name in input_columns}
+        return {name: [float(rows[:, i].min()), float(rows[:, i].max())]
+                for i, name in enumerate(input_columns)}
+
+    return {"nb_rows": int(data.shape[0]),
+            "nb_valid_rows": int(valid.sum()),
+            "ranges": _ranges(inputs),
+            "valid_ranges": _ranges(inputs[valid]),
+            "grid_shape": [int(len(np.unique(inputs[:, i])))
+                           for i in range(len(input_columns))],
+            "hash": hashlib.sha1("".join(csv_lines).encode("utf-8")).hexdigest()}
+
+
+def write_metadata(foil_data_folder, foil_id, csv_lines):
+    r"""Write the metadata file of a foil
+
+    Parameters
+    ----------
+    foil_data_folder : str
+    foil_id : str
+    csv_lines : list[str]
+        The data lines of the .csv file, header excluded
+
+    Returns
+    -------
+    dict : the metadata
+
+    """
+    metadata = build_metadata(csv_lines)
+    path = metadata_file_path(foil_data_folder, foil_id)
+    with open(path, 'w') as f:
+        json.dump(metadata, f, indent=2, sort_keys=True)
+    # the modification time may not change if the file is rewritten quickly
+    _cache.pop(path, None)
+    return metadata
+
+
+def write_metadata_from_csv(foil_data_folder, foil_id):
+    r"""Write the metadata file of a foil from its existing .csv file"""
+    with open(join(foil_data_folder, "%s.csv" % foil_id)) as f:
+        csv_lines = f.readlines()[1:]
+    return write_metadata(foil_data_folder, foil_id, csv_lines)
+
+
+def write_duplicate_metadata(foil_data_folder, foil_id, kept_foil_id):
+    r"""Write the metadata file of a foil that has no data files because it
+    is a geometric duplicate of another foil (see foilix.shape_search)
+
+    Parameters
+    ----------
+    foil_data_folder : str
+    foil_id : str
+        The duplicate foil
+    kept_foil_id : str
+        The foil whose data files hold the data of foil_id
+
+    Returns
+    -------
+    dict : the metadata
+
+    """
+    metadata = {"duplicate_of": kept_foil_id}
+    path = metadata_file_path(foil_data_folder, foil_id)
+    with open(path, 'w') as f:
+        json.dump(metadata, f, indent=2, sort_keys=True)
+    _cache.pop(path, None)
+    return metadata
+
+
+def resolve_foil_id(foil_data_folder, foil_id):
+    r"""Id of the foil whose data files hold the data of foil_id
+
+    Parameters
+    ----------
+    foil_data_folder : str
+    foil_id : str
+
+    Returns
+    -------
+    str : foil_id if it has data files, the kept foil id if foil_id is a
+          skipped geometric duplicate (see write_duplicate_metadata())
+
+    """
+    if _mtime(join(foil_data_folder, "%s.ndf" % foil_id)) is not None or \
+            _mtime(join(foil_data_folder, "%s.csv" % foil_id)) is not None:
+        return foil_id
+    metadata = read_metadata(foil_data_folder, foil_id)
+    if metadata is None:
+        return foil_id
+    return metadata.get("duplicate_of", foil_id)
+
+
+def _mtime(path):
+    r"""Modification time of a file, None if there is no such file"""
+    try:
+        return stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def read_metadata(foil_data_folder, foil_id):
+    r"""Metadata of a foil, None if there is no up to date metadata file
+
+    The metadata file is out of date if the .csv or the .ndf file is newer.
+    The parsed metadata is kept in memory while the modification times of
+    the files are unchanged: the returned dict is shared and should not be
+    modified
+
+    Returns
+    -------
+    dict or None
+
+    """
+    path = metadata_file_path(foil_data_folder, foil_id)
+    mtimes = tuple(_mtime(p) for p in
+                   (path,
+                    join(foil_data_folder, "%s.csv" % foil_id),
+                    join(foil_data_folder, "%s.ndf" % foil_id)))
+    if mtimes[0] is None:
+        return None
+    if any(mtime is not None and mtime > mtimes[0] for mtime in mtimes[1:]):
+        logger.debug("%s is out of date" % path)
+        return None
+
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == mtimes:
+        return cached[1]
+    with open(path) as f:
+        metadata = json.load(f)
+    _cache[path] = (mtimes, metadata)
+    return metadata
+
+
+if __name__ == "__main__":
+    from os import listdir
+    from os.path import splitext
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+
+    folder = "../foil_data"
+    foil_ids = [splitext(f)[0] for f in listdir(folder) if f.endswith(".csv")]
+    for foil_id in foil_ids:
+        write_metadata_from_csv(folder, foil_id)
+    logger.info("Wrote the metadata of %i foils" % len(foil_ids))
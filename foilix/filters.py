@@ -4,24 +4,30 @@
 r"""Filter dat files"""
 
 
-import os
-import re
 import logging
 
-from foilix.foil import Foil
+from foilix.foil_catalog import FoilCatalog
 
 
 logger = logging.getLogger(__name__)
 
 
-def sort_foils_folder(foil_data_folder):
+def sort_foils_folder(foil_data_folder, processes=1):
     r"""Separate file names related to symmetrical foils from file names
     related to unsymmetrical foils
 
+    The foils are read from the catalog of the folder
+    (foilix.foil_catalog.FoilCatalog), written to foil_catalog.sqlite in
+    the folder (in memory if the folder is read-only) and updated with the
+    new and changed files
+
     Parameters
     ----------
     foil_data_folder : str
         Path to the folder where the foil dat files are
+    processes : int or None, optional
+        Number of processes indexing the new and changed files, default is
+        1 (sequential, usable from a worker process), None for all the CPUs
 
     Returns
     -------
@@ -30,29 +36,23 @@ def sort_foils_folder(foil_data_folder):
          list of unsymmetrical foils files paths)
 
     """
-    # foil_data_folder = os.path.abspath(foil_data_folder)
-    dat_files = [os.path.join(foil_data_folder, f)
-                 for f in os.listdir(foil_data_folder)
-                 if re.match(r".*\.dat", f)]
-    foils = [Foil.from_dat_file(dt) for dt in dat_files]
-
-    foils_symmetrical, foils_unsymmetrical = list(), list()
-
-    for i, foil in enumerate(foils):
-        if foil.is_symmetrical() is True:
-            foils_symmetrical.append(dat_files[i])
-        else:
-            foils_unsymmetrical.append(dat_files[i])
-    return foils_symmetrical, foils_unsymmetrical
+    with FoilCatalog(foil_data_folder, processes=processes) as catalog:
+        return catalog.dat_files(symmetrical=True), \
+            catalog.dat_files(symmetrical=False)
 
 
-def symmetrical_dat_files(foil_dat_folder):
+def symmetrical_dat_files(foil_dat_folder, processes=1):
     r"""Return a list of symmetrical dat files
 
+    The foils are read from the catalog of the folder, see
+    sort_foils_folder()
+
     Parameters
     ----------
     foil_dat_folder : str
         The path to the folder containing the 2d section dat files
+    processes : int or None, optional
+        see sort_foils_folder()
 
     Returns
     -------
@@ -63,15 +63,8 @@ def symmetrical_dat_files(foil_dat_folder):
 
     logger.info("Listing symmetrical .dat files in %s" % foil_dat_folder)
 
-    # list of files with the .dat extension in the foil_data folder
-    section_2d_files = [os.path.join(foil_dat_folder, f)
-                        for f in os.listdir(foil_dat_folder)
-                        if re.match(r".*\.dat", f)]
-    logger.debug("%i section_2d_files" % len(section_2d_files))
-
-    # List of symmetrical files in foil_data folder
-    _symmetrical_dat_files = [f for f in section_2d_files
-                              if Foil.from_dat_file(f).is_symmetrical() is True]
+    with FoilCatalog(foil_dat_folder, processes=processes) as catalog:
+        _symmetrical_dat_files = catalog.dat_files(symmetrical=True)
 
     logger.info("Found %i symmetrical files in %s" %
                 (len(_symmetrical_dat_files), foil_dat_folder))
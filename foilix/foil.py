@@ -7,24 +7,138 @@ import re
 import logging
 from math import sqrt
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
+def _is_point_line(items):
+    try:
+        float(items[0]), float(items[1])
+        return True
+    except (ValueError, IndexError):
+        return False
+
+
+def _parse_dat_lines(lines):
+    r"""Line by line parsing, for the files that parse_dat() cannot parse in
+    bulk (e.g. text or garbage between the points)"""
+    points = list()
+    for line in lines:
+        line_items = re.findall(b'\\S+', line)
+        try:
+            x, y = float(line_items[0]), float(line_items[1])
+            # see header of bqm34.dat or clarky.dat to see
+            # why <= 1 is required in the next if statement
+            if x <= 1. and y <= 1:
+                points.append((x, y))
+        except (ValueError, IndexError):
+            pass  # This is normal behavior, happens on header lines
+    return np.array(points, dtype=float).reshape(-1, 2)
+
+
+def parse_dat(data):
+    r"""Parse the content of a .dat file
+
+    The header lines (the lines before the first line that starts with 2
+    numbers) are skipped, the remaining lines are converted to floats in
+    one go (numpy.loadtxt). The Lednicer point counts line (e.g. 17. 17.) and any point
+    outside of x <= 1 and y <= 1 are removed.
+
+    Parameters
+    ----------
+    data : bytes
+        The content of the .dat file
+
+    Returns
+    -------
+    tuple(ndarray, tuple(int, int) or None)
+        Points of shape (N, 2) in the order of the file,
+        Lednicer (nb upper points, nb lower points) or None (Selig format)
+
+    """
+    lines = data.split(b"\n")
+    header_length = 0
+    while header_length < len(lines) and \
+            not _is_point_line(lines[header_length].split()):
+        header_length += 1
+    if header_length == len(lines):
+        return np.zeros((0, 2)), None
+
+    try:
+        values = np.loadtxt(lines[header_length:], comments=None, ndmin=2)
+    except ValueError:
+        values = None
+    if values is None or values.shape[1] < 2:
+        # e.g. text lines between the points, varying number of columns
+        logger.debug("Line by line parsing")
+        return _parse_dat_lines(lines), None
+    values = values[:, :2]
+
+    lednicer_counts = None
+    if values.shape[0] > 0 and np.all(values[0] > 1.) and \
+            np.all(values[0] == np.round(values[0])) and \
+            values[0].sum() == values.shape[0] - 1:
+        lednicer_counts = tuple(int(n) for n in values[0])
+    return values[(values[:, 0] <= 1.) & (values[:, 1] <= 1.)], \
+        lednicer_counts
+
+
+class _cached_property(object):
+    r"""Property computed on first access and stored in the _cache of the
+    instance (Foil has __slots__, hence no __dict__ to store it)"""
+    def __init__(self, function):
+        self.function = function
+        self.__doc__ = function.__doc__
+        self.__name__ = function.__name__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return instance._cache[self.__name__]
+        except KeyError:
+            value = instance._cache[self.__name__] = self.function(instance)
+            return value
+
+
 class Foil(object):
     r"""Foil representation as a name and a list of points
 
+    The points are stored as a read-only (N, 2) float array and the
+    geometric properties are computed once
+
     Parameters
     ----------
     name : str
         The name given to the foil
-    points : tuple(tuple(float, float))
+    points : tuple(tuple(float, float)) or ndarray of shape (N, 2)
         List of point coordinates
 
     """
+    __slots__ = ("name", "_points", "_cache")
+
     def __init__(self, name, points):
         self.name = name
         self.points = points
 
+    @property
+    def points(self):
+        r"""Point coordinates, read-only ndarray of shape (N, 2)"""
+        return self._points
+
+    @points.setter
+    def points(self, points):
+        points = np.array(points, dtype=float).reshape(-1, 2)
+        points.flags.writeable = False
+        self._points = points
+        self._cache = dict()
+
+    @property
+    def nbytes(self):
+        r"""Memory used by the points"""
+        return self._points.nbytes
+
     @classmethod
     def from_dat_file(cls, filepath):
         r"""Construct a Foil from a path to a dat file
@@ -47,27 +161,9 @@ class Foil(object):
         #        only works for symmetrical foils
         #        (where is the leading edge on an unsymmetrical foil anyway?)
         name = os.path.splitext(os.path.basename(filepath))[0]
-
-        points = list()
-
-        import sys
-
-        mode = 'rb' if sys.version_info[0] >= 3 else 'r'
-
-        with open(filepath, mode) as f:
-            for line in f.readlines():
-                regex = b'\S+' if sys.version_info[0] >= 3 else r'\S+'
-                line_items = re.findall(regex, line)
-                try:
-                    x, y = float(line_items[0]), float(line_items[1])
-                    # see header of bqm34.dat or clarky.dat to see
-                    # why <= 1 is required in the next if statement
-                    if x <= 1. and y <= 1:
-                        points.append((x, y))
-                except (ValueError, IndexError):
-                    pass  # This is normal behavior, happens on header lines
-                    # print("Wrong data or header, skipping it")
-        return cls(name, tuple(points))
+        with open(filepath, 'rb') as f:
+            points, _ = parse_dat(f.read())
+        return cls(name, points)
 
     def is_symmetrical(self, tolerance=1.2e-5):
         r"""Test the symmetry of the foil
@@ -81,13 +177,19 @@ class Foil(object):
         bool : True if symmetrical, False otherwise
 
         """
+        key = ("is_symmetrical", tolerance)
+        if key not in self._cache:
+            self._cache[key] = self._is_symmetrical(tolerance)
+        return self._cache[key]
+
+    def _is_symmetrical(self, tolerance):
         # some foils are unsymmetrical (near trailing edge e.g. sc20402.dat
         # or in the middle e.g. stcyr171.dat)
         # but are considered symmetrical by this function
         # -> test on the whole array
-
-        upper_ys = [y for _, y in self.points if y > 0.]
-        lower_ys = [abs(y) for _, y in self.points if y < 0.]
+        ys = self._points[:, 1]
+        upper_ys = ys[ys > 0.]
+        lower_ys = np.abs(ys[ys < 0.])
 
         # some foils only have positive coordinates
         if len(upper_ys) == 0 or len(lower_ys) == 0:
@@ -101,7 +203,7 @@ class Foil(object):
             return False
 
         # basic condition for symmetry, look no further if not the case
-        if not (max(upper_ys) - tolerance <= max(lower_ys) <= max(upper_ys) + tolerance):
+        if not (upper_ys.max() - tolerance <= lower_ys.max() <= upper_ys.max() + tolerance):
             logger.debug("%s is not symmetrical - maximums do not match" %
                          self.name)
             return False
@@ -109,22 +211,26 @@ class Foil(object):
         # some foils are defined 1 -> 0 -> 1 and others are
         #                                                 defined 0 -> 1 0 -> 1
         # consider both cases
-        lower_ys_reversed = list(reversed([abs(p[1]) for p in self.points if p[1] < 0.]))
-        for y_u, y_l, y_l_reversed in zip(upper_ys, lower_ys, lower_ys_reversed):
+        lower_ys_reversed = lower_ys[::-1]
+
+        def _matches(y_l):
             # add an 1e-6 tolerance for repaneled airfoils
-            if not(y_l - tolerance <= y_u <= y_l + tolerance) and \
-                    not(y_l_reversed - tolerance <= y_u <= y_l_reversed + tolerance):
-                logger.debug("%s is not symmetrical - at least a point is not "
-                             "symmetrical" % self.name)
-                logger.debug("y_l : %s" % str(y_l))
-                logger.debug("y_u : %s" % str(y_u))
-                logger.debug("y_l_reversed : %s" % str(y_l_reversed))
-                logger.debug("tolerance : %s" % str(tolerance))
-                return False
+            return (y_l - tolerance <= upper_ys) & (upper_ys <= y_l + tolerance)
+
+        mismatches = ~(_matches(lower_ys) | _matches(lower_ys_reversed))
+        if mismatches.any():
+            i = int(np.argmax(mismatches))
+            logger.debug("%s is not symmetrical - at least a point is not "
+                         "symmetrical" % self.name)
+            logger.debug("y_l : %s" % str(lower_ys[i]))
+            logger.debug("y_u : %s" % str(upper_ys[i]))
+            logger.debug("y_l_reversed : %s" % str(lower_ys_reversed[i]))
+            logger.debug("tolerance : %s" % str(tolerance))
+            return False
 
         return True
 
-    @property
+    @_cached_property
     def y_spread(self):
         r"""Foil y spread (maximum y - minimum y)
 
@@ -135,9 +241,10 @@ class Foil(object):
         float : The y spread of the foil
 
         """
-        return max([y for _, y in self.points]) - min([y for _, y in self.points])
+        ys = self._points[:, 1]
+        return float(ys.max() - ys.min())
 
-    @property
+    @_cached_property
     def max_y_x(self):
         r"""Foil x position of maximum y
 
@@ -148,11 +255,9 @@ class Foil(object):
         float : The x position of max y
 
         """
-        ys = [y for _, y in self.points]
-        y_max = max(ys)
-        return self.points[ys.index(y_max)][0]
+        return float(self._points[np.argmax(self._points[:, 1]), 0])
 
-    @property
+    @_cached_property
     def min_y_x(self):
         r"""Foil x position of minimum y
 
@@ -163,11 +268,9 @@ class Foil(object):
         float : The x position of min y
 
         """
-        ys = [y for _, y in self.points]
-        y_min = min(ys)
-        return self.points[ys.index(y_min)][0]
+        return float(self._points[np.argmin(self._points[:, 1]), 0])
 
-    @property
+    @_cached_property
     def pseudo_leading_edge_radius(self):
         r"""Estimation of the leading edge radius using points
         around leading edge
@@ -185,10 +288,10 @@ class Foil(object):
         # from
         #   https://fr.mathworks.com/matlabcentral/newsreader/view_thread/128429
         try:
-            mid_point_index = int(len(self.points) / 2)
-            x2, y2 = self.points[mid_point_index]
-            x1, y1 = self.points[mid_point_index - 1]
-            x3, y3 = self.points[mid_point_index + 1]
+            mid_point_index = int(len(self._points) / 2)
+            x2, y2 = self._points[mid_point_index].tolist()
+            x1, y1 = self._points[mid_point_index - 1].tolist()
+            x3, y3 = self._points[mid_point_index + 1].tolist()
 
             # The three sides
             a = sqrt((x1 - x2)**2 + (y1 - y2)**2)
@@ -201,7 +304,7 @@ class Foil(object):
         except ZeroDivisionError:
             return -1
 
-    @property
+    @_cached_property
     def has_closed_te(self):
         r"""Is the trailing edge closed?
 
@@ -210,7 +313,4 @@ class Foil(object):
         bool
 
         """
-        if self.points[0][1] == self.points[-1][1] == 0.:
-            return True
-        else:
-            return False
+        return bool(self._points[0, 1] == self._points[-1, 1] == 0.)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Persistent index of the geometric features of the foils of a .dat folder
+
+The catalog is a SQLite database stored in the .dat folder. A .dat file
+is parsed again only if its modification time changed since it was
+indexed, the files that no longer exist are removed from the index.
+The files to index are parsed by chunks over a pool of processes.
+
+Examples
+--------
+>>> with FoilCatalog("../foil_dat") as catalog:
+...     dat_files = catalog.dat_files(symmetrical=True, max_thickness=0.1)
+
+"""
+
+import logging
+import multiprocessing
+import os
+import re
+import sqlite3
+
+import numpy as np
+
+from foilix.foil import Foil
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE = "foil_catalog.sqlite"
+
+# number of .dat files parsed by a task of the parallel scan
+CHUNK_SIZE = 100
+
+# number of x of the grid on which the thickness is computed
+THICKNESS_NB_X = 401
+
+# name and SQL type of the columns of the foils table
+columns = (("file_name", "TEXT PRIMARY KEY"),
+           ("mtime", "REAL"),
+           ("nb_points", "INTEGER"),
+           ("is_symmetrical", "INTEGER"),
+           ("thickness", "REAL"),
+           ("thickness_x", "REAL"),
+           ("le_radius", "REAL"),
+           ("has_closed_te", "INTEGER"))
+
+
+def list_dat_files(foil_dat_folder):
+    r"""Names of the .dat files of a folder, sorted"""
+    return sorted(f for f in os.listdir(foil_dat_folder)
+                  if re.match(r".*\.dat", f))
+
+
+def thickness(points):
+    r"""Maximum thickness of a foil and its chordwise position
+
+    The upper and lower surfaces are resampled on a common x grid (see
+    foilix.shape_matrix.resample), the thickness is the maximum of upper y
+    minus lower y, in chord units
+
+    Parameters
+    ----------
+    points : ndarray of shape (N, 2)
+
+    Returns
+    -------
+    tuple(float, float) : thickness and its x (from 0 to 1), (None, None) if
+                          the foil cannot be split in 2 surfaces
+
+    """
+    # shape_matrix imports this module
+    from foilix.shape_matrix import cosine_spacing, resample
+    x = cosine_spacing(THICKNESS_NB_X)
+    values = resample(points, x)
+    t = values[:, 0] - values[:, 1]
+    if np.all(np.isnan(t)):
+        return None, None
+    i = int(np.nanargmax(t))
+    return float(t[i]), float(x[i])
+
+
+def foil_features(dat_file_path):
+    r"""Catalog row of a .dat file
+
+    The geometric features of the files with less than 3 points are None
+
+    Parameters
+    ----------
+    dat_file_path : str
+
+    Returns
+    -------
+    tuple : values of the catalog columns
+
+    """
+    foil = Foil.from_dat_file(dat_file_path)
+    if len(foil.points) < 3:
+        features = (None, None, None, None)
+    else:
+        features = thickness(foil.points) + \
+            (foil.pseudo_leading_edge_radius, int(foil.has_closed_te))
+    return (os.path.basename(dat_file_path),
+            os.path.getmtime(dat_file_path),
+            len(foil.points),
+            int(foil.is_symmetrical())) + features
+
+
+def _chunk_features(dat_file_paths):
+    return [foil_features(path) for path in dat_file_paths]
+
+
+def scan(dat_file_paths, processes=None, chunk_size=CHUNK_SIZE):
+    r"""Catalog rows of .dat files, computed by chunks
+
+    Parameters
+    ----------
+    dat_file_paths : list[str]
+    processes : int, optional
+        Number of worker processes, default is the number of CPUs.
+        1, or a single chunk, is a sequential scan.
+    chunk_size : int, optional
+
+    Returns
+    -------
+    generator of list[tuple] : the catalog rows of a chunk, in the order
+                               the chunks are done
+
+    """
+    chunks = [dat_file_paths[i:i + chunk_size]
+              for i in range(0, len(dat_file_paths), chunk_size)]
+    if processes == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield _chunk_features(chunk)
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for rows in pool.imap_unordered(_chunk_features, chunks):
+            yield rows
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _log_progress(nb_done, nb_total):
+    logger.info("Indexed %i/%i files" % (nb_done, nb_total))
+
+
+class FoilCatalog(object):
+    r"""Index of the foils of a .dat folder
+
+    Parameters
+    ----------
+    foil_dat_folder : str
+    catalog_file_path : str, optional
+        Default is foil_catalog.sqlite in foil_dat_folder. If the file cannot
+        be created (e.g. read-only folder), the index is kept in memory.
+    update : bool, optional
+        Update the index when the catalog is opened
+    processes : int, optional
+        Number of processes of the update (see scan()), default is the number
+        of CPUs
+
+    """
+    def __init__(self,
+                 foil_dat_folder,
+                 catalog_file_path=None,
+                 update=True,
+                 processes=None):
+        self.foil_dat_folder = foil_dat_folder
+        if catalog_file_path is None:
+            catalog_file_path = os.path.join(foil_dat_folder, CATALOG_FILE)
+        try:
+            self._connection = sqlite3.connect(catalog_file_path)
+            self._create_table()
+        except sqlite3.OperationalError:
+            logger.warning("Cannot write %s, the catalog is kept in memory" %
+                           catalog_file_path)
+            self._connection = sqlite3.connect(":memory:")
+            self._create_table()
+        if update is True:
+            self.update(processes=processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def _create_table(self):
+        # a catalog written with other columns is indexed again
+        existing = [row[1] for row in
+                    self._connection.execute("PRAGMA table_info(foils)")]
+        if existing and existing != [name for name, _ in columns]:
+            logger.info("The catalog columns changed, indexing again")
+            self._connection.execute("DROP TABLE foils")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS foils (%s)" %
+            ", ".join("%s %s" % column for column in columns))
+        self._connection.commit()
+
+    def stale_files(self):
+        r"""Names of the .dat files that are new or changed since indexed,
+        and names of the indexed files that no longer exist
+
+        Returns
+        -------
+        tuple(list[str], list[str])
+
+        """
+        indexed = dict(self._connection.execute(
+            "SELECT file_name, mtime FROM foils"))
+        file_names = list_dat_files(self.foil_dat_folder)
+        changed = [f for f in file_names
+                   if indexed.get(f) != os.path.getmtime(
+                       os.path.join(self.foil_dat_folder, f))]
+        removed = sorted(set(indexed) - set(file_names))
+        return changed, removed
+
+    def store(self, rows):
+        r"""Insert or replace catalog rows (see foil_features())"""
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO foils VALUES (%s)" %
+            ", ".join("?" * len(columns)), rows)
+        self._connection.commit()
+
+    def update(self, processes=None, chunk_size=CHUNK_SIZE, progress=None):
+        r"""Index the new and changed files, forget the removed files
+
+        The rows of each chunk of files are stored as soon as it is done
+
+        Parameters
+        ----------
+        processes : int, optional
+            see scan()
+        chunk_size : int, optional
+        progress : callable, optional
+            Called with (number of indexed files, number of files to index)
+            after each chunk, default logs the progress of large updates
+
+        Returns
+        -------
+        tuple(int, int) : number of indexed files, number of removed files
+
+        """
+        changed, removed = self.stale_files()
+        self._connection.executemany("DELETE FROM foils WHERE file_name = ?",
+                                     [(f,) for f in removed])
+        self._connection.commit()
+        if progress is None:
+            progress = _log_progress if len(changed) > chunk_size \
+                else lambda nb_done, nb_total: None
+
+        nb_done = 0
+        for rows in scan([os.path.join(self.foil_dat_folder, f)
+                          for f in changed],
+                         processes=processes,
+                         chunk_size=chunk_size):
+            self.store(rows)
+            nb_done += len(rows)
+            progress(nb_done, len(changed))
+
+        if len(changed) > 0 or len(removed) > 0:
+            logger.info("Indexed %i files, removed %i files from the catalog "
+                        "of %s" % (len(changed),
+                                   len(removed),
+                                   self.foil_dat_folder))
+        return len(changed), len(removed)
+
+    def rows(self, where="1", parameters=()):
+        r"""Catalog rows, as dictionaries, sorted by file name
+
+        Parameters
+        ----------
+        where : str, optional
+            SQL condition on the columns, e.g. "thickness < ?"
+        parameters : tuple, optional
+            Values of the ? of the condition
+
+        Returns
+        -------
+        list[dict]
+
+        """
+        names = [name for name, _ in columns]
+        cursor = self._connection.execute(
+            "SELECT %s FROM foils WHERE %s ORDER BY file_name" %
+            (", ".join(names), where), parameters)
+        return [dict(zip(names, row)) for row in cursor]
+
+    def dat_files(self, symmetrical=None, max_thickness=None, min_points=None):
+        r"""Paths of the indexed .dat files that match the criteria
+
+        Parameters
+        ----------
+        symmetrical : bool, optional
+            Only the symmetrical (True) or unsymmetrical (False) foils
+        max_thickness : float, optional
+            Maximum thickness, in chord units
+        min_points : int, optional
+            Minimum number of points
+
+        Returns
+        -------
+        list[str]
+
+        """
+        conditions, parameters = ["1"], []
+        if symmetrical is not None:
+            conditions.append("is_symmetrical = ?")
+            parameters.append(int(symmetrical))
+        if max_thickness is not None:
+            conditions.append("thickness <= ?")
+            parameters.append(max_thickness)
+        if min_points is not None:
+            conditions.append("nb_points >= ?")
+            parameters.append(min_points)
+        return [os.path.join(self.foil_dat_folder, row["file_name"])
+                for row in self.rows(" AND ".join(conditions),
+                                     tuple(parameters))]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+
+    with FoilCatalog("../foil_dat") as catalog_:
+        logger.info("%i foils, %i symmetrical" %
+                    (len(catalog_.dat_files()),
+                     len(catalog_.dat_files(symmetrical=True))))
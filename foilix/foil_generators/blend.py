@@ -0,0 +1,137 @@
+# coding: utf-8
+
+r"""Foils defined as convex blends of catalog foils
+
+The basis foils are the rows of a ShapeMatrix (upper and lower surfaces
+on a common x grid). A blend is the weighted average of the basis
+surfaces, computed in one matrix product. The weights are the parameters
+of the foil: a low dimensional search space whose shapes stay close to
+proven sections.
+
+Examples
+--------
+>>> basis = ShapeMatrix.from_foils([...]).symmetrical()
+>>> foil = CatalogBlend(basis, [0.2, 0.5, 0.3])
+
+"""
+
+from __future__ import division
+
+import logging
+
+import numpy as np
+
+from foilix.foil_generators.parametric_foil import ParametricFoil
+
+logger = logging.getLogger(__name__)
+
+# maximum absolute camber of a symmetrical blend
+SYMMETRY_TOLERANCE = 1.2e-5
+
+
+class CatalogBlend(ParametricFoil):
+    r"""Convex blend of basis foils
+
+    Parameters
+    ----------
+    basis : foilix.shape_matrix.ShapeMatrix
+        The k basis foils (e.g. the best foils of the data digging step)
+    weights : array-like of shape (k,)
+        Positive or zero weights, normalized to a sum of 1
+
+    Raises
+    ------
+    ValueError if the number of weights is not the number of basis foils or
+    if a weight is negative
+
+    """
+    def __init__(self, basis, weights):
+        weights = np.asarray(weights, dtype=float)
+        if weights.shape != (len(basis.names),):
+            msg = "Expected %i weights, found %i" % (len(basis.names),
+                                                    weights.size)
+            raise ValueError(msg)
+        if np.any(weights < 0.):
+            msg = "The blend weights should be positive or zero"
+            raise ValueError(msg)
+        self.basis = basis
+        self.weights = weights
+
+        total = weights.sum()
+        nb_x = len(basis.x)
+        # (nb_x, 2) upper and lower y of the blend
+        self.values = (weights / total if total > 0. else weights).dot(
+            basis.values.reshape(len(weights), 2 * nb_x)).reshape(nb_x, 2)
+
+    def __str__(self):
+        r"""Gives some information on foil"""
+        return "Blend of catalog foils. Weights: %s" % ", ".join(
+            "%s %.3f" % (name, weight)
+            for name, weight in zip(self.basis.names, self.weights))
+
+    def _interpolate(self, values, xpts):
+        r"""Values on the basis x grid interpolated at xpts (linear in
+        sqrt(x), see foilix.shape_matrix.resample())"""
+        return np.interp(np.sqrt(np.asarray(xpts, dtype=float) / self.xte),
+                         np.sqrt(self.basis.x),
+                         values)
+
+    def _fn_upper_lower(self, xpts):
+        r"""This is the implementation of the abstract method of ParametricFoil
+
+        Parameters
+        ----------
+        xpts : ndarray
+            x coordinates, from 0 to xte
+
+        Returns
+        -------
+        tuple(ndarray, ndarray, ndarray, ndarray) : x_l, y_l, x_u, y_u
+
+        """
+        return (xpts,
+                self._interpolate(self.values[:, 1], xpts),
+                xpts,
+                self._interpolate(self.values[:, 0], xpts))
+
+    def _camberline(self, xpts):
+        return self._interpolate(self.values.mean(axis=1), xpts)
+
+    def _thickness(self, xpts):
+        return self._interpolate(self.values[:, 0] - self.values[:, 1], xpts)
+
+    def is_symmetrical(self):
+        r"""Check if the section is symmetrical.
+
+        This is the implementation of the abstract method of ParametricFoil
+
+        Returns
+        -------
+        boolean : True for a symmetrical section,
+                  False for an assymetrical section
+
+        """
+        return bool(np.all(np.abs(self.values.mean(axis=1)) <=
+                           SYMMETRY_TOLERANCE))
+
+    def is_valid(self):
+        r"""Check that the geometry is valid and corresponds to a 2D section
+        that can actually be built.
+
+        Returns
+        -------
+        boolean : True for a valid section, False for an invalid section
+
+        """
+        if self.weights.sum() <= 0.:
+            logger.debug("All blend weights are zero")
+            return False
+        if np.isnan(self.values).any():
+            logger.debug("A basis foil could not be resampled")
+            return False
+        thickness = self.values[:, 0] - self.values[:, 1]
+        # the surfaces must not cross between the leading and trailing edges
+        if np.any(thickness[1:-1] <= 0.):
+            logger.debug("The blend surfaces cross")
+            return False
+        return True
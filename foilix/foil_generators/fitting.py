@@ -0,0 +1,399 @@
+# coding: utf-8
+
+r"""Least squares fit of the PARSEC and NURBS parameters to existing foils
+
+The foils are resampled on the x grid of a ShapeMatrix and all the foils
+are fitted at once.
+
+- A PARSEC surface is a combination of x^(1/2), x^(3/2) ... x^(11/2): the
+  coefficients of all the foils are the solution of one linear least
+  squares problem (the upper and lower surfaces share the leading edge
+  radius and the trailing edge y). The PARSEC parameters (crest location
+  and curvature, trailing edge angle ...) are derived from the coefficients.
+- The x of a NURBS (cubic Hermite) surface only depends on the x component
+  of the trailing edge tangent. For a given x component, the y is linear in
+  the other parameters. The x component is searched on a grid, then by
+  golden section search, with a linear least squares fit at each step.
+
+The symmetrical fits return the particle positions of the symmetrical
+scorers (foilix.optimization.scoring.YachtAppendageParsecSectionScorer
+and YachtAppendageNurbsSectionScorer).
+
+Examples
+--------
+>>> k, rms = fit_foil(Foil.from_dat_file("../foil_dat/naca0010.dat"))
+>>> PARSEC(k)
+
+"""
+
+from __future__ import division
+
+import logging
+
+import numpy as np
+
+from foilix.foil import Foil
+from foilix.shape_matrix import ShapeMatrix, DEFAULT_NB_X
+
+logger = logging.getLogger(__name__)
+
+# powers of x of the PARSEC surface polynomials
+PARSEC_POWERS = np.arange(6) + 0.5
+
+# search interval of the x component of the NURBS trailing edge tangent
+# (x(u) increases on [0, 1] for 0 < p < 3)
+_NURBS_P_RANGE = (0.02, 2.9)
+_NURBS_GRID_SIZE = 30
+_GOLDEN_SECTION_ITERATIONS = 20
+_BISECTION_ITERATIONS = 10
+_NEWTON_ITERATIONS = 3
+
+
+def _constrained_lstsq(design, constraint, values):
+    r"""Least squares solutions of design . z = values (one column of
+    values per foil) with constraint . z = 0"""
+    # orthonormal basis of the vectors that satisfy the constraint
+    basis = np.linalg.svd(np.atleast_2d(constraint))[2][1:].T
+    return basis.dot(np.linalg.lstsq(design.dot(basis), values,
+                                     rcond=None)[0])
+
+
+def _parsec(coefficients, x, derivative=0):
+    r"""PARSEC surface values (or derivatives)
+
+    Parameters
+    ----------
+    coefficients : ndarray of shape (..., 6)
+    x : ndarray, broadcastable with coefficients.shape[:-1]
+    derivative : int, optional
+        0, 1 or 2
+
+    """
+    factors = np.ones(len(PARSEC_POWERS))
+    for i in range(derivative):
+        factors *= PARSEC_POWERS - i
+    return np.sum(coefficients * factors *
+                  np.asarray(x, dtype=float)[..., np.newaxis] **
+                  (PARSEC_POWERS - derivative), axis=-1)
+
+
+def _crest(coefficients, sign=1.):
+    r"""x of the maximum (sign 1.) or minimum (sign -1.) of PARSEC surfaces,
+    shape (F,)"""
+    x = np.linspace(0., 1., 401)[1:] ** 2
+    values = coefficients.dot((x[:, np.newaxis] ** PARSEC_POWERS).T)
+    crest = x[np.argmax(sign * values, axis=1)]
+    for _ in range(4):
+        crest = np.clip(crest - _parsec(coefficients, crest, 1) /
+                        _parsec(coefficients, crest, 2), x[0], 1.)
+    return crest
+
+
+def _valid_columns(shape_matrix, *arrays):
+    valid = shape_matrix.is_valid
+    if not np.all(valid):
+        logger.warning("%i foils cannot be fitted" % np.sum(~valid))
+    return valid, [a[valid].T for a in arrays]
+
+
+def _scatter(valid, values):
+    r"""Values of the valid foils into an array with NaN for the others"""
+    result = np.full((len(valid),) + values.shape[1:], np.nan)
+    result[valid] = values
+    return result
+
+
+def fit_parsec(shape_matrix):
+    r"""PARSEC parameters of the foils of a ShapeMatrix
+
+    Parameters
+    ----------
+    shape_matrix : foilix.shape_matrix.ShapeMatrix
+
+    Returns
+    -------
+    tuple(dict[str, ndarray], ndarray)
+        The PARSEC(k) dictionary with arrays of shape (n_foils,) as values,
+        the RMS y distances between the fitted and the resampled surfaces.
+        NaN for the foils that could not be resampled.
+
+    """
+    x = shape_matrix.x
+    valid, (upper, lower) = _valid_columns(shape_matrix,
+                                           shape_matrix.upper,
+                                           shape_matrix.lower)
+    basis = x[:, np.newaxis] ** PARSEC_POWERS
+    zeros = np.zeros((len(x), 5))
+    # z is (sqrt(2 rle), 5 upper coefficients, 5 lower coefficients)
+    design = np.vstack((np.hstack((basis, zeros)),
+                        np.hstack((-basis[:, :1], zeros, basis[:, 1:]))))
+    # same trailing edge y on both surfaces
+    constraint = np.concatenate(([2.], np.ones(5), -np.ones(5)))
+    values = np.vstack((upper, lower))
+    z = _constrained_lstsq(design, constraint, values)
+    rms = np.sqrt(np.mean((design.dot(z) - values) ** 2, axis=0))
+
+    z = z.T
+    coefficients_upper = z[:, :6]
+    coefficients_lower = np.hstack((-z[:, :1], z[:, 6:]))
+    x_suc = _crest(coefficients_upper, 1.)
+    x_pre = _crest(coefficients_lower, -1.)
+    k = {'rle': 0.5 * z[:, 0] ** 2,
+         'xte': np.ones(len(z)),
+         'yte': _parsec(coefficients_upper, 1.),
+         'x_suc': x_suc,
+         'y_suc': _parsec(coefficients_upper, x_suc),
+         'd2ydx2_suc': _parsec(coefficients_upper, x_suc, 2),
+         'th_suc': np.degrees(np.arctan(_parsec(coefficients_upper, 1., 1))),
+         'x_pre': x_pre,
+         'y_pre': _parsec(coefficients_lower, x_pre),
+         'd2ydx2_pre': _parsec(coefficients_lower, x_pre, 2),
+         'th_pre': np.degrees(np.arctan(_parsec(coefficients_lower, 1., 1)))}
+    return {key: _scatter(valid, value) for key, value in k.items()}, \
+        _scatter(valid, rms)
+
+
+def fit_symmetrical_parsec(shape_matrix):
+    r"""Symmetrical PARSEC parameters fitted on the thickness distributions
+    (the camber is ignored)
+
+    Parameters
+    ----------
+    shape_matrix : foilix.shape_matrix.ShapeMatrix
+
+    Returns
+    -------
+    tuple(ndarray, ndarray)
+        The (n_foils, 5) positions of YachtAppendageParsecSectionScorer
+        (thickness, le radius, x of max thickness, curvature, te angle),
+        the RMS distances between the fitted and the resampled half
+        thicknesses. NaN for the foils that could not be resampled.
+
+    """
+    valid, (half_thickness,) = _valid_columns(shape_matrix,
+                                              0.5 * shape_matrix.thickness)
+    design = shape_matrix.x[:, np.newaxis] ** PARSEC_POWERS
+    # closed trailing edge
+    coefficients = _constrained_lstsq(design, np.ones(6), half_thickness)
+    rms = np.sqrt(np.mean((design.dot(coefficients) - half_thickness) ** 2,
+                          axis=0))
+
+    coefficients = coefficients.T
+    x_max = _crest(coefficients, 1.)
+    positions = np.column_stack((
+        2. * _parsec(coefficients, x_max),
+        0.5 * coefficients[:, 0] ** 2,
+        x_max,
+        _parsec(coefficients, x_max, 2),
+        np.degrees(np.arctan(-_parsec(coefficients, 1., 1)))))
+    return _scatter(valid, positions), _scatter(valid, rms)
+
+
+def _hermite(u):
+    r"""Cubic Hermite basis functions h01, h10 and h11"""
+    u2 = u * u
+    u3 = u2 * u
+    return 3. * u2 - 2. * u3, u3 - 2. * u2 + u, u3 - u2
+
+
+def _nurbs_u(x, p):
+    r"""Curve parameters u of the x grid for the trailing edge tangent
+    x components p, shape (len(p), len(x))
+
+    A few bisection steps, then Newton steps on x(u) = h01(u) + p h11(u)
+
+    """
+    p = p[:, np.newaxis]
+    low = np.zeros((len(p), len(x)))
+    high = np.ones((len(p), len(x)))
+    for _ in range(_BISECTION_ITERATIONS):
+        middle = 0.5 * (low + high)
+        h01, _, h11 = _hermite(middle)
+        below = h01 + p * h11 < x
+        low = np.where(below, middle, low)
+        high = np.where(below, high, middle)
+    u = 0.5 * (low + high)
+    for _ in range(_NEWTON_ITERATIONS):
+        h01, _, h11 = _hermite(u)
+        slope = 6. * u * (1. - u) + p * u * (3. * u - 2.)
+        u = np.clip(u - (h01 + p * h11 - x) / np.maximum(slope, 1e-12),
+                    low, high)
+    return u
+
+
+def _nurbs_surface_fit(x, y, p):
+    r"""Least squares fit of y = a h10(u) + b h11(u) for the trailing edge
+    tangent x components p
+
+    Parameters
+    ----------
+    x : ndarray of shape (n,)
+    y : ndarray of shape (F, n)
+    p : ndarray of shape (F,) or (1,)
+
+    Returns
+    -------
+    tuple(ndarray, ndarray, ndarray) : a, b and the RMS y distances
+
+    """
+    _, h10, h11 = _hermite(_nurbs_u(x, p))
+    aa, ab, bb = (np.sum(h10 * h10, axis=1), np.sum(h10 * h11, axis=1),
+                  np.sum(h11 * h11, axis=1))
+    ay, by = np.sum(h10 * y, axis=1), np.sum(h11 * y, axis=1)
+    determinant = aa * bb - ab ** 2
+    a = (bb * ay - ab * by) / determinant
+    b = (aa * by - ab * ay) / determinant
+    rms = np.sqrt(np.mean((a[:, np.newaxis] * h10 + b[:, np.newaxis] * h11 -
+                           y) ** 2, axis=1))
+    return a, b, rms
+
+
+def _nurbs_fit(x, y):
+    r"""Trailing edge tangent x component p, a, b and RMS distance of
+    NURBS surfaces (see _nurbs_surface_fit()), shapes (F,)"""
+    grid = np.linspace(_NURBS_P_RANGE[0], _NURBS_P_RANGE[1], _NURBS_GRID_SIZE)
+    residuals = np.array([_nurbs_surface_fit(x, y, np.array([p]))[2]
+                          for p in grid])
+    best = np.argmin(residuals, axis=0)
+    low = grid[np.maximum(best - 1, 0)]
+    high = grid[np.minimum(best + 1, len(grid) - 1)]
+
+    ratio = 0.5 * (np.sqrt(5.) - 1.)
+    p1, p2 = high - ratio * (high - low), low + ratio * (high - low)
+    r1 = _nurbs_surface_fit(x, y, p1)[2]
+    r2 = _nurbs_surface_fit(x, y, p2)[2]
+    for _ in range(_GOLDEN_SECTION_ITERATIONS):
+        left = r1 < r2
+        high = np.where(left, p2, high)
+        low = np.where(left, low, p1)
+        p1, p2 = high - ratio * (high - low), low + ratio * (high - low)
+        r1 = _nurbs_surface_fit(x, y, p1)[2]
+        r2 = _nurbs_surface_fit(x, y, p2)[2]
+    p = 0.5 * (low + high)
+    return (p,) + _nurbs_surface_fit(x, y, p)
+
+
+def fit_nurbs(shape_matrix):
+    r"""NURBS parameters of the foils of a ShapeMatrix
+
+    Parameters
+    ----------
+    shape_matrix : foilix.shape_matrix.ShapeMatrix
+
+    Returns
+    -------
+    tuple(dict[str, ndarray], ndarray)
+        The NURBS(k) dictionary with arrays of shape (n_foils,) as values,
+        the RMS y distances between the fitted and the resampled surfaces.
+        NaN for the foils that could not be resampled.
+
+    """
+    x = shape_matrix.x
+    valid, (upper, lower) = _valid_columns(shape_matrix,
+                                           shape_matrix.upper,
+                                           shape_matrix.lower)
+    p_u, ta_u, q_u, rms_u = _nurbs_fit(x, upper.T)
+    p_l, ta_l, q_l, rms_l = _nurbs_fit(x, lower.T)
+    # angles of the trailing edge tangents (see NURBS._spline())
+    angle_u = np.degrees(np.arctan2(-q_u, p_u))
+    angle_l = np.degrees(np.arctan2(-q_l, p_l))
+    k = {'ta_u': ta_u,
+         'ta_l': -ta_l,
+         'tb_u': np.hypot(p_u, q_u),
+         'tb_l': np.hypot(p_l, q_l),
+         'alpha_b': angle_u - angle_l,
+         'alpha_c': angle_l}
+    return {key: _scatter(valid, value) for key, value in k.items()}, \
+        _scatter(valid, np.sqrt(0.5 * (rms_u ** 2 + rms_l ** 2)))
+
+
+def fit_symmetrical_nurbs(shape_matrix):
+    r"""Symmetrical NURBS parameters fitted on the thickness distributions
+    (the camber is ignored)
+
+    Parameters
+    ----------
+    shape_matrix : foilix.shape_matrix.ShapeMatrix
+
+    Returns
+    -------
+    tuple(ndarray, ndarray)
+        The (n_foils, 3) positions of YachtAppendageNurbsSectionScorer
+        (ta, tb, alpha), the RMS distances between the fitted and the
+        resampled half thicknesses. NaN for the foils that could not be
+        resampled.
+
+    """
+    valid, (half_thickness,) = _valid_columns(shape_matrix,
+                                              0.5 * shape_matrix.thickness)
+    p, ta, q, rms = _nurbs_fit(shape_matrix.x, half_thickness.T)
+    positions = np.column_stack((ta,
+                                 np.hypot(p, q),
+                                 np.degrees(np.arctan2(-q, p))))
+    return _scatter(valid, positions), _scatter(valid, rms)
+
+
+# parameterization name -> batch fit function
+fitters = {"PARSEC": fit_parsec,
+           "NURBS": fit_nurbs,
+           "SYM_PARSEC": fit_symmetrical_parsec,
+           "SYM_NURBS": fit_symmetrical_nurbs}
+
+
+def fit_foil(foil, parameterization="PARSEC", nb_x=DEFAULT_NB_X):
+    r"""Parameters of a foil
+
+    Parameters
+    ----------
+    foil : foilix.foil.Foil
+    parameterization : str, optional
+        "PARSEC", "NURBS", "SYM_PARSEC" or "SYM_NURBS"
+    nb_x : int, optional
+        Size of the x grid of the fit
+
+    Returns
+    -------
+    tuple(dict or ndarray, float)
+        The PARSEC(k) or NURBS(k) dictionary (the particle position for
+        the symmetrical parameterizations) and the RMS distance
+
+    """
+    if parameterization not in fitters:
+        msg = "Unknown parameterization %s" % parameterization
+        raise ValueError(msg)
+    parameters, rms = fitters[parameterization](
+        ShapeMatrix.from_foils([foil], nb_x))
+    if isinstance(parameters, dict):
+        return {key: float(value[0]) for key, value in parameters.items()}, \
+            float(rms[0])
+    return parameters[0], float(rms[0])
+
+
+def seed_positions(dat_files, parameterization, nb_x=DEFAULT_NB_X):
+    r"""PSO particle positions of the symmetrical fits of .dat files
+
+    Parameters
+    ----------
+    dat_files : list[str]
+        e.g. the best foils of the data digging step
+        (foilix.foils_eval.best_foils())
+    parameterization : str
+        "SYM_PARSEC" or "SYM_NURBS"
+    nb_x : int, optional
+
+    Returns
+    -------
+    ndarray of shape (n_valid_foils, n_parameters), in the order of dat_files
+
+    """
+    if parameterization not in ("SYM_PARSEC", "SYM_NURBS"):
+        msg = "Seeds are fitted for SYM_PARSEC or SYM_NURBS, not %s" % \
+              parameterization
+        raise ValueError(msg)
+    shape_matrix = ShapeMatrix.from_foils([Foil.from_dat_file(f)
+                                           for f in dat_files], nb_x)
+    positions, rms = fitters[parameterization](shape_matrix)
+    for name, distance in zip(shape_matrix.names, rms):
+        logger.info("%s fitted by %s, RMS distance %.1e" %
+                    (name, parameterization, distance))
+    return positions[shape_matrix.is_valid]
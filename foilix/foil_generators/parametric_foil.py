@@ -8,11 +8,25 @@ from abc import ABCMeta, abstractmethod
 import logging
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 logger = logging.getLogger(__name__)
 
 
+def cosine_xpts(npts=161, xte=1.):
+    r"""x coordinates of get_coords(), cosine-spaced from 0 to xte
+
+    Parameters
+    ----------
+    npts : positive integer, optional
+        The number of coord points of the foil (the number of x
+        coordinates is half of it)
+    xte : float, optional
+
+    """
+    xpts = (1 - np.cos(np.linspace(0, 1, int(np.ceil(npts / 2))) * np.pi)) / 2
+    return xpts * xte
+
+
 class ParametricFoil(object):
     r"""Base class for foil generators.
 
@@ -131,9 +145,8 @@ class ParametricFoil(object):
         ([x_lower],[y_lower],[x_upper],[y_upper])
 
         """
-        xpts = (1 - np.cos(np.linspace(0, 1, np.ceil(npts / 2)) * np.pi)) / 2
-        xpts *= self.xte  # Take TE position into account
-        return self._fn_upper_lower(xpts)
+        # Take TE position into account
+        return self._fn_upper_lower(cosine_xpts(npts, self.xte))
 
     def plot(self, ax, score=None, title=None, style='r-'):
         r"""Plots foil outline given matplotlib.pyplot.Axes object
@@ -178,6 +191,9 @@ class ParametricFoil(object):
             Plot title
 
         """
+        # imported here: headless workers never plot
+        import matplotlib.pyplot as plt
+
         fig = plt.figure()
         ax = fig.add_subplot(111)
         self.plot(ax, title=title)
@@ -10,6 +10,102 @@ import numpy as np
 
 import foilix.foil_generators.parametric_foil
 
+# order of the parameters in the rows of the PARSEC.batch() arrays
+PARAMETERS = ('rle', 'xte', 'yte',
+              'x_suc', 'y_suc', 'd2ydx2_suc', 'th_suc',
+              'x_pre', 'y_pre', 'd2ydx2_pre', 'th_pre')
+
+# powers of x of the surface polynomials
+_POWERS = np.arange(6) + 0.5
+
+# y of the surfaces at the leading and trailing edges is zero up to rounding,
+# smaller values are not sign changes
+SIGN_TOLERANCE = 1e-9
+
+
+def _solve_coefficients(xte, yte, rle, x_cre, y_cre, d2ydx2_cre, th_cre,
+                        sign):
+    r"""PARSEC coefficients of surfaces, all the 5x5 systems are solved by a
+    single (stacked) np.linalg.solve
+
+    Parameters
+    ----------
+    xte, yte, rle, x_cre, y_cre, d2ydx2_cre, th_cre : ndarray of shape (S,)
+    sign : float
+        1. for the suction surfaces, -1. for the pressure surfaces
+
+    Returns
+    -------
+    ndarray of shape (S, 6)
+
+    """
+    first = sign * np.sqrt(2 * rle)
+    p = _POWERS[1:]
+    xte, x_cre = xte[:, np.newaxis], x_cre[:, np.newaxis]
+    a = np.stack((xte ** p,
+                  x_cre ** p,
+                  p * xte ** (p - 1),
+                  p * x_cre ** (p - 1),
+                  p * (p - 1) * x_cre ** (p - 2)), axis=1)
+    b = np.column_stack((yte - first * np.sqrt(xte[:, 0]),
+                         y_cre - first * np.sqrt(x_cre[:, 0]),
+                         np.tan(th_cre * np.pi / 180) -
+                         0.5 * first / np.sqrt(xte[:, 0]),
+                         -0.5 * first / np.sqrt(x_cre[:, 0]),
+                         d2ydx2_cre + 0.25 * first * x_cre[:, 0] ** (-1.5)))
+    return np.column_stack((first,
+                            np.linalg.solve(a, b[:, :, np.newaxis])[:, :, 0]))
+
+
+def in_ranges(k):
+    r"""Do the parameters pass the PARSEC constructor checks?
+
+    Parameters
+    ----------
+    k : dict
+        PARSEC coefficients, floats or arrays of shape (S,)
+
+    Returns
+    -------
+    bool or ndarray of shape (S,)
+
+    """
+    return (k['rle'] > 0.) & (k['rle'] < 1.) & (k['xte'] == 1.) & \
+        (k['yte'] >= -0.1) & (k['yte'] <= 0.1) & \
+        (k['x_suc'] >= 0.) & (k['x_suc'] <= 1.) & \
+        (k['y_suc'] >= 0.) & (k['y_suc'] <= 0.5) & \
+        (k['d2ydx2_suc'] >= -2.) & (k['d2ydx2_suc'] <= 2.) & \
+        (k['th_suc'] >= -40.) & (k['th_suc'] <= 0.) & \
+        (k['x_pre'] >= 0.) & (k['x_pre'] <= 1.) & \
+        (k['y_pre'] >= -0.5) & (k['y_pre'] <= 0.) & \
+        (k['d2ydx2_pre'] >= -2.) & (k['d2ydx2_pre'] <= 2.) & \
+        (k['th_pre'] >= 0.) & (k['th_pre'] <= 40.)
+
+
+def symmetrical_parameters(positions):
+    r"""PARSEC.batch() parameters of symmetrical foils
+
+    Parameters
+    ----------
+    positions : array-like of shape (S, 5)
+        thickness, le radius, x of max thickness, curvature, te angle
+        (the particle positions of
+        foilix.optimization.scoring.YachtAppendageParsecSectionScorer)
+
+    Returns
+    -------
+    ndarray of shape (S, 11), columns in the PARAMETERS order
+
+    """
+    thickness, rle, x_max, curvature, te_angle = \
+        np.asarray(positions, dtype=float).reshape(-1, 5).T
+    k = {'rle': rle, 'xte': np.ones(len(rle)), 'yte': np.zeros(len(rle)),
+         'x_suc': x_max, 'y_suc': thickness / 2., 'd2ydx2_suc': curvature,
+         'th_suc': -te_angle,
+         'x_pre': x_max, 'y_pre': -thickness / 2., 'd2ydx2_pre': -curvature,
+         'th_pre': te_angle}
+    return np.column_stack([k[name] for name in PARAMETERS])
+
 
 class PARSEC(foilix.foil_generators.parametric_foil.ParametricFoil):
     r"""PARSEC parametric foil generator.
@@ -137,6 +233,28 @@ class PARSEC(foilix.foil_generators.parametric_foil.ParametricFoil):
     def _thickness(self, xpts):
         raise NotImplementedError
 
+    @classmethod
+    def batch(cls, parameters):
+        r"""Many PARSEC foils at once
+
+        Parameters
+        ----------
+        parameters : array-like of shape (S, 11) or dict
+            One foil per row, columns in the PARAMETERS order
+            (see also symmetrical_parameters()), or a dict of arrays of
+            shape (S,) with the keys of the PARSEC constructor
+            (e.g. the output of foilix.foil_generators.fitting.fit_parsec())
+
+        Returns
+        -------
+        ParsecBatch
+
+        """
+        if isinstance(parameters, dict):
+            parameters = np.column_stack([parameters[name]
+                                          for name in PARAMETERS])
+        return ParsecBatch(parameters)
+
     @staticmethod
     def _calc_coords(xpts, coeffs):
         # Powers to raise coefficients to. from __future___ import division!
@@ -257,8 +375,10 @@ class PARSEC(foilix.foil_generators.parametric_foil.ParametricFoil):
             # Check that the pressure side or the suction side
             # do not cross the y=0 axis
             # the sign of the y coordinates does not change
-            sign_changes_suc = len(list(groupby(y_u, lambda ys: ys >= 0))) - 1
-            sign_changes_pre = len(list(groupby(y_l, lambda ys: ys <= 0))) - 1
+            sign_changes_suc = len(list(groupby(
+                y_u, lambda ys: ys >= -SIGN_TOLERANCE))) - 1
+            sign_changes_pre = len(list(groupby(
+                y_l, lambda ys: ys <= SIGN_TOLERANCE))) - 1
 
             max_y_coord = max(y_u)
             min_y_coord = min(y_l)
@@ -289,3 +409,127 @@ class PARSEC(foilix.foil_generators.parametric_foil.ParametricFoil):
 
         else:  # section is not symmetrical
             raise NotImplementedError
+
+
+class ParsecBatch(object):
+    r"""S PARSEC foils evaluated together (see PARSEC.batch())
+
+    The 2 * S linear systems of the coefficients are solved by stacked
+    np.linalg.solve calls and the surfaces of all the foils are computed by
+    matrix products.
+    Unlike the PARSEC constructor, parameters out of the PARSEC ranges do not
+    raise: their rows have NaN coefficients and are invalid.
+
+    Parameters
+    ----------
+    parameters : array-like of shape (S, 11)
+        One foil per row, columns in the PARAMETERS order
+
+    """
+    def __init__(self, parameters):
+        parameters = np.asarray(parameters, dtype=float)
+        if parameters.ndim != 2 or parameters.shape[1] != len(PARAMETERS):
+            msg = "Expected an array of shape (S, %i), found %s" % \
+                  (len(PARAMETERS), str(parameters.shape))
+            raise ValueError(msg)
+        self.parameters = parameters
+        self.k = dict(zip(PARAMETERS, parameters.T))
+
+        # the systems are singular if a crest is at the leading or at the
+        # trailing edge
+        self.solvable = in_ranges(self.k) & \
+            (self.k['x_suc'] > 0.) & (self.k['x_suc'] < self.k['xte']) & \
+            (self.k['x_pre'] > 0.) & (self.k['x_pre'] < self.k['xte'])
+
+        self.coeffs_upper = np.full((len(parameters), 6), np.nan)
+        self.coeffs_lower = np.full((len(parameters), 6), np.nan)
+        k = dict((name, values[self.solvable])
+                 for name, values in self.k.items())
+        if self.solvable.any():
+            self.coeffs_upper[self.solvable] = _solve_coefficients(
+                k['xte'], k['yte'], k['rle'], k['x_suc'], k['y_suc'],
+                k['d2ydx2_suc'], k['th_suc'], 1.)
+            self.coeffs_lower[self.solvable] = _solve_coefficients(
+                k['xte'], k['yte'], k['rle'], k['x_pre'], k['y_pre'],
+                k['d2ydx2_pre'], k['th_pre'], -1.)
+
+    def __len__(self):
+        return len(self.parameters)
+
+    def foil(self, i):
+        r"""The i-th foil of the batch as a PARSEC instance"""
+        return PARSEC(dict((name, float(values[i]))
+                           for name, values in self.k.items()))
+
+    def get_coords(self, npts=161):
+        r"""Coordinates of all the foils
+
+        All the foils of a batch have the same trailing edge x (xte == 1 for
+        the valid ones)
+
+        Parameters
+        ----------
+        npts : positive integer, optional
+
+        Returns
+        -------
+        tuple(ndarray, ndarray, ndarray, ndarray) : x_l, y_l, x_u, y_u
+            x of shape (n,), y of shape (S, n)
+
+        """
+        xpts = foilix.foil_generators.parametric_foil.cosine_xpts(npts)
+        powers = xpts[:, np.newaxis] ** _POWERS
+        return (xpts,
+                self.coeffs_lower.dot(powers.T),
+                xpts,
+                self.coeffs_upper.dot(powers.T))
+
+    def max_thickness(self, npts=161):
+        r"""Maximum thicknesses of the foils, ndarray of shape (S,)"""
+        _, y_l, _, y_u = self.get_coords(npts)
+        return y_u.max(axis=1) - y_l.min(axis=1)
+
+    def is_symmetrical(self):
+        r"""Symmetry of the sections, boolean ndarray of shape (S,)"""
+        k = self.k
+        return (k['x_pre'] == k['x_suc']) & (k['y_pre'] == -k['y_suc']) & \
+            (k['th_suc'] == -k['th_pre']) & \
+            (k['d2ydx2_pre'] == -k['d2ydx2_suc']) & (k['yte'] == 0)
+
+    def is_valid(self, npts=161):
+        r"""Vectorized validity checks
+
+        The symmetrical sections get the checks of PARSEC.is_valid(). The
+        cambered sections (e.g. fitted foils) get general checks: the
+        surfaces must not cross inside the chord and the real thickness must
+        be positive and not greater than 1.1 * (y_suc - y_pre).
+        Out of range and singular rows are invalid.
+
+        Returns
+        -------
+        boolean ndarray of shape (S,)
+
+        """
+        k = self.k
+        symmetrical = self.is_symmetrical()
+        _, y_l, _, y_u = self.get_coords(npts)
+        real_thickness = y_u.max(axis=1) - y_l.min(axis=1)
+
+        # the sign of the y coordinates does not change
+        symmetrical_valid = (k['rle'] >= 0) & \
+            (k['x_pre'] >= 0) & (k['x_suc'] >= 0) & \
+            (k['y_pre'] < 0) & (k['y_suc'] > 0) & \
+            (k['d2ydx2_pre'] >= 0) & (k['d2ydx2_suc'] <= 0) & \
+            (k['th_pre'] >= 0) & (k['th_suc'] <= 0) & \
+            ~np.any(np.diff(y_u >= -SIGN_TOLERANCE, axis=1), axis=1) & \
+            ~np.any(np.diff(y_l <= SIGN_TOLERANCE, axis=1), axis=1)
+
+        # the surfaces do not cross between the leading and trailing edges
+        cambered_valid = (k['y_suc'] > k['y_pre']) & \
+            np.all(y_u[:, 1:-1] - y_l[:, 1:-1] > 0., axis=1)
+
+        # dismiss the foils thicker than specified (and the flat ones)
+        return self.solvable & \
+            np.where(symmetrical, symmetrical_valid, cambered_valid) & \
+            (real_thickness > 0.) & \
+            (real_thickness <= 1.1 * (k['y_suc'] - k['y_pre']))
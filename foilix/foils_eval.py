@@ -183,3 +183,34 @@ def eval_foils(foil_data_folder,
     logger.info("Took : %s s" % str(total_time))
     logger.info("%s s by foil on average" % str(total_time / len(file_list)))
     logger.info("There were %i errors" % nb_errors)
+
+    from foilix.data_api import cache_stats
+    logger.info("Model cache : %(hits)i hits, %(misses)i misses, "
+                "%(evictions)i evictions, %(invalidations)i invalidations, "
+                "%(models)i models (%(nbytes)i bytes)" % cache_stats())
+
+
+def best_foils(logfile_name, nb_foils):
+    r"""Best foils of an eval_foils() results file
+
+    Parameters
+    ----------
+    logfile_name : str
+        The results file written by eval_foils()
+    nb_foils : int
+
+    Returns
+    -------
+    list[str] : the .dat file names of the nb_foils best evaluated foils,
+                best first
+
+    """
+    with open(logfile_name) as f:
+        rows = [line.rstrip("\n").split(",") for line in f]
+    # the results follow the header line (see eval_foils()), 11 is the
+    # global score and 12 the status
+    header = [row[0] for row in rows].index("dat file")
+    ok_rows = [row for row in rows[header + 1:]
+               if len(row) > 12 and row[12] == "ok"]
+    ok_rows.sort(key=lambda row: -float(row[11]))
+    return [row[0] for row in ok_rows[:nb_foils]]
@@ -0,0 +1,395 @@
+# coding: utf-8
+
+r"""Multilinear interpolation of pre-computed data on a regular grid
+
+data_create writes the .ndf files on a regular mach x ncrit x reynolds x aoa
+grid. The only irregularity is the absence of the rows where XFOIL did not
+converge (holes in the grid).
+
+GridDataModel exposes the same interface as the libra partial data models
+(input_continuous_ranges and interpolate()), so that data_api can use
+either of them.
+
+"""
+
+from __future__ import division
+
+import itertools
+import logging
+
+import numpy as np
+
+from foilix.hole_filling import fill_holes, DEFAULT_MAX_GAP
+
+logger = logging.getLogger(__name__)
+
+# libra ndf column type flags
+_INPUT_FLAG = "0"
+_OUTPUT_FLAG = "2"
+
+# maximum fraction of grid nodes without data of a regular grid. The shipped
+# grids have up to about 50% of holes (no XFOIL convergence at low reynolds),
+# the product grid of scattered data has almost only holes
+MAX_HOLE_RATIO = 0.75
+
+
+class GridDataModel(object):
+    r"""Multilinear interpolation on a tensor grid with holes
+
+    A query point whose interpolation stencil contains a hole (a grid node
+    without data) cannot be interpolated on the grid. It is interpolated by
+    the fallback model if there is one, otherwise its value is NaN.
+
+    Parameters
+    ----------
+    input_names : list[str]
+    axes : list[ndarray]
+        Sorted unique values of each input, in the order of input_names
+    output_names : list[str]
+    values : ndarray
+        Shape is tuple(len(a) for a in axes) + (len(output_names),),
+        NaN where there is a hole in the grid
+    fallback : callable or None
+        Function without parameter that returns the model used to
+        interpolate the query points that touch a hole. It is called at each
+        query that touches a hole and is not kept by the grid model, so it
+        should return a cached model (e.g.
+        foilix.data_api.create_rbf_interpolation_model)
+
+    """
+    def __init__(self, input_names, axes, output_names, values, fallback=None):
+        self.input_names = list(input_names)
+        self.axes = [np.asarray(a, dtype=float) for a in axes]
+        self.output_names = list(output_names)
+        self.values = values
+        self.fallback = fallback
+        # grid nodes whose values were filled by with_filled_holes()
+        self.filled_mask = np.zeros(np.shape(values)[:-1], dtype=bool)
+
+    @classmethod
+    def from_ndf_file(cls, ndf_file_path):
+        r"""Build the model from a .ndf file
+
+        Parameters
+        ----------
+        ndf_file_path : str
+
+        Raises
+        ------
+        ValueError if the rows of the file do not lie on a tensor grid
+
+        """
+        with open(ndf_file_path) as f:
+            flags = f.readline().split()
+            names = f.readline().split()
+        data = np.loadtxt(ndf_file_path, skiprows=2, ndmin=2)
+
+        input_columns = [i for i, flag in enumerate(flags)
+                         if flag == _INPUT_FLAG]
+        output_columns = [i for i, flag in enumerate(flags)
+                          if flag == _OUTPUT_FLAG]
+        return cls.from_rows(input_names=[names[i] for i in input_columns],
+                             inputs=data[:, input_columns],
+                             output_names=[names[i] for i in output_columns],
+                             outputs=data[:, output_columns])
+
+    @classmethod
+    def from_rows(cls, input_names, inputs, output_names, outputs,
+                  max_hole_ratio=MAX_HOLE_RATIO):
+        r"""Build the model from rows of data
+
+        Parameters
+        ----------
+        input_names : list[str]
+        inputs : ndarray of shape (n_rows, n_inputs)
+        output_names : list[str]
+        outputs : ndarray of shape (n_rows, n_outputs)
+        max_hole_ratio : float, optional
+            Maximum fraction of the grid nodes without a row
+
+        Raises
+        ------
+        ValueError if the same grid node is defined more than once or if the
+        rows do not tile the grid of the input values (scattered data)
+
+        """
+        axes, indices = list(), list()
+        for i in range(inputs.shape[1]):
+            axis, index = np.unique(inputs[:, i], return_inverse=True)
+            axes.append(axis)
+            indices.append(index.ravel())
+
+        shape = tuple(len(a) for a in axes)
+        flat_indices = np.ravel_multi_index(indices, shape)
+        if len(np.unique(flat_indices)) != len(flat_indices):
+            msg = "The data is not on a regular grid " \
+                  "(some grid nodes are defined more than once)"
+            raise ValueError(msg)
+        hole_ratio = 1. - len(flat_indices) / np.prod(shape, dtype=float)
+        if hole_ratio > max_hole_ratio:
+            msg = "The data is not on a regular grid " \
+                  "(%.1f%% of the grid nodes have no data)" % (100 * hole_ratio)
+            raise ValueError(msg)
+
+        values = np.full((int(np.prod(shape)), outputs.shape[1]), np.nan)
+        values[flat_indices] = outputs
+        return cls(input_names,
+                   axes,
+                   output_names,
+                   values.reshape(shape + (outputs.shape[1],)))
+
+    def save(self, values_path, axes_path):
+        r"""Save the model to a .npy file (values) and a .npz file
+        (input and output names, axes)
+
+        The fallback model is not saved
+
+        """
+        np.save(values_path, self.values)
+        axes = {"axis_%i" % i: axis for i, axis in enumerate(self.axes)}
+        np.savez(axes_path,
+                 input_names=np.array(self.input_names),
+                 output_names=np.array(self.output_names),
+                 **axes)
+
+    @classmethod
+    def load(cls, values_path, axes_path, mmap_mode='r'):
+        r"""Load a model saved by save()
+
+        Parameters
+        ----------
+        values_path : str
+        axes_path : str
+        mmap_mode : str or None, optional
+            The values are memory-mapped (read-only) by default: processes
+            loading the same file share the same physical memory
+
+        """
+        with np.load(axes_path) as f:
+            input_names = [str(name) for name in f["input_names"]]
+            output_names = [str(name) for name in f["output_names"]]
+            axes = [f["axis_%i" % i] for i in range(len(input_names))]
+        return cls(input_names,
+                   axes,
+                   output_names,
+                   np.load(values_path, mmap_mode=mmap_mode))
+
+    @property
+    def input_continuous_ranges(self):
+        r"""(min, max) of each input
+
+        Returns
+        -------
+        dict
+
+        """
+        return {name: (axis[0], axis[-1])
+                for name, axis in zip(self.input_names, self.axes)}
+
+    @property
+    def nbytes(self):
+        r"""Memory size of the grid arrays
+
+        Memory-mapped values are not counted: their pages belong to the
+        file cache and are shared by the processes that map the same file.
+        The fallback model is not counted either, it is not held by the grid
+        model
+
+        """
+        nbytes = sum(a.nbytes for a in self.axes)
+        if not isinstance(self.values, np.memmap):
+            nbytes += self.values.nbytes
+        return nbytes
+
+    @property
+    def nb_holes(self):
+        r"""Number of grid nodes without data"""
+        return int(np.isnan(self.values[..., 0]).sum())
+
+    @property
+    def is_full_grid(self):
+        r"""Is there data for every node of the grid?"""
+        return self.nb_holes == 0
+
+    def with_filled_holes(self, max_gap=DEFAULT_MAX_GAP):
+        r"""Model whose small holes are filled along the aoa and reynolds axes
+
+        See foilix.hole_filling. The filled nodes are flagged in the
+        filled_mask of the returned model, the fallback is kept.
+
+        Parameters
+        ----------
+        max_gap : int, optional
+            Maximum number of consecutive missing nodes that are filled
+
+        Returns
+        -------
+        GridDataModel
+
+        """
+        indices = [self.input_names.index(name)
+                   for name in ('aoa', 'reynolds') if name in self.input_names]
+        log_indices = [i for i in indices
+                       if self.input_names[i] == 'reynolds']
+        values, mask = fill_holes(self.values,
+                                  self.axes,
+                                  indices,
+                                  log_indices,
+                                  max_gap=max_gap)
+        model = GridDataModel(self.input_names,
+                              self.axes,
+                              self.output_names,
+                              values,
+                              fallback=self.fallback)
+        model.filled_mask = mask | self.filled_mask
+        logger.debug("Filled %i of %i holes" % (mask.sum(), self.nb_holes))
+        return model
+
+    def interpolate(self, point):
+        r"""Interpolate the outputs at the point(s)
+
+        Parameters
+        ----------
+        point : dict
+            {input name: float or array of floats}
+
+        Returns
+        -------
+        dict
+            {output name: float or array of floats}
+
+        """
+        scalar = np.ndim(point[self.input_names[0]]) == 0
+        points = np.column_stack([np.atleast_1d(point[name]).astype(float)
+                                  for name in self.input_names])
+        results = self.interpolate_points(points)
+
+        holes = np.isnan(results).any(axis=1)
+        if holes.any() and self.fallback is not None:
+            logger.debug("%i query points touch a hole in the grid, "
+                         "using the fallback model" % holes.sum())
+            r = self.fallback().interpolate(
+                {name: points[holes, i]
+                 for i, name in enumerate(self.input_names)})
+            for k, name in enumerate(self.output_names):
+                results[holes, k] = np.asarray(r[name], dtype=float).ravel()
+
+        if scalar is True:
+            return {name: results[0, k]
+                    for k, name in enumerate(self.output_names)}
+        return {name: results[:, k]
+                for k, name in enumerate(self.output_names)}
+
+    def interpolate_points(self, points):
+        r"""Vectorized multilinear interpolation on the grid
+
+        Parameters
+        ----------
+        points : ndarray of shape (n_points, n_inputs)
+
+        Returns
+        -------
+        ndarray of shape (n_points, n_outputs)
+            NaN rows for points whose stencil contains a hole
+
+        Raises
+        ------
+        ValueError if a point lies outside of the grid
+
+        """
+        lower_indices, fractions, corners = list(), list(), list()
+        for i, axis in enumerate(self.axes):
+            x = points[:, i]
+            if np.any(x < axis[0]) or np.any(x > axis[-1]):
+                msg = "%s outside of the grid range (%.2f to %.2f)" % \
+                      (self.input_names[i], axis[0], axis[-1])
+                raise ValueError(msg)
+            if len(axis) == 1:
+                lower_indices.append(np.zeros(len(x), dtype=int))
+                fractions.append(np.zeros(len(x)))
+                corners.append((0,))
+            else:
+                i0 = np.clip(np.searchsorted(axis, x, side='right') - 1,
+                             0,
+                             len(axis) - 2)
+                lower_indices.append(i0)
+                fractions.append((x - axis[i0]) / (axis[i0 + 1] - axis[i0]))
+                corners.append((0, 1))
+
+        results = np.zeros((len(points), len(self.output_names)))
+        for corner in itertools.product(*corners):
+            weight = np.ones(len(points))
+            index = list()
+            for i0, t, c in zip(lower_indices, fractions, corner):
+                weight *= t if c == 1 else 1. - t
+                index.append(i0 + c)
+            # nodes with a zero weight do not count, even if they are holes
+            contribution = weight[:, np.newaxis] * self.values[tuple(index)]
+            results += np.where(weight[:, np.newaxis] > 0., contribution, 0.)
+        return results
+
+    def interpolate_points_with_gradient(self, points):
+        r"""Vectorized multilinear interpolation and its analytic gradient
+
+        In a grid cell, the derivative along an input is the derivative of
+        the multilinear weights. On a cell boundary, the derivative is the
+        one of the upper cell (the one of the lower cell on the last node).
+
+        Parameters
+        ----------
+        points : ndarray of shape (n_points, n_inputs)
+
+        Returns
+        -------
+        tuple(ndarray, ndarray)
+            Values of shape (n_points, n_outputs) and gradients of shape
+            (n_points, n_outputs, n_inputs) (zero along the inputs with a
+            single grid value), NaN where the stencil contains a hole
+
+        Raises
+        ------
+        ValueError if a point lies outside of the grid
+
+        """
+        n_inputs = len(self.axes)
+        lower_indices, fractions, inverse_steps, corners = [], [], [], []
+        for i, axis in enumerate(self.axes):
+            x = points[:, i]
+            if np.any(x < axis[0]) or np.any(x > axis[-1]):
+                msg = "%s outside of the grid range (%.2f to %.2f)" % \
+                      (self.input_names[i], axis[0], axis[-1])
+                raise ValueError(msg)
+            if len(axis) == 1:
+                lower_indices.append(np.zeros(len(x), dtype=int))
+                fractions.append(np.zeros(len(x)))
+                inverse_steps.append(np.zeros(len(x)))
+                corners.append((0,))
+            else:
+                i0 = np.clip(np.searchsorted(axis, x, side='right') - 1,
+                             0,
+                             len(axis) - 2)
+                step = axis[i0 + 1] - axis[i0]
+                lower_indices.append(i0)
+                fractions.append((x - axis[i0]) / step)
+                inverse_steps.append(1. / step)
+                corners.append((0, 1))
+
+        values = np.zeros((len(points), len(self.output_names)))
+        gradients = np.zeros((len(points), len(self.output_names), n_inputs))
+        for corner in itertools.product(*corners):
+            factors = [t if c == 1 else 1. - t
+                       for t, c in zip(fractions, corner)]
+            derivatives = [s if c == 1 else -s
+                           for s, c in zip(inverse_steps, corner)]
+            node_values = self.values[tuple(i0 + c for i0, c in
+                                            zip(lower_indices, corner))]
+            weight = np.prod(factors, axis=0)
+            values += np.where(weight[:, np.newaxis] > 0.,
+                               weight[:, np.newaxis] * node_values,
+                               0.)
+            for i in range(n_inputs):
+                weight_derivative = np.prod(factors[:i] + [derivatives[i]] +
+                                            factors[i + 1:], axis=0)
+                gradients[:, :, i] += \
+                    weight_derivative[:, np.newaxis] * node_values
+        return values, gradients
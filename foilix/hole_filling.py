@@ -0,0 +1,107 @@
+# coding: utf-8
+
+r"""Filling of the small holes of the pre-computed data grids
+
+The angles for which XFOIL did not converge leave holes in the
+mach x ncrit x reynolds x aoa grid of a foil. A hole of at most max_gap
+consecutive nodes along the aoa axis or the reynolds axis is filled by
+linear interpolation between the valid nodes on each side (in log(Re)
+along the reynolds axis). When both axes give an estimate, the average is
+used. Holes at the ends of an axis are not filled (no extrapolation).
+
+All the operations are vectorized over the whole grid.
+
+"""
+
+from __future__ import division
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# default maximum number of consecutive missing nodes that are filled
+DEFAULT_MAX_GAP = 2
+
+
+def interpolate_gaps(values, coordinates, axis, max_gap=DEFAULT_MAX_GAP):
+    r"""Linear interpolation of the NaN gaps of an array along an axis
+
+    Parameters
+    ----------
+    values : ndarray
+    coordinates : ndarray
+        Sorted coordinates of the nodes along the axis
+    axis : int
+    max_gap : int, optional
+        Gaps of more than max_gap consecutive NaN values are not filled
+
+    Returns
+    -------
+    ndarray : same shape as values, the interpolated values where values
+              has a NaN gap that could be filled, NaN elsewhere
+
+    """
+    v = np.moveaxis(np.asarray(values, dtype=float), axis, -1)
+    x = np.asarray(coordinates, dtype=float)
+    n = v.shape[-1]
+    index = np.arange(n)
+    valid = ~np.isnan(v)
+
+    # index of the last valid node at or before / first valid node at or
+    # after each node (-1 / n if there is none)
+    previous = np.maximum.accumulate(np.where(valid, index, -1), axis=-1)
+    following = np.flip(np.minimum.accumulate(
+        np.flip(np.where(valid, index, n), axis=-1), axis=-1), axis=-1)
+
+    fillable = ~valid & (previous >= 0) & (following < n) & \
+        (following - previous - 1 <= max_gap)
+    previous = np.clip(previous, 0, n - 1)
+    following = np.clip(following, 0, n - 1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weights = (x[index] - x[previous]) / (x[following] - x[previous])
+        estimates = np.take_along_axis(v, previous, axis=-1) * (1. - weights) + \
+            np.take_along_axis(v, following, axis=-1) * weights
+    return np.moveaxis(np.where(fillable, estimates, np.nan), -1, axis)
+
+
+def fill_holes(values, axes, axis_indices, log_axis_indices=(),
+               max_gap=DEFAULT_MAX_GAP):
+    r"""Fill the small holes of a grid of values
+
+    Parameters
+    ----------
+    values : ndarray
+        Grid values, one axis per input and a last axis for the outputs
+    axes : list[ndarray]
+        Node coordinates of each input axis
+    axis_indices : list[int]
+        The axes along which the holes are filled
+    log_axis_indices : list[int], optional
+        The axes whose interpolation is linear in the log of the coordinate
+    max_gap : int, optional
+
+    Returns
+    -------
+    tuple(ndarray, ndarray)
+        The filled values and the boolean mask of the filled nodes
+        (shape values.shape[:-1])
+
+    """
+    values = np.asarray(values, dtype=float)
+    sums = np.zeros(values.shape)
+    counts = np.zeros(values.shape)
+    for i in axis_indices:
+        coordinates = np.log(axes[i]) if i in log_axis_indices else axes[i]
+        estimates = interpolate_gaps(values, coordinates, i, max_gap=max_gap)
+        found = ~np.isnan(estimates)
+        sums[found] += estimates[found]
+        counts += found
+
+    holes = np.isnan(values)
+    with np.errstate(invalid='ignore'):
+        filled = np.where(holes & (counts > 0), sums / counts, values)
+    mask = (holes & ~np.isnan(filled)).any(axis=-1)
+    return filled, mask
@@ -0,0 +1,177 @@
+# coding: utf-8
+
+r"""Bounded cache of the interpolation models of the pre-computed data
+
+A model is kept while its data file is unchanged (same modification time)
+and the total size of the cached models is within a byte budget: the
+least recently used models are evicted first.
+
+"""
+
+import logging
+import types
+from collections import OrderedDict
+from os.path import getmtime
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# default byte budget of the data_api cache
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+
+# objects whose attributes are not part of the size of a model
+_NOT_WALKED = (type, types.ModuleType, types.FunctionType, types.MethodType,
+               types.BuiltinFunctionType, str, bytes, logging.Logger)
+
+
+def estimate_nbytes(model):
+    r"""Estimated memory size of a model, in bytes
+
+    The nbytes attribute of the model is used if it has one, otherwise the
+    numpy arrays (and pandas objects) reachable from the model through the
+    attributes of objects and the items of lists, tuples, sets and dicts
+    are summed, each one once
+
+    Parameters
+    ----------
+    model : object
+
+    Returns
+    -------
+    int
+
+    """
+    nbytes = 0
+    seen = set()
+    stack = [model]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _NOT_WALKED):
+            continue
+        seen.add(id(obj))
+        if isinstance(getattr(obj, "nbytes", None), (int, np.integer)):
+            nbytes += int(obj.nbytes)
+        elif callable(getattr(obj, "memory_usage", None)):
+            # pandas DataFrame
+            nbytes += int(np.sum(obj.memory_usage(index=True)))
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            stack.extend(getattr(obj, "__dict__", {}).values())
+            stack.extend(getattr(obj, slot) for slot in
+                         getattr(type(obj), "__slots__", ())
+                         if isinstance(slot, str) and hasattr(obj, slot))
+    return nbytes
+
+
+class ModelCache(object):
+    r"""LRU cache of models with a byte budget and file invalidation
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Byte budget. The most recently used model is always kept, even if
+        it is larger than the budget.
+
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # key -> (model, file mtime, nbytes), least recently used first
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def nbytes(self):
+        r"""Estimated size of the cached models"""
+        return sum(entry[2] for entry in self._entries.values())
+
+    @property
+    def stats(self):
+        r"""Cache counters
+
+        Returns
+        -------
+        dict
+
+        """
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "models": len(self._entries),
+                "nbytes": self.nbytes}
+
+    def get(self, key, file_path, build):
+        r"""Cached model, built if needed
+
+        Parameters
+        ----------
+        key : hashable
+        file_path : str
+            The data file of the model, the model is rebuilt if its
+            modification time changed
+        build : callable
+            Function without parameter that builds the model
+
+        """
+        mtime = getmtime(file_path)
+        if key in self._entries:
+            model, cached_mtime, nbytes = self._entries.pop(key)
+            if cached_mtime == mtime:
+                self.hits += 1
+                self._entries[key] = (model, mtime, nbytes)
+                return model
+            logger.info("%s changed, invalidating its cached model" %
+                        file_path)
+            self.invalidations += 1
+
+        self.misses += 1
+        model = build()
+        self._entries[key] = (model, mtime, estimate_nbytes(model))
+        self._evict()
+        return model
+
+    def put(self, key, file_path, model):
+        r"""Cache a model built elsewhere, replacing the cached one if any
+
+        Parameters
+        ----------
+        key : hashable
+        file_path : str
+            The data file of the model
+        model : object
+
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = (model, getmtime(file_path), estimate_nbytes(model))
+        self._evict()
+
+    def invalidate(self, key):
+        r"""Remove a model from the cache, if it is cached"""
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        r"""Remove all the models, the counters are kept"""
+        self._entries.clear()
+
+    def _evict(self):
+        r"""Evict the least recently used models until the budget is met"""
+        total = self.nbytes
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, (_, _, nbytes) = self._entries.popitem(last=False)
+            total -= nbytes
+            self.evictions += 1
+            logger.debug("Evicted the model of %s" % str(key))
@@ -78,6 +78,19 @@ class Particle(object):
             absrange = abs(upperbound-lowerbound)
             self.speeds[i] = np.random.uniform(-absrange, absrange)
 
+    def move_to(self, pts):
+        r"""Set the position (bounded by the constraints) and make it the
+        particle best, keeps the random speed
+
+        Parameters
+        ----------
+        pts : N (same dimension as constraints) dimensional array
+
+        """
+        self.pts = np.array(pts, dtype="float")
+        self._boundpts()
+        self.new_best(float('inf'))
+
     def update(self, global_best, omega, phi_p, phi_g):
         r"""Update velocity and position
 
@@ -191,6 +204,11 @@ class PsoAlgorithm(Observable, threading.Thread):
         Scaling factor to search away from the swarm’s best known position
     save_global_best: str or None
         Path to save the global best of the optimization
+    initial_positions : list[N dimensional array], optional
+        Positions of the first particles, e.g. the parameters fitted on the
+        best foils of the data digging step
+        (foilix.foil_generators.fitting.seed_positions()). The other
+        particles are randomized.
 
     References
     ----------
@@ -206,7 +224,8 @@ class PsoAlgorithm(Observable, threading.Thread):
                  omega=-0.2,
                  phi_p=0.0,
                  phi_g=2.8,
-                 save_global_best=None):
+                 save_global_best=None,
+                 initial_positions=None):
         super(PsoAlgorithm, self).__init__()
         threading.Thread.__init__(self)
         # if thickness < 0.0 or thickness > 0.3 or type(thickness) is not float:
@@ -230,6 +249,15 @@ class PsoAlgorithm(Observable, threading.Thread):
         self._global_bestscore, self._global_bestpos = None, None
 
         self.particles = [Particle(self.constraints) for _ in range(0, self.S)]
+        # number of particles that start from an initial position
+        self.nb_seeded = 0
+        if initial_positions is not None:
+            if len(initial_positions) > self.S:
+                logger.warning("%i initial positions for %i particles" %
+                               (len(initial_positions), self.S))
+            for particle, pts in zip(self.particles, initial_positions):
+                particle.move_to(pts)
+            self.nb_seeded = min(len(initial_positions), self.S)
 
         self._scores_y = []
 
@@ -282,9 +310,11 @@ class PsoAlgorithm(Observable, threading.Thread):
                 logger.info(particle.pts.__str__())
 
                 score = None
+                # a seeded particle is first scored where it starts
+                seeded = n == 0 and i_par < self.nb_seeded
                 while not score:  # Keep scoring until converged
                     # Update particle's velocity and position, if global best
-                    if self.global_bestscore:
+                    if self.global_bestscore and not seeded:
                         logger.info("Update particle")
                         particle.update(self.global_bestpos,
                                         self.omega,
@@ -294,6 +324,7 @@ class PsoAlgorithm(Observable, threading.Thread):
                     # None if not converged
                     # airfoil = self.construct_airfoil(*particle.pts)
                     score = self.scoring_object.score(particle.pts)
+                    seeded = False
                     logger.info("Score : %.5f (%.3f)"
                                 % (score if score is not None else float('nan'),
                                    1.0 / score if score is not None else float('nan')))
@@ -23,6 +23,7 @@ import foilix.xfoil.polar
 import foilix.xfoil.xfoil
 import foilix.foil_generators.parsec
 import foilix.foil_generators.nurbs
+import foilix.foil_generators.blend
 
 logger = logging.getLogger(__name__)
 
@@ -601,6 +602,47 @@ class YachtAppendageNurbsSectionScorer(YachtAppendageSectionScorer):
         return foilix.foil_generators.nurbs.NURBS(k)
 
 
+class YachtAppendageBlendSectionScorer(YachtAppendageSectionScorer):
+    r"""Catalog blend version of yacht appendage scorer
+
+    The particle positions are the weights of the basis foils
+
+    Parameters
+    ----------
+    basis : foilix.shape_matrix.ShapeMatrix
+        The basis foils, their camber is removed
+    (other parameters : see YachtAppendageSectionScorer)
+
+    """
+    def __init__(self,
+                 basis,
+                 angles_of_attack,
+                 aoa_ld,
+                 reynolds,
+                 ncrits,
+                 iterlim,
+                 inv_min_drag_scaling=0.3):
+        super(YachtAppendageBlendSectionScorer, self).__init__(angles_of_attack,
+                                                               aoa_ld,
+                                                               reynolds,
+                                                               ncrits,
+                                                               iterlim,
+                                                               inv_min_drag_scaling=inv_min_drag_scaling)
+        self.basis = basis.symmetrical()
+        self.parameterization_type = "SYM_BLEND"
+
+    def construct_symmetrical_airfoil(self, pts):
+        r"""Build the symmetrical foil section for pts
+
+        Parameters
+        ----------
+        pts : list[float]
+            The weights of the basis foils
+
+        """
+        return foilix.foil_generators.blend.CatalogBlend(self.basis, pts)
+
+
 def yacht_appendage_scoring(list_of_lift_to_drag,
                             min_drag,
                             inv_min_drag_scaling):
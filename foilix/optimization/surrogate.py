@@ -0,0 +1,287 @@
+# coding: utf-8
+
+r"""Surrogate model of the foil polars learnt from accumulated xfoil results
+
+The model maps (shape parameters (e.g. PARSEC or NURBS), reynolds, ncrit,
+aoa) to (cl, cd, cm). It is a sparse Gaussian process (deterministic
+training conditional approximation on a set of inducing points) with a
+squared exponential kernel on standardized inputs (log of the reynolds
+number).
+
+The training data only enters the model through m x m and m x n_outputs
+sums (m inducing points): adding new results is an incremental update that
+does not revisit the past results. Queries are vectorized: one call
+predicts a whole swarm.
+
+"""
+
+from __future__ import division
+
+import logging
+
+import numpy as np
+import scipy.linalg
+
+logger = logging.getLogger(__name__)
+
+# relative jitter added to the kernel matrix of the inducing points
+_JITTER = 1e-8
+
+
+class SurrogateModel(object):
+    r"""Sparse Gaussian process regression with incremental training
+
+    The inputs are the shape parameters followed by the reynolds number,
+    ncrit and the angle of attack.
+
+    Parameters
+    ----------
+    nb_inducing : int, optional
+        Maximum number of inducing points
+    length_scale : float, optional
+        Kernel length scale, in standard deviations of the inputs
+    noise : float, optional
+        Noise variance, relative to the outputs variance
+    output_names : tuple(str), optional
+
+    """
+    def __init__(self,
+                 nb_inducing=300,
+                 length_scale=1.,
+                 noise=1e-3,
+                 output_names=('cl', 'cd', 'cm')):
+        self.nb_inducing = nb_inducing
+        self.length_scale = length_scale
+        self.noise = noise
+        self.output_names = tuple(output_names)
+
+        self.inputs = None
+        self.outputs = None
+
+        # fitted state
+        self._nb_fitted = 0
+        self._x_mean = self._x_std = None
+        self._y_mean = self._y_std = None
+        self._inducing = None
+        self._kmm_cho = None
+        self._a = None
+        self._b = None
+        self._a_cho = None
+
+    @property
+    def nb_samples(self):
+        r"""Number of training samples"""
+        return 0 if self.inputs is None else self.inputs.shape[0]
+
+    @property
+    def is_fitted(self):
+        return self._inducing is not None
+
+    def _transform(self, x):
+        r"""Standardized inputs (log of the reynolds number)"""
+        x = np.array(x, dtype=float, ndmin=2)
+        x[:, -3] = np.log(x[:, -3])
+        return (x - self._x_mean) / self._x_std
+
+    def _kernel(self, a, b):
+        sq_distances = np.sum(a ** 2, axis=1)[:, np.newaxis] + \
+            np.sum(b ** 2, axis=1)[np.newaxis, :] - 2. * a.dot(b.T)
+        return np.exp(-0.5 * np.maximum(sq_distances, 0.) /
+                      self.length_scale ** 2)
+
+    def add(self, inputs, outputs):
+        r"""Add training samples and update the model
+
+        The model is refitted (new normalization and inducing points) when
+        the number of samples has doubled since the last fit or when some
+        new samples are not covered by the inducing points, otherwise it is
+        updated incrementally
+
+        Parameters
+        ----------
+        inputs : ndarray of shape (n, n_params + 3)
+        outputs : ndarray of shape (n, len(output_names))
+            Rows with a NaN value (non converged xfoil computations) are
+            ignored
+
+        """
+        inputs = np.array(inputs, dtype=float, ndmin=2)
+        outputs = np.array(outputs, dtype=float, ndmin=2)
+        valid = ~(np.isnan(inputs).any(axis=1) | np.isnan(outputs).any(axis=1))
+        inputs, outputs = inputs[valid], outputs[valid]
+        if inputs.shape[0] == 0:
+            return
+
+        if self.inputs is None:
+            self.inputs, self.outputs = inputs, outputs
+        else:
+            self.inputs = np.vstack((self.inputs, inputs))
+            self.outputs = np.vstack((self.outputs, outputs))
+
+        if self.is_fitted is False or \
+                self.nb_samples >= 2 * self._nb_fitted or \
+                not self._is_covered(inputs):
+            self.refit()
+        else:
+            self._accumulate(inputs, outputs)
+            self._factorize()
+
+    def add_polar(self, params, reynolds_number, ncrit, polar):
+        r"""Add the computed angles of a foilix.xfoil.polar.Polar
+
+        Parameters
+        ----------
+        params : list[float]
+            Shape parameters of the foil of the polar
+        reynolds_number : float
+        ncrit : float
+        polar : foilix.xfoil.polar.Polar
+
+        """
+        aoas = polar.angles_of_attack_computed
+        inputs = np.column_stack((np.tile(params, (len(aoas), 1)),
+                                  np.full(len(aoas), reynolds_number),
+                                  np.full(len(aoas), ncrit),
+                                  aoas))
+        self.add(inputs, np.column_stack((polar.coefficients_of_lift,
+                                          polar.coefficients_of_drag,
+                                          polar.coefficients_of_moment)))
+
+    def polar_matrix_observer(self, params):
+        r"""PolarMatrix cell observer adding the computed polars
+
+        Examples
+        --------
+        >>> pm.add_cell_observer(surrogate.polar_matrix_observer(pts))
+
+        """
+        def observer(reynolds_number, ncrit, polar):
+            self.add_polar(params, reynolds_number, ncrit, polar)
+        return observer
+
+    def refit(self):
+        r"""Fit the normalization, the inducing points and the sums to all
+        the training samples"""
+        x = np.array(self.inputs)
+        x[:, -3] = np.log(x[:, -3])
+        self._x_mean = x.mean(axis=0)
+        self._x_std = np.where(x.std(axis=0) > 0, x.std(axis=0), 1.)
+        self._y_mean = self.outputs.mean(axis=0)
+        self._y_std = np.where(self.outputs.std(axis=0) > 0,
+                               self.outputs.std(axis=0), 1.)
+
+        self._inducing = self._select_inducing(self._transform(self.inputs))
+        m = self._inducing.shape[0]
+        kmm = self._kernel(self._inducing, self._inducing)
+        self._kmm_cho = scipy.linalg.cho_factor(kmm + _JITTER * np.eye(m))
+        self._a = self.noise * kmm
+        self._b = np.zeros((m, self.outputs.shape[1]))
+        self._accumulate(self.inputs, self.outputs)
+        self._factorize()
+        self._nb_fitted = self.nb_samples
+        logger.debug("Surrogate fitted on %i samples, %i inducing points" %
+                     (self.nb_samples, m))
+
+    def _select_inducing(self, z):
+        r"""Farthest point selection of the inducing points"""
+        if z.shape[0] <= self.nb_inducing:
+            return np.unique(z, axis=0)
+        selected = [0]
+        distances = np.sum((z - z[0]) ** 2, axis=1)
+        for _ in range(self.nb_inducing - 1):
+            i = int(np.argmax(distances))
+            selected.append(i)
+            distances = np.minimum(distances, np.sum((z - z[i]) ** 2, axis=1))
+        return z[selected]
+
+    def _is_covered(self, inputs):
+        r"""Are the inputs within a length scale of an inducing point?"""
+        kmn = self._kernel(self._inducing, self._transform(inputs))
+        return bool(np.all(kmn.max(axis=0) > np.exp(-0.5)))
+
+    def _accumulate(self, inputs, outputs):
+        kmn = self._kernel(self._inducing, self._transform(inputs))
+        self._a += kmn.dot(kmn.T)
+        self._b += kmn.dot((outputs - self._y_mean) / self._y_std)
+
+    def _factorize(self):
+        m = self._a.shape[0]
+        self._a_cho = scipy.linalg.cho_factor(
+            self._a + _JITTER * np.trace(self._a) / m * np.eye(m))
+
+    def predict(self, inputs):
+        r"""Predicted outputs and their standard deviations
+
+        Parameters
+        ----------
+        inputs : ndarray of shape (n, n_params + 3)
+
+        Returns
+        -------
+        tuple(ndarray, ndarray) : means and standard deviations,
+                                  of shape (n, len(output_names))
+
+        """
+        if self.is_fitted is False:
+            msg = "The surrogate model has no training data"
+            raise AssertionError(msg)
+        kxm = self._kernel(self._transform(inputs), self._inducing)
+        mean = kxm.dot(scipy.linalg.cho_solve(self._a_cho, self._b))
+
+        # DTC variance : k(x, x) - Q(x, x) + noise * Kxm A^-1 Kmx
+        q = np.sum(kxm * scipy.linalg.cho_solve(self._kmm_cho, kxm.T).T, axis=1)
+        s = np.sum(kxm * scipy.linalg.cho_solve(self._a_cho, kxm.T).T, axis=1)
+        variance = np.maximum(1. - q + self.noise * s, 0.) + self.noise
+        return self._y_mean + mean * self._y_std, \
+            np.sqrt(variance)[:, np.newaxis] * self._y_std
+
+    def predict_grid(self, params, reynolds_numbers, ncrits, aoas):
+        r"""Predictions for many foils on a reynolds x ncrit x aoa grid
+
+        Parameters
+        ----------
+        params : ndarray of shape (n_foils, n_params)
+            e.g. the positions of the particles of a swarm
+        reynolds_numbers : list[float]
+        ncrits : list[float]
+        aoas : list[float]
+
+        Returns
+        -------
+        tuple(ndarray, ndarray) : means and standard deviations, of shape
+            (n_foils, n_reynolds, n_ncrits, n_aoas, len(output_names))
+
+        """
+        params = np.array(params, dtype=float, ndmin=2)
+        grid = np.array(np.meshgrid(np.arange(params.shape[0]),
+                                    reynolds_numbers,
+                                    ncrits,
+                                    aoas,
+                                    indexing='ij'))
+        shape = grid.shape[1:]
+        grid = grid.reshape(4, -1)
+        inputs = np.column_stack((params[grid[0].astype(int)], grid[1:].T))
+        mean, std = self.predict(inputs)
+        return mean.reshape(shape + (-1,)), std.reshape(shape + (-1,))
+
+    def save(self, path):
+        r"""Save the training samples and the hyper-parameters (.npz)"""
+        np.savez(path,
+                 inputs=self.inputs,
+                 outputs=self.outputs,
+                 hyper_parameters=[self.nb_inducing,
+                                   self.length_scale,
+                                   self.noise],
+                 output_names=np.array(self.output_names))
+
+    @classmethod
+    def load(cls, path):
+        r"""Load and fit a model saved by save()"""
+        with np.load(path) as f:
+            nb_inducing, length_scale, noise = f["hyper_parameters"]
+            model = cls(nb_inducing=int(nb_inducing),
+                        length_scale=float(length_scale),
+                        noise=float(noise),
+                        output_names=[str(n) for n in f["output_names"]])
+            model.add(f["inputs"], f["outputs"])
+        return model
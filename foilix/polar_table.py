@@ -0,0 +1,249 @@
+# coding: utf-8
+
+r"""Columnar table of the pre-computed polars of the whole foil database
+
+The table stacks the grid data of every foil along a leading foil axis:
+foil x mach x ncrit x reynolds x aoa x output.
+Cross-foil questions (e.g. minimum Cd at Re=5e4, ncrit=2 for every
+symmetrical foil) become vectorized slicing and reductions instead of
+one PolarMatrix per foil.
+
+"""
+
+from __future__ import division
+
+import logging
+from os import listdir
+from os.path import join, splitext
+
+import numpy as np
+
+from foilix.binary_store import load_foil_data, is_up_to_date, \
+    input_columns, output_columns
+from foilix.grid_data_model import GridDataModel
+
+logger = logging.getLogger(__name__)
+
+
+class PolarTable(object):
+    r"""Pre-computed polars of many foils on a common grid
+
+    Parameters
+    ----------
+    foil_ids : list[str]
+    axes : dict
+        {input name: sorted ndarray of the grid values}
+    values : ndarray
+        Shape is (len(foil_ids), n_mach, n_ncrit, n_reynolds, n_aoa,
+                  len(output_columns)), NaN for non converged computations
+
+    """
+    axis_names = input_columns
+    output_names = output_columns
+
+    def __init__(self, foil_ids, axes, values):
+        self.foil_ids = list(foil_ids)
+        self.axes = axes
+        self.values = values
+
+    @classmethod
+    def from_folder(cls, foil_data_folder, foil_ids=None, fill_holes=False):
+        r"""Build the table from the pre-computed data files of a folder
+
+        The binary data is used if it is up to date, the .ndf file otherwise.
+        Foils that are not on a regular grid or not on the grid of the first
+        foil are left out.
+
+        Parameters
+        ----------
+        foil_data_folder : str
+        foil_ids : list[str], optional
+            Default is all the foils with a .ndf file in the folder
+        fill_holes : bool, optional
+            Fill the small holes of the grids (see foilix.hole_filling)
+
+        """
+        if foil_ids is None:
+            foil_ids = sorted(splitext(f)[0] for f in listdir(foil_data_folder)
+                              if f.endswith(".ndf"))
+
+        kept_ids, axes, values = list(), None, list()
+        for foil_id in foil_ids:
+            try:
+                if is_up_to_date(foil_data_folder, foil_id):
+                    data = load_foil_data(foil_data_folder, foil_id)
+                    gm = GridDataModel.from_rows(input_columns,
+                                                 data[:, :len(input_columns)],
+                                                 output_columns,
+                                                 data[:, len(input_columns):])
+                else:
+                    gm = GridDataModel.from_ndf_file(
+                        join(foil_data_folder, "%s.ndf" % foil_id))
+            except ValueError:
+                logger.warning("%s is not on a regular grid, "
+                               "leaving it out of the table" % foil_id)
+                continue
+
+            if fill_holes is True:
+                gm = gm.with_filled_holes()
+
+            if axes is None:
+                axes = gm.axes
+            elif not all(len(a) == len(b) and np.allclose(a, b)
+                         for a, b in zip(axes, gm.axes)):
+                logger.warning("%s is not on the common grid, "
+                               "leaving it out of the table" % foil_id)
+                continue
+            kept_ids.append(foil_id)
+            values.append(gm.values)
+
+        if len(kept_ids) == 0:
+            msg = "No pre-computed data in %s" % foil_data_folder
+            raise ValueError(msg)
+
+        logger.info("Polar table of %i foils" % len(kept_ids))
+        return cls(kept_ids,
+                   dict(zip(input_columns, axes)),
+                   np.stack(values))
+
+    def subset(self, foil_ids):
+        r"""Table restricted to some foils
+
+        Parameters
+        ----------
+        foil_ids : list[str]
+
+        Returns
+        -------
+        PolarTable
+
+        """
+        indices = [self.foil_ids.index(foil_id) for foil_id in foil_ids]
+        return PolarTable([self.foil_ids[i] for i in indices],
+                          self.axes,
+                          self.values[indices])
+
+    def axis_index(self, name, value):
+        r"""Index of value on the axis name
+
+        Raises
+        ------
+        ValueError if value is not a grid value
+
+        """
+        matches = np.where(np.isclose(self.axes[name], value))[0]
+        if len(matches) == 0:
+            msg = "%s = %s is not on the table grid" % (name, str(value))
+            raise ValueError(msg)
+        return matches[0]
+
+    def get(self, output, **selection):
+        r"""Values of an output, for grid values of some inputs
+
+        Parameters
+        ----------
+        output : str
+            cl, cd, cdp, cm, top_xtr or bot_xtr
+        selection : dict
+            {input name: grid value}, the selected axes are dropped
+
+        Returns
+        -------
+        ndarray
+            Axes are foil followed by the unselected inputs, in the order
+            mach, ncrit, reynolds, aoa
+
+        Examples
+        --------
+        >>> table.get('cd', mach=0., ncrit=2., reynolds=5e4)  # (n_foils, n_aoa)
+
+        """
+        index = [slice(None)]
+        for name in self.axis_names:
+            if name in selection:
+                index.append(self.axis_index(name, selection[name]))
+            else:
+                index.append(slice(None))
+        index.append(list(self.output_names).index(output))
+        return self.values[tuple(index)]
+
+    def remaining_axes(self, **selection):
+        r"""Names of the axes of the arrays returned by get(**selection),
+        foil axis excluded"""
+        return [name for name in self.axis_names if name not in selection]
+
+    def _extremum(self, output, over, find_max, selection):
+        values = self.get(output, **selection)
+        axis = 1 + self.remaining_axes(**selection).index(over)
+        all_nan = np.all(np.isnan(values), axis=axis)
+        filled = np.where(np.isnan(values),
+                          -np.inf if find_max else np.inf,
+                          values)
+        indices = np.argmax(filled, axis=axis) if find_max \
+            else np.argmin(filled, axis=axis)
+        extrema = np.take_along_axis(filled,
+                                     np.expand_dims(indices, axis),
+                                     axis=axis).squeeze(axis)
+        positions = self.axes[over][indices]
+        extrema = np.where(all_nan, np.nan, extrema)
+        positions = np.where(all_nan, np.nan, positions)
+        return extrema, positions
+
+    def minimum(self, output, over='aoa', **selection):
+        r"""Minimum of an output along an axis, ignoring NaN values
+
+        Parameters
+        ----------
+        output : str
+        over : str, optional
+            The axis along which the minimum is searched (default aoa)
+        selection : dict
+            {input name: grid value}
+
+        Returns
+        -------
+        tuple(ndarray, ndarray)
+            Minimum values and axis values at the minimum (NaN when all the
+            values are NaN)
+
+        """
+        return self._extremum(output, over, False, selection)
+
+    def maximum(self, output, over='aoa', **selection):
+        r"""Maximum of an output along an axis, ignoring NaN values
+
+        See minimum()
+
+        """
+        return self._extremum(output, over, True, selection)
+
+    def mean(self, values, over=('reynolds', 'ncrit'), **selection):
+        r"""Mean of an output along some axes, ignoring NaN values
+
+        Parameters
+        ----------
+        values : str or ndarray
+            Output name or an array shaped like the result of
+            get(**selection) (e.g. a L/D array)
+        over : tuple(str)
+            The axes to average over
+        selection : dict
+            {input name: grid value}
+
+        Returns
+        -------
+        ndarray
+
+        """
+        if not isinstance(values, np.ndarray):
+            values = self.get(values, **selection)
+        remaining = self.remaining_axes(**selection)
+        axes = tuple(1 + remaining.index(name) for name in over)
+        with np.errstate(invalid='ignore'):
+            counts = np.sum(~np.isnan(values), axis=axes)
+            sums = np.nansum(values, axis=axes)
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    def lift_to_drag(self, **selection):
+        r"""L/D values, same axes as get(**selection)"""
+        return self.get('cl', **selection) / self.get('cd', **selection)
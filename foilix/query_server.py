@@ -0,0 +1,344 @@
+# coding: utf-8
+
+r"""Local query server for the pre-computed foil data
+
+The server keeps the interpolation models of data_api hot for all its
+clients (optimizer processes, viewers, notebooks) instead of each process
+loading and building its own models.
+
+Protocol
+--------
+Each message is a 8 bytes header (big endian uint32 lengths of the JSON
+part and of the binary part), a JSON part and a binary part
+(little endian float64 values).
+
+- interpolation request : {"command": "points", "foil_data_folder": ...,
+  "foil_id": ...} + (n, 4) array of mach, ncrit, reynolds, aoa
+- interpolation response : {"shape": [n, 6]} + (n, 6) array of
+  cl, cd, cdp, cm, top_xtr, bot_xtr
+- stats request : {"command": "stats"}, response : {"stats": {...}}
+- error response : {"error": exception type name, "message": ...}
+
+Examples
+--------
+Server:
+$ python query_server.py /tmp/foilix.sock
+
+Client process:
+>>> from foilix.data_api import set_query_server
+>>> set_query_server("/tmp/foilix.sock")  # or FOILIX_QUERY_SERVER env var
+>>> get_data_tuple("../foil_data", "naca0006", 0., 2., 5e4, 3.)
+
+"""
+
+from __future__ import division
+
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+try:
+    import socketserver
+except ImportError:  # Python 2
+    import SocketServer as socketserver
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!II")
+_DTYPE = np.dtype("<f8")
+
+# number of request latencies kept for the stats
+LATENCY_HISTORY = 10000
+
+
+def parse_address(address):
+    r"""Socket address from a string
+
+    "host:port" is a TCP address, anything else is a Unix socket path
+
+    Returns
+    -------
+    str or tuple(str, int)
+
+    """
+    if isinstance(address, tuple):
+        return address
+    host, _, port = address.rpartition(":")
+    if host != "" and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def _recv_exactly(sock, nb_bytes):
+    chunks, remaining = [], nb_bytes
+    while remaining > 0:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise EOFError("Connection closed")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock, header, array=None):
+    r"""Send a JSON header and an optional float64 array"""
+    json_part = json.dumps(header).encode("utf-8")
+    binary_part = b"" if array is None \
+        else np.ascontiguousarray(array, dtype=_DTYPE).tobytes()
+    sock.sendall(_HEADER.pack(len(json_part), len(binary_part)) +
+                 json_part + binary_part)
+
+
+def receive_message(sock):
+    r"""Receive a message sent by send_message()
+
+    Returns
+    -------
+    tuple(dict, ndarray) : header, 1D float64 array (possibly empty)
+
+    """
+    json_length, binary_length = _HEADER.unpack(
+        _recv_exactly(sock, _HEADER.size))
+    header = json.loads(_recv_exactly(sock, json_length).decode("utf-8"))
+    array = np.frombuffer(_recv_exactly(sock, binary_length), dtype=_DTYPE)
+    return header, array
+
+
+class _QueryHandler(socketserver.BaseRequestHandler):
+    r"""Handles the requests of a client connection until it is closed
+
+    A malformed message (invalid JSON, binary part that is not float64
+    values) is answered with an error and the connection is closed
+    """
+    def handle(self):
+        while True:
+            try:
+                header, array = receive_message(self.request)
+            except EOFError:
+                return
+            except ValueError as e:
+                # e.g. JSONDecodeError, raised as a ValueError by the client
+                self.server.send_error(self.request,
+                                       ValueError("Malformed message : %s" % e))
+                return
+            if self.server.handle_query(self.request, header, array) is False:
+                return
+
+
+class QueryServer(object):
+    r"""Threaded server of data_api interpolations
+
+    Parameters
+    ----------
+    address : str or tuple(str, int)
+        Unix socket path or (host, port), host should be a local address
+
+    """
+    def __init__(self, address):
+        self.address = parse_address(address)
+        if isinstance(self.address, tuple):
+            server_class = socketserver.ThreadingTCPServer
+        else:
+            server_class = socketserver.ThreadingUnixStreamServer
+            if os.path.exists(self.address):
+                os.remove(self.address)
+        server_class.daemon_threads = True
+        self._server = server_class(self.address, _QueryHandler)
+        self._server.handle_query = self.handle_query
+        self._server.send_error = self.send_error
+        # data_api and its model cache are not thread safe
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_HISTORY)
+        self.nb_requests = 0
+        self.nb_points = 0
+        self.nb_errors = 0
+
+    @property
+    def server_address(self):
+        r"""Actual address (e.g. the port when the port 0 was requested)"""
+        return self._server.server_address
+
+    @property
+    def stats(self):
+        r"""Request counters and latencies (ms) of the recent requests
+
+        Returns
+        -------
+        dict
+
+        """
+        from foilix.data_api import cache_stats
+        stats = {"requests": self.nb_requests,
+                 "points": self.nb_points,
+                 "errors": self.nb_errors,
+                 "model_cache": cache_stats()}
+        if len(self._latencies) > 0:
+            latencies = 1e3 * np.array(self._latencies)
+            stats.update({"latency_mean_ms": float(latencies.mean()),
+                          "latency_p50_ms": float(np.percentile(latencies, 50)),
+                          "latency_p95_ms": float(np.percentile(latencies, 95)),
+                          "latency_max_ms": float(latencies.max())})
+        return stats
+
+    def handle_query(self, sock, header, array):
+        r"""Answer a request
+
+        Returns
+        -------
+        bool : False if the error response could not be sent (e.g. the
+        client disconnected), the connection should be closed
+
+        """
+        from foilix.data_api import get_data_points
+
+        start = time.time()
+        try:
+            if header.get("command") == "stats":
+                with self._lock:
+                    send_message(sock, {"stats": self.stats})
+                return True
+            if header.get("command") != "points":
+                msg = "Unknown command %s" % str(header.get("command"))
+                raise ValueError(msg)
+            points = array.reshape(-1, 4)
+            with self._lock:
+                data = get_data_points(header["foil_data_folder"],
+                                       header["foil_id"],
+                                       points)
+            send_message(sock, {"shape": list(data.shape)}, data)
+            with self._lock:
+                self.nb_requests += 1
+                self.nb_points += points.shape[0]
+                self._latencies.append(time.time() - start)
+            return True
+        except Exception as e:
+            # the error is sent to the client, the server keeps serving
+            return self.send_error(sock, e)
+
+    def send_error(self, sock, e):
+        r"""Send an error response for the exception e
+
+        Returns
+        -------
+        bool : False if the response could not be sent
+
+        """
+        logger.error("%s : %s" % (type(e).__name__, str(e)))
+        with self._lock:
+            self.nb_errors += 1
+        try:
+            send_message(sock, {"error": type(e).__name__, "message": str(e)})
+        except socket.error as socket_error:
+            logger.warning("Cannot send the error response, closing the "
+                           "connection (%s)" % str(socket_error))
+            return False
+        return True
+
+    def serve_forever(self):
+        logger.info("Serving pre-computed data on %s" % str(self.address))
+        self._server.serve_forever()
+
+    def shutdown(self):
+        r"""Stop serve_forever() (from another thread) and close the socket"""
+        self._server.shutdown()
+        self.close()
+
+    def close(self):
+        self._server.server_close()
+        if not isinstance(self.address, tuple) and os.path.exists(self.address):
+            os.remove(self.address)
+
+
+# errors raised again on the client side
+_client_errors = {"ValueError": ValueError,
+                  "KeyError": KeyError,
+                  "IOError": IOError,
+                  "OSError": OSError,
+                  "FileNotFoundError": IOError}
+
+
+class QueryClient(object):
+    r"""Client of a QueryServer, with the data_api query functions
+
+    The connection is opened on the first request and kept open
+
+    Parameters
+    ----------
+    address : str or tuple(str, int)
+
+    """
+    def __init__(self, address):
+        self.address = parse_address(address)
+        self._sock = None
+
+    def _connect(self):
+        family = socket.AF_INET if isinstance(self.address, tuple) \
+            else socket.AF_UNIX
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.connect(self.address)
+
+    def _request(self, header, array=None):
+        if self._sock is None:
+            self._connect()
+        try:
+            send_message(self._sock, header, array)
+            response, data = receive_message(self._sock)
+        except (EOFError, socket.error):
+            self.close()
+            raise
+        if "error" in response:
+            raise _client_errors.get(response["error"], RuntimeError)(
+                response["message"])
+        return response, data
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def get_data_points(self, foil_data_folder, foil_id, points):
+        r"""Same as data_api.get_data_points()"""
+        response, data = self._request(
+            {"command": "points",
+             "foil_data_folder": os.path.abspath(foil_data_folder),
+             "foil_id": foil_id},
+            np.asarray(points, dtype=float).reshape(-1, 4))
+        return data.reshape(response["shape"])
+
+    def get_data_tuple(self, foil_data_folder, foil_id,
+                       mach, ncrit, reynolds, aoa):
+        r"""Same as data_api.get_data_tuple()"""
+        data = self.get_data_points(foil_data_folder,
+                                    foil_id,
+                                    [[mach, ncrit, reynolds, aoa]])
+        return tuple(float(v) for v in data[0])
+
+    def stats(self):
+        r"""Server stats (see QueryServer.stats)"""
+        return self._request({"command": "stats"})[0]["stats"]
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+
+    parser = ArgumentParser(description="Pre-computed foil data server")
+    parser.add_argument("address",
+                        help="Unix socket path or host:port")
+    args = parser.parse_args()
+
+    server = QueryServer(args.address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
@@ -1,26 +1,392 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-r"""Repanel the symmetrical dat files in foil_dat with 281 points
+r"""Repanel the foil sections
 
-The repanelled section are stored in a file with __p__281
-appended to the file name:
-*.dat -> *__p__281.dat
+The sections are repaneled in memory: a piecewise cubic Hermite spline
+(Bessel tangents) is fitted to the points as a function of the arc length
+and the new points are distributed along the spline with a density that
+increases with the curvature, near the trailing edge and around corners.
+The computations are vectorized over the foils that have the same number
+of points.
+
+repanel_xfoil() is the former XFOIL PPAR/PANE based repaneling, kept as a
+reference for the quality comparisons
+(examples/benchmarks/repanel_benchmark.py).
 
 """
 
+from __future__ import division
+
 import logging
 import os
 from time import sleep
 
+import numpy as np
+
 from foilix.filters import symmetrical_dat_files
-from foilix.xfoil.xfoil import Xfoil
+from foilix.foil import Foil
+from foilix.shape_matrix import split_surfaces
 
 logger = logging.getLogger(__name__)
 
+# minimum segment length (chord units), to repanel points with duplicates
+_MIN_LENGTH = 1e-12
+
+# corner detection: minimum turning angle (degrees) between 2 segments
+DEFAULT_CORNER_ANGLE = 30.
+
+# number of moving averages of the curvature
+_SMOOTHING_PASSES = 4
+
+# nodes around the leading edge that are not considered as corners
+# (sparse definitions of a round leading edge)
+_LE_ZONE = 0.02
+
+
+def _batch_searchsorted(a, v):
+    r"""Index of the interval of each row of v in the same row of a
+
+    Parameters
+    ----------
+    a : ndarray of shape (F, M)
+        Sorted rows
+    v : ndarray of shape (F, K)
+
+    Returns
+    -------
+    ndarray of shape (F, K) of ints in [0, M - 2]
+
+    """
+    nb_rows, m = a.shape
+    offsets = np.arange(nb_rows)[:, np.newaxis] * (a.max() - a.min() + 1.)
+    i = np.searchsorted((a + offsets).ravel(), (v + offsets).ravel(),
+                        side='right').reshape(v.shape)
+    return np.clip(i - 1 - np.arange(nb_rows)[:, np.newaxis] * m, 0, m - 2)
+
+
+def _batch_interp(x_new, x, y):
+    r"""np.interp() of each row of x_new, x and y"""
+    i = _batch_searchsorted(x, x_new)
+    x0 = np.take_along_axis(x, i, axis=1)
+    x1 = np.take_along_axis(x, i + 1, axis=1)
+    y0 = np.take_along_axis(y, i, axis=1)
+    y1 = np.take_along_axis(y, i + 1, axis=1)
+    weights = np.clip((x_new - x0) / np.maximum(x1 - x0, _MIN_LENGTH), 0., 1.)
+    return y0 + weights * (y1 - y0)
+
+
+def _integral(values, s):
+    r"""Cumulative trapezoidal integral of each row of values over s"""
+    return np.concatenate(
+        (np.zeros((values.shape[0], 1)),
+         np.cumsum(0.5 * (values[:, 1:] + values[:, :-1]) * np.diff(s, axis=1),
+                   axis=1)), axis=1)
+
+
+def _window_average(values, s, half_width):
+    r"""Average of each row of values over s +/- half_width (clipped to the
+    ends of the rows)"""
+    integral = _integral(values, s)
+    upper = np.minimum(s + half_width, s[:, -1:])
+    lower = np.maximum(s - half_width, 0.)
+    return (_batch_interp(upper, s, integral) -
+            _batch_interp(lower, s, integral)) / (upper - lower)
+
+
+class ArcLengthSpline(object):
+    r"""Piecewise cubic Hermite spline of foils as a function of the
+    cumulated length of the segments between the points (s, an approximate
+    arc length)
+
+    Parameters
+    ----------
+    points : ndarray of shape (F, N, 2)
+        F foils of N points, from the trailing edge to the trailing edge
+    corner_angle : float, optional
+        Minimum turning angle (degrees) of a corner. The spline has a
+        tangent on each side of a corner.
+
+    """
+    def __init__(self, points, corner_angle=DEFAULT_CORNER_ANGLE):
+        self.points = np.asarray(points, dtype=float)
+        segments = np.diff(self.points, axis=1)
+        self.lengths = np.maximum(np.linalg.norm(segments, axis=2),
+                                  _MIN_LENGTH)
+        self.s = np.concatenate((np.zeros((self.points.shape[0], 1)),
+                                 np.cumsum(self.lengths, axis=1)), axis=1)
+        directions = segments / self.lengths[:, :, np.newaxis]
+
+        # Bessel tangents (second order accurate on uneven spacings)
+        h0 = self.lengths[:, :-1, np.newaxis]
+        h1 = self.lengths[:, 1:, np.newaxis]
+        inner = (h1 * directions[:, :-1] + h0 * directions[:, 1:]) / (h0 + h1)
+        first = 2. * directions[:, :1] - inner[:, :1]
+        last = 2. * directions[:, -1:] - inner[:, -1:]
+
+        # corners : large turning angle, outside of the leading edge zone
+        cosines = np.sum(directions[:, :-1] * directions[:, 1:], axis=2)
+        x = self.points[:, 1:-1, 0]
+        x_le = self.points[:, :, 0].min(axis=1)[:, np.newaxis]
+        chord = self.points[:, :, 0].max(axis=1)[:, np.newaxis] - x_le
+        self.corners = (cosines < np.cos(np.radians(corner_angle))) & \
+            (x > x_le + _LE_ZONE * chord)
+        corners = self.corners[:, :, np.newaxis]
+        self.tangents_in = np.concatenate(
+            (first, np.where(corners, directions[:, :-1], inner), last), axis=1)
+        self.tangents_out = np.concatenate(
+            (first, np.where(corners, directions[:, 1:], inner), last), axis=1)
+
+    @property
+    def total_lengths(self):
+        r"""Cumulated segment length of each foil, shape (F,)"""
+        return self.s[:, -1]
+
+    def evaluate(self, s, derivatives=False):
+        r"""Points of the splines
+
+        Parameters
+        ----------
+        s : ndarray of shape (F, K)
+            Spline parameter values, from 0 to total_lengths
+        derivatives : bool, optional
+            Also return the first and second derivatives with respect to s
+
+        Returns
+        -------
+        ndarray of shape (F, K, 2), or a tuple of 3 such arrays
+
+        """
+        i = _batch_searchsorted(self.s, s)
+        h = np.take_along_axis(self.lengths, i, axis=1)[:, :, np.newaxis]
+        u = ((s - np.take_along_axis(self.s, i, axis=1)) /
+             h[:, :, 0])[:, :, np.newaxis]
+
+        def _take(a, index):
+            return np.take_along_axis(a, index[:, :, np.newaxis], axis=1)
+
+        p0, p1 = _take(self.points, i), _take(self.points, i + 1)
+        m0, m1 = _take(self.tangents_out, i) * h, _take(self.tangents_in, i + 1) * h
+
+        points = (2 * u ** 3 - 3 * u ** 2 + 1) * p0 + \
+            (u ** 3 - 2 * u ** 2 + u) * m0 + \
+            (-2 * u ** 3 + 3 * u ** 2) * p1 + (u ** 3 - u ** 2) * m1
+        if derivatives is False:
+            return points
+        first = ((6 * u ** 2 - 6 * u) * p0 + (3 * u ** 2 - 4 * u + 1) * m0 +
+                 (-6 * u ** 2 + 6 * u) * p1 + (3 * u ** 2 - 2 * u) * m1) / h
+        second = ((12 * u - 6) * p0 + (6 * u - 4) * m0 +
+                  (-12 * u + 6) * p1 + (6 * u - 2) * m1) / h ** 2
+        return points, first, second
+
+    def curvatures(self, s):
+        r"""Absolute curvatures at spline parameter values, shape (F, K)"""
+        _, first, second = self.evaluate(s, derivatives=True)
+        cross = first[:, :, 0] * second[:, :, 1] - first[:, :, 1] * second[:, :, 0]
+        return np.abs(cross) / np.maximum(
+            np.linalg.norm(first, axis=2) ** 3, _MIN_LENGTH)
+
+
+def repanel_points(points,
+                   nb_points,
+                   curvature_weight=0.2,
+                   trailing_edge_weight=1.,
+                   corner_weight=4.,
+                   corner_angle=DEFAULT_CORNER_ANGLE,
+                   samples_per_segment=16):
+    r"""Repanel foils that have the same number of points
+
+    The point density along the arc length s is
+    1 + curvature_weight * k(s) / mean(k)
+    + trailing_edge_weight * (exp(-s / L) + exp(-(S - s) / L))
+    + corner_weight * sum(exp(-((s - s_corner) / l) ** 2))
+    where k is the curvature smoothed over a few mean panel lengths (l),
+    S is the arc length of the foil and L = S / 20
+
+    Parameters
+    ----------
+    points : ndarray of shape (F, N, 2)
+        F foils of N points, from the trailing edge to the trailing edge
+    nb_points : int
+        Number of points of the repaneled foils
+    curvature_weight : float, optional
+    trailing_edge_weight : float, optional
+    corner_weight : float, optional
+    corner_angle : float, optional
+        see ArcLengthSpline
+    samples_per_segment : int, optional
+        Number of samples of each spline segment to compute the density
+
+    Returns
+    -------
+    ndarray of shape (F, nb_points, 2)
+
+    """
+    spline = ArcLengthSpline(points, corner_angle=corner_angle)
+    nb_foils = spline.s.shape[0]
+
+    # dense samples of the splines (not at the nodes, where the second
+    # derivative is discontinuous) and their true arc lengths
+    u = (np.arange(samples_per_segment) + 0.5) / samples_per_segment
+    t = np.concatenate(
+        (np.zeros((nb_foils, 1)),
+         (spline.s[:, :-1, np.newaxis] +
+          spline.lengths[:, :, np.newaxis] * u).reshape(nb_foils, -1),
+         spline.s[:, -1:]), axis=1)
+    s = np.concatenate(
+        (np.zeros((nb_foils, 1)),
+         np.cumsum(np.linalg.norm(np.diff(spline.evaluate(t), axis=1), axis=2),
+                   axis=1)), axis=1)
+    total = s[:, -1:]
+
+    # curvature smoothed by _SMOOTHING_PASSES moving averages over
+    # +/- 2 mean panel lengths (a bell shaped window : the spacing varies
+    # progressively around the leading edge peak)
+    panel = total / (nb_points - 1)
+    curvatures = spline.curvatures(t)
+    mean_curvature = _integral(curvatures, s)[:, -1:] / total
+    for _ in range(_SMOOTHING_PASSES):
+        curvatures = _window_average(curvatures, s, 2. * panel)
+    density = 1. + curvature_weight * curvatures / mean_curvature
+
+    te_length = total / 20.
+    density += trailing_edge_weight * (np.exp(-s / te_length) +
+                                       np.exp(-(total - s) / te_length))
+
+    foil_indices, node_indices = np.nonzero(spline.corners)
+    if len(foil_indices) > 0:
+        corner_t = spline.s[foil_indices, node_indices + 1][:, np.newaxis]
+        s_corners = _batch_interp(corner_t, t[foil_indices], s[foil_indices])
+        bumps = corner_weight * np.exp(
+            -((s[foil_indices] - s_corners) / panel[foil_indices]) ** 2)
+        np.add.at(density, foil_indices, bumps)
+
+    # the density is linear between the samples : exact inversion of its
+    # (quadratic) integral, for point spacings without steps
+    cumulative = _integral(density, s)
+    targets = np.linspace(0., 1., nb_points) * cumulative[:, -1:]
+    i = _batch_searchsorted(cumulative, targets)
+    d0 = np.take_along_axis(density, i, axis=1)
+    slope = (np.take_along_axis(density, i + 1, axis=1) - d0) / \
+        np.maximum(np.take_along_axis(np.diff(s, axis=1), i, axis=1),
+                   _MIN_LENGTH)
+    remaining = np.maximum(targets - np.take_along_axis(cumulative, i, axis=1),
+                           0.)
+    new_s = np.take_along_axis(s, i, axis=1) + 2. * remaining / \
+        (d0 + np.sqrt(np.maximum(d0 ** 2 + 2. * slope * remaining, 0.)))
+    new_t = _batch_interp(new_s, s, t)
+    new_t[:, 0], new_t[:, -1] = 0., spline.s[:, -1]
+    return spline.evaluate(new_t)
+
+
+def selig_order(points):
+    r"""Points ordered from the trailing edge, over the upper surface and
+    back to the trailing edge over the lower surface
+
+    Parameters
+    ----------
+    points : ndarray of shape (N, 2)
+        Selig or Lednicer ordered points
+
+    Returns
+    -------
+    ndarray of shape (N, 2) or (N - 1, 2) (Lednicer : common leading edge)
+
+    """
+    upper, lower = split_surfaces(points)
+    if np.array_equal(upper[0], lower[0]):
+        lower = lower[1:]
+    return np.vstack((upper[::-1], lower))
+
+
+def _remove_duplicates(points):
+    keep = np.concatenate(([True], np.any(np.diff(points, axis=0) != 0.,
+                                          axis=1)))
+    return points[keep]
+
 
-def repanel(datfile_name, nb_panels):
-    r"""Change the number of definition points for the 2d section
+def repanel_foils(foils, nb_points, **kwargs):
+    r"""Repanel foils with any numbers of points
+
+    The foils are put in the Selig order (see selig_order()) and grouped by
+    number of points (after removal of the consecutive duplicate points).
+    Each group is repaneled at once.
+
+    Parameters
+    ----------
+    foils : list[foilix.foil.Foil] or list[ndarray of shape (N, 2)]
+    nb_points : int
+    kwargs
+        see repanel_points()
+
+    Returns
+    -------
+    list[ndarray of shape (nb_points, 2)] : in the order of foils
+
+    """
+    points = [_remove_duplicates(selig_order(
+        f.points if isinstance(f, Foil) else np.asarray(f, dtype=float)))
+        for f in foils]
+    groups = dict()
+    for i, p in enumerate(points):
+        groups.setdefault(p.shape[0], []).append(i)
+
+    repaneled = [None] * len(points)
+    for indices in groups.values():
+        values = repanel_points(np.array([points[i] for i in indices]),
+                                nb_points,
+                                **kwargs)
+        for i, v in zip(indices, values):
+            repaneled[i] = v
+    return repaneled
+
+
+def repanel(datfile_name, nb_panels, output_folder=None, **kwargs):
+    r"""Repanel a dat file
+
+    Parameters
+    ----------
+    datfile_name : str
+        Path to the original dat file
+    nb_panels : int
+        The number of definition points
+    output_folder : str, optional
+        If given, the repaneled foil is saved to
+        <output_folder>/<name>__p__<nb_panels>.dat
+    kwargs
+        see repanel_points()
+
+    Returns
+    -------
+    foilix.foil.Foil : named <name>__p__<nb_panels>
+
+    Raises
+    ------
+    ValueError is datfile_name is not a valid file name
+
+    """
+    if not os.path.isfile(datfile_name):
+        msg = "%s is not a file" % datfile_name
+        logger.error(msg)
+        raise ValueError(msg)
+    foil = Foil.from_dat_file(datfile_name)
+    repaneled = Foil("%s__p__%i" % (foil.name, nb_panels),
+                     repanel_foils([foil], nb_panels, **kwargs)[0])
+    if output_folder is not None:
+        save_dat_file(repaneled, output_folder)
+    return repaneled
+
+
+def save_dat_file(foil, folder):
+    r"""Save a Foil to <folder>/<foil name>.dat (Selig format)"""
+    path = os.path.join(folder, "%s.dat" % foil.name)
+    np.savetxt(path, foil.points, fmt="%.7f", header=foil.name, comments="")
+    return path
+
+
+def repanel_xfoil(datfile_name, nb_panels):
+    r"""Change the number of definition points for the 2d section with XFOIL
+    (PPAR, CADD and PANE commands)
 
     The results are saved in filename__p__<nb_panels>.dat
 
@@ -37,8 +403,9 @@ def repanel(datfile_name, nb_panels):
     ValueError is datfile_name is not a valid file name
 
     """
-    xfoil_exe_dir = os.path.join(os.path.dirname(__file__),
-                                 "../../foilix/xfoil")
+    from foilix.xfoil.xfoil import Xfoil
+
+    xfoil_exe_dir = os.path.join(os.path.dirname(__file__), "xfoil")
     # assert os.path.isfile(os.path.join(xfoil_exe_dir, "xfoil.exe"))
     # assert os.path.isfile(datfile_name)
     if not os.path.isfile(datfile_name):
@@ -102,7 +469,7 @@ def repanel(datfile_name, nb_panels):
         xf.cmd('QUIT')
 
 
-def do_repanel_symmetrical(foil_data_folder, nb_panels):
+def do_repanel_symmetrical(foil_data_folder, nb_panels, output_folder=None):
     r"""Repanel the files that are considered symmetrical
 
     Parameters
@@ -111,28 +478,36 @@ def do_repanel_symmetrical(foil_data_folder, nb_panels):
         The path to the folder containing the 2d section dat files
     nb_panels : int
         The number of panels
+    output_folder : str, optional
+        If given, the repaneled foils are saved in this folder
+        (see repanel())
 
-    """
-    i, j = 0, 0
-
-    for f in symmetrical_dat_files(foil_data_folder):
-        repanel(f, nb_panels=nb_panels)
-        i += 1
+    Returns
+    -------
+    list[foilix.foil.Foil] : the repaneled foils
 
-    logger.info("Repanelled %i symmetrical foil sections with %i panels" %
-                (i, nb_panels))
+    """
+    dat_files = symmetrical_dat_files(foil_data_folder)
+    logger.info("Repanelling %i symmetrical foil sections with %i panels" %
+                (len(dat_files), nb_panels))
 
     # handle missed Drela files
-    for f in ["%s/%s" % (foil_data_folder, f) for f in ["ht05.dat",
-                                                        "ht08.dat",
-                                                        "ht12.dat",
-                                                        "ht13.dat",
-                                                        "ht14.dat"]]:
-        repanel(f, nb_panels=nb_panels)
-        j += 1
+    dat_files += [os.path.join(foil_data_folder, f)
+                  for f in ["ht05.dat", "ht08.dat", "ht12.dat", "ht13.dat",
+                            "ht14.dat"]
+                  if os.path.isfile(os.path.join(foil_data_folder, f))]
+
+    foils = [Foil.from_dat_file(f) for f in dat_files]
+    repaneled = [Foil("%s__p__%i" % (foil.name, nb_panels), points)
+                 for foil, points in zip(foils, repanel_foils(foils,
+                                                              nb_panels))]
+    if output_folder is not None:
+        for foil in repaneled:
+            save_dat_file(foil, output_folder)
 
-    logger.info("Repanelled %i almost symmetrical foil sections "
-                "with %i panels" % (j, nb_panels))
+    logger.info("Repanelled %i foil sections with %i panels" %
+                (len(repaneled), nb_panels))
+    return repaneled
 
 
 if __name__ == "__main__":
@@ -151,7 +526,8 @@ if __name__ == "__main__":
     # do_repanel_symmetrical(foil_data_folder=os.environ["FOIL_DATA_FOLDER"],
     #                        nb_panels=281)
 
-    do_repanel_symmetrical(foil_data_folder="../../foil_dat", nb_panels=281)
+    do_repanel_symmetrical(foil_data_folder="../../foil_dat", nb_panels=281,
+                           output_folder="../../foil_dat_repaneled")
     # repanel("../../foil_data/2032c.dat", nb_panels=281)
 
     # Just to check the file was created ...
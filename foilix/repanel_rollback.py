@@ -1,7 +1,12 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-r"""Rollback the repanelling"""
+r"""Rollback the repanelling
+
+Only needed for the files written next to the original .dat files by
+repanel.repanel_xfoil(), repanel.repanel() writes to an output folder
+
+"""
 
 import logging
 import os
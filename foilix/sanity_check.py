@@ -1,18 +1,21 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-r"""Detect files that contain less points than a threshold to define sections"""
+r"""Detect files that contain less points than a threshold to define sections
+and files whose surfaces do not define a thickness"""
 
 import logging
-import re
+import os
 
-from foilix.filters import symmetrical_dat_files
+from foilix.foil_catalog import FoilCatalog
 
 logger = logging.getLogger(__name__)
 
 
 def sanity_check(foil_dat_folder, nb_points_threshold=60):
-    r"""
+    r"""Log the symmetrical foils defined by less than nb_points_threshold
+    points, and warn about the foils without a positive thickness (surfaces
+    that cannot be separated or that cross)
 
     Parameters
     ----------
@@ -21,32 +24,25 @@ def sanity_check(foil_dat_folder, nb_points_threshold=60):
 
     Returns
     -------
+    int : the number of symmetrical foils with less points than the threshold
 
     """
+    with FoilCatalog(foil_dat_folder) as catalog:
+        rows = catalog.rows("is_symmetrical = 1")
     i = 0
-    sdat = symmetrical_dat_files(foil_dat_folder=foil_dat_folder)
-    for f in sdat:
-        valid_lines = 0
-        with open(f) as f_:
-            lines = f_.readlines()
-            for line in lines:
-                items = re.findall(r'\S+', line)
-                if len(items) == 2:
-                    try:
-                        float(items[0])
-                        float(items[1])
-                        valid_lines += 1
-                    except (TypeError, ValueError):
-                        logger.debug("Found a line that does not define a "
-                                     "point")
-
-            logger.info("%s has %i points" % (f, valid_lines))
-
-            if valid_lines < nb_points_threshold:
-                logger.warning("%s only has %i points" % (f, valid_lines))
-                i += 1
+    for row in rows:
+        f = os.path.join(foil_dat_folder, row["file_name"])
+        logger.info("%s has %i points" % (f, row["nb_points"]))
+
+        if row["thickness"] is None or row["thickness"] <= 0.:
+            logger.warning("%s has no positive thickness" % f)
+
+        if row["nb_points"] < nb_points_threshold:
+            logger.warning("%s only has %i points" % (f, row["nb_points"]))
+            i += 1
     logger.info("Found %i .dat files out of %i with less than %i points" %
-                (i, len(sdat), nb_points_threshold))
+                (i, len(rows), nb_points_threshold))
+    return i
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO,
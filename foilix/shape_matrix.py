@@ -0,0 +1,228 @@
+# coding: utf-8
+
+r"""Foils of the database resampled on a common x grid
+
+The .dat files have arbitrary numbers of points and orderings (Selig,
+Lednicer). Each foil is split into its upper and lower surfaces, its chord
+is scaled to [0, 1] and both surfaces are interpolated on a cosine spaced
+x grid. The foils are stacked in one (n_foils, n_x, 2) array
+(last axis: upper y, lower y) on which the geometric features of all the
+foils are computed at once.
+
+"""
+
+from __future__ import division
+
+import logging
+
+import numpy as np
+
+from foilix.foil import Foil
+from foilix.foil_catalog import FoilCatalog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NB_X = 101
+
+
+def cosine_spacing(nb_x):
+    r"""x grid from 0 to 1, refined at the leading and trailing edges"""
+    return 0.5 * (1. - np.cos(np.linspace(0., np.pi, nb_x)))
+
+
+def split_surfaces(points):
+    r"""Upper and lower surfaces of a foil, by increasing x
+
+    Parameters
+    ----------
+    points : ndarray of shape (N, 2)
+        Selig (TE -> upper -> LE -> lower -> TE) or
+        Lednicer (LE -> upper -> TE, LE -> lower -> TE) ordered points
+
+    Returns
+    -------
+    tuple(ndarray, ndarray) : upper and lower surface points
+
+    """
+    x = points[:, 0]
+    if x[0] < 0.5 * (x.min() + x.max()):
+        # Lednicer : the lower surface starts after the jump back to the LE
+        split = int(np.argmin(np.diff(x))) + 1
+        first, second = points[:split], points[split:]
+    else:
+        le = int(np.argmin(x))
+        first, second = points[:le + 1][::-1], points[le:]
+    if first[:, 1].mean() < second[:, 1].mean():
+        first, second = second, first
+    return first, second
+
+
+def resample(points, x):
+    r"""Upper and lower y of a foil on an x grid
+
+    Parameters
+    ----------
+    points : ndarray of shape (N, 2)
+    x : ndarray
+        x grid from 0 to 1
+
+    Returns
+    -------
+    ndarray of shape (len(x), 2), NaN if the foil cannot be split in 2
+    surfaces of at least 2 points
+
+    """
+    if points.shape[0] < 4 or np.ptp(points[:, 0]) <= 0.:
+        return np.full((len(x), 2), np.nan)
+    x_min, x_max = points[:, 0].min(), points[:, 0].max()
+    points = (points - [x_min, 0.]) / (x_max - x_min)
+
+    resampled = list()
+    for surface in split_surfaces(points):
+        # np.interp needs increasing abscissas
+        order = np.argsort(surface[:, 0], kind="mergesort")
+        xs, index = np.unique(surface[order, 0], return_index=True)
+        if len(xs) < 2:
+            return np.full((len(x), 2), np.nan)
+        # linear in sqrt(x): exact for the sqrt(x) shape of a round nose
+        resampled.append(np.interp(np.sqrt(x),
+                                   np.sqrt(np.maximum(xs, 0.)),
+                                   surface[order, 1][index]))
+    return np.column_stack(resampled)
+
+
+class ShapeMatrix(object):
+    r"""Upper and lower surfaces of many foils on a common x grid
+
+    Parameters
+    ----------
+    names : list[str]
+    x : ndarray
+        x grid, from 0 to 1
+    values : ndarray
+        Shape is (len(names), len(x), 2), last axis is upper y, lower y
+
+    """
+    def __init__(self, names, x, values):
+        self.names = list(names)
+        self.x = x
+        self.values = values
+
+    @classmethod
+    def from_foils(cls, foils, nb_x=DEFAULT_NB_X):
+        r"""Resample foilix.foil.Foil objects"""
+        x = cosine_spacing(nb_x)
+        values = np.empty((len(foils), nb_x, 2))
+        for i, foil in enumerate(foils):
+            values[i] = resample(foil.points, x)
+        return cls([foil.name for foil in foils], x, values)
+
+    @classmethod
+    def from_folder(cls, foil_dat_folder, nb_x=DEFAULT_NB_X, **criteria):
+        r"""Resample the foils of a .dat folder
+
+        Parameters
+        ----------
+        foil_dat_folder : str
+        nb_x : int, optional
+        criteria
+            Selection of the foils, see FoilCatalog.dat_files()
+
+        """
+        with FoilCatalog(foil_dat_folder) as catalog:
+            dat_files = catalog.dat_files(**criteria)
+        return cls.from_foils([Foil.from_dat_file(f) for f in dat_files],
+                              nb_x=nb_x)
+
+    def save(self, path):
+        r"""Save to a .npz file"""
+        np.savez(path, names=np.array(self.names), x=self.x, values=self.values)
+
+    @classmethod
+    def load(cls, path):
+        r"""Load a ShapeMatrix saved by save()"""
+        with np.load(path) as f:
+            return cls([str(name) for name in f["names"]], f["x"], f["values"])
+
+    def subset(self, names):
+        r"""ShapeMatrix of some of the foils"""
+        indices = [self.names.index(name) for name in names]
+        return ShapeMatrix(names, self.x, self.values[indices])
+
+    def symmetrical(self):
+        r"""ShapeMatrix of the symmetrical foils that have the thickness
+        distributions of the foils (the camber is removed)"""
+        half_thickness = 0.5 * self.thickness
+        return ShapeMatrix(self.names, self.x,
+                           np.stack((half_thickness, -half_thickness), axis=2))
+
+    @property
+    def is_valid(self):
+        r"""Foils that could be resampled, boolean array of shape (n_foils,)"""
+        return ~np.isnan(self.values).any(axis=(1, 2))
+
+    @property
+    def upper(self):
+        return self.values[:, :, 0]
+
+    @property
+    def lower(self):
+        return self.values[:, :, 1]
+
+    @property
+    def thickness(self):
+        r"""Thickness distributions, shape (n_foils, n_x)"""
+        return self.upper - self.lower
+
+    @property
+    def camber(self):
+        r"""Camber line distributions, shape (n_foils, n_x)"""
+        return 0.5 * (self.upper + self.lower)
+
+    @property
+    def max_thickness(self):
+        r"""Maximum thickness and its x position, shapes (n_foils,),
+        NaN for the foils that could not be resampled"""
+        thickness = np.where(np.isnan(self.thickness), -np.inf, self.thickness)
+        i = np.argmax(thickness, axis=1)
+        valid = self.is_valid
+        return np.where(valid, thickness[np.arange(len(i)), i], np.nan), \
+            np.where(valid, self.x[i], np.nan)
+
+    def leading_edge_radius(self, x_max=0.1):
+        r"""Leading edge radii fitted on the half thickness near the leading
+        edge
+
+        The half thickness is fitted by a sqrt(x) + b x + c x^2 for
+        0 < x <= x_max, the radius is a^2 / 2 (exact for the NACA 4 digit
+        thickness distribution)
+
+        Returns
+        -------
+        ndarray of shape (n_foils,)
+
+        """
+        mask = (self.x > 0.) & (self.x <= x_max)
+        x = self.x[mask]
+        basis = np.column_stack((np.sqrt(x), x, x ** 2))
+        coefficients = np.linalg.lstsq(basis,
+                                       0.5 * self.thickness[:, mask].T,
+                                       rcond=None)[0]
+        return 0.5 * coefficients[0] ** 2
+
+    def trailing_edge_angle(self, x_min=0.9):
+        r"""Trailing edge angles (degrees) between the lines fitted on the
+        upper and lower surfaces for x >= x_min
+
+        Returns
+        -------
+        ndarray of shape (n_foils,)
+
+        """
+        mask = self.x >= x_min
+        basis = np.column_stack((np.ones(mask.sum()), self.x[mask]))
+        slopes = np.linalg.lstsq(basis,
+                                 self.values[:, mask, :].transpose(1, 0, 2).
+                                 reshape(mask.sum(), -1),
+                                 rcond=None)[0][1].reshape(-1, 2)
+        return np.degrees(np.arctan(slopes[:, 1]) - np.arctan(slopes[:, 0]))
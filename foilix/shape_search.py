@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Nearest neighbour search and duplicate detection over the foil shapes
+
+Each foil is described by its thickness and camber distributions on the
+x grid of a ShapeMatrix. A KD-tree over these vectors answers
+"which database foils look most like this section" and finds the groups of
+geometric duplicates (renamed copies, repaneled or smoothed variants).
+
+Distances are RMS differences of the thickness and camber distributions,
+in chord units.
+
+Examples
+--------
+>>> index = ShapeIndex.from_folder("../foil_dat")
+>>> index.query(PARSEC(k), k=5)
+[('naca0010', 0.0012), ...]
+
+"""
+
+from __future__ import division
+
+import logging
+from os.path import join, isfile
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from foilix.foil import Foil
+from foilix.shape_matrix import ShapeMatrix, resample
+
+logger = logging.getLogger(__name__)
+
+# x grid size of the shape vectors (thickness and camber)
+DEFAULT_NB_X = 41
+
+# RMS distance (chord units) under which 2 foils are duplicates
+DUPLICATE_TOLERANCE = 1e-4
+
+
+def section_points(section):
+    r"""(N, 2) points of a Foil, of a ParametricFoil or of an array
+
+    Parameters
+    ----------
+    section : foilix.foil.Foil, ParametricFoil or array-like of shape (N, 2)
+
+    Returns
+    -------
+    ndarray of shape (N, 2)
+
+    """
+    if isinstance(section, Foil):
+        return section.points
+    if hasattr(section, "get_coords"):
+        x_l, y_l, x_u, y_u = section.get_coords()[:4]
+        return np.column_stack((np.append(x_u[::-1], x_l[1:]),
+                                np.append(y_u[::-1], y_l[1:])))
+    return np.asarray(section, dtype=float).reshape(-1, 2)
+
+
+def _representative(names):
+    r"""Name kept for a group of duplicates: not repaneled, then shortest"""
+    return sorted(names, key=lambda n: ("__p__" in n, len(n), n))[0]
+
+
+class ShapeIndex(object):
+    r"""KD-tree over the thickness and camber vectors of the foils
+
+    Parameters
+    ----------
+    shape_matrix : foilix.shape_matrix.ShapeMatrix
+        The foils that could not be resampled are left out
+
+    """
+    def __init__(self, shape_matrix):
+        valid = shape_matrix.is_valid
+        self.x = shape_matrix.x
+        self.names = [n for n, v in zip(shape_matrix.names, valid) if v]
+        self.vectors = np.hstack((shape_matrix.thickness,
+                                  shape_matrix.camber))[valid]
+        self._scale = np.sqrt(self.vectors.shape[1])
+        self._tree = cKDTree(self.vectors)
+
+    @classmethod
+    def from_folder(cls, foil_dat_folder, nb_x=DEFAULT_NB_X, **criteria):
+        r"""Index of the foils of a .dat folder
+
+        criteria : see FoilCatalog.dat_files()
+        """
+        return cls(ShapeMatrix.from_folder(foil_dat_folder, nb_x, **criteria))
+
+    def vector(self, section):
+        r"""Thickness and camber vector of a section (see section_points())"""
+        values = resample(section_points(section), self.x)
+        return np.hstack((values[:, 0] - values[:, 1],
+                          0.5 * (values[:, 0] + values[:, 1])))
+
+    def query(self, section, k=5):
+        r"""The k indexed foils closest to a section
+
+        Parameters
+        ----------
+        section : foilix.foil.Foil, ParametricFoil or array-like of shape (N, 2)
+        k : int, optional
+
+        Returns
+        -------
+        list[tuple(str, float)] : (name, RMS distance), closest first
+
+        """
+        vector = self.vector(section)
+        if np.isnan(vector).any():
+            msg = "The section cannot be resampled"
+            raise ValueError(msg)
+        k = min(k, len(self.names))
+        distances, indices = self._tree.query(vector, k=k)
+        return [(self.names[i], float(d / self._scale))
+                for d, i in zip(np.atleast_1d(distances),
+                                np.atleast_1d(indices))]
+
+    def duplicates(self, tolerance=DUPLICATE_TOLERANCE):
+        r"""Groups of foils within tolerance of each other (transitively)
+
+        Returns
+        -------
+        list[list[str]] : sorted groups of at least 2 names, representative
+                          (kept) name first
+
+        """
+        parents = list(range(len(self.names)))
+
+        def _root(i):
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        for i, j in self._tree.query_pairs(tolerance * self._scale):
+            parents[_root(i)] = _root(j)
+
+        groups = dict()
+        for i, name in enumerate(self.names):
+            groups.setdefault(_root(i), []).append(name)
+        groups = [g for g in groups.values() if len(g) > 1]
+        return sorted(([_representative(g)] +
+                       sorted(n for n in g if n != _representative(g))
+                       for g in groups))
+
+    def duplicate_report(self, tolerance=DUPLICATE_TOLERANCE):
+        r"""Report lines: kept name, then its duplicates and their distances"""
+        lines = list()
+        for group in self.duplicates(tolerance):
+            kept = self.vectors[self.names.index(group[0])]
+            lines.append("%s : %s" % (group[0], ", ".join(
+                "%s (%.1e)" % (name, np.linalg.norm(
+                    self.vectors[self.names.index(name)] - kept) / self._scale)
+                for name in group[1:])))
+        return lines
+
+
+def duplicate_foil_ids(foil_dat_folder, foil_ids,
+                       tolerance=DUPLICATE_TOLERANCE):
+    r"""Geometric duplicates among foil ids
+
+    Parameters
+    ----------
+    foil_dat_folder : str
+    foil_ids : list[str]
+        Foils without a .dat file in foil_dat_folder are ignored
+    tolerance : float, optional
+
+    Returns
+    -------
+    dict : {duplicate foil id: kept (representative) foil id}
+
+    """
+    dat_files = [f for f in foil_ids
+                 if isfile(join(foil_dat_folder, "%s.dat" % f))]
+    if len(dat_files) < 2:
+        return dict()
+    index = ShapeIndex(ShapeMatrix.from_foils(
+        [Foil.from_dat_file(join(foil_dat_folder, "%s.dat" % f))
+         for f in dat_files], DEFAULT_NB_X))
+    duplicates = dict()
+    for group in index.duplicates(tolerance):
+        logger.info("Skipping %s, duplicates of %s" % (", ".join(group[1:]),
+                                                       group[0]))
+        duplicates.update((name, group[0]) for name in group[1:])
+    return duplicates
+
+
+def unique_foil_ids(foil_dat_folder, foil_ids, tolerance=DUPLICATE_TOLERANCE):
+    r"""Foil ids without the geometric duplicates of other foils of the list
+
+    Parameters
+    ----------
+    foil_dat_folder : str
+    foil_ids : list[str]
+        Foils without a .dat file in foil_dat_folder are kept
+    tolerance : float, optional
+
+    Returns
+    -------
+    list[str] : foil_ids, in the same order, without the duplicates
+
+    """
+    duplicates = duplicate_foil_ids(foil_dat_folder, foil_ids, tolerance)
+    return [f for f in foil_ids if f not in duplicates]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(module)20s '
+                               ':: %(lineno)3d :: %(message)s')
+
+    report = ShapeIndex.from_folder("../foil_dat").duplicate_report()
+    for line in report:
+        print(line)
+    logger.info("%i groups of duplicates" % len(report))
@@ -0,0 +1,147 @@
+# coding: utf-8
+
+r"""Interpolation models shared by several processes
+
+Without sharing, each worker process parses the .ndf files and builds its
+own interpolation models. The owner process exports the grid arrays of the
+models to files of an export folder, the workers memory-map them (zero
+copy, read-only): all the processes use the same physical memory pages.
+
+Only the GridDataModel models are exported. The workers build the models
+of the files that are not on a regular grid themselves (libra RBF models
+cannot be exported), as well as the fallback models of the grids with holes,
+when a query needs them.
+
+Examples
+--------
+>>> with SharedModelExport() as export:
+...     export.export_folder("../foil_data")
+...     pool = multiprocessing.Pool(4,
+...                                 initializer=attach_shared_models,
+...                                 initargs=(export.folder,))
+
+"""
+
+import json
+import logging
+import shutil
+import tempfile
+from os import listdir
+from os.path import join, abspath, isfile, getmtime
+
+from foilix.grid_data_model import GridDataModel
+from foilix import data_api
+
+logger = logging.getLogger(__name__)
+
+_INDEX_FILE = "index.json"
+
+
+class SharedModelExport(object):
+    r"""Export folder of the grid models, owned by the process that creates it
+
+    The folder is removed by close() (or at the end of a with block).
+    On POSIX systems, the workers that already attached the models keep
+    valid memory maps after the removal.
+
+    Parameters
+    ----------
+    folder : str, optional
+        Default is a new temporary folder
+
+    """
+    def __init__(self, folder=None):
+        self.folder = tempfile.mkdtemp(prefix="foilix_models_") \
+            if folder is None else folder
+        # absolute .ndf file path -> (file stem in the export folder,
+        #                            .ndf modification time)
+        self.index = dict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def export(self, ndf_file_path):
+        r"""Export the grid model of a .ndf file
+
+        Parameters
+        ----------
+        ndf_file_path : str
+
+        Returns
+        -------
+        bool : False if the model is not a grid model (not exported)
+
+        """
+        model = data_api.create_interpolation_model(ndf_file_path)
+        if not isinstance(model, GridDataModel):
+            logger.info("%s is not on a regular grid, "
+                        "its model is not exported" % ndf_file_path)
+            return False
+
+        stem = "model_%i" % len(self.index)
+        model.save(join(self.folder, "%s.npy" % stem),
+                   join(self.folder, "%s.npz" % stem))
+        self.index[abspath(ndf_file_path)] = (stem, getmtime(ndf_file_path))
+        with open(join(self.folder, _INDEX_FILE), 'w') as f:
+            json.dump(self.index, f)
+        return True
+
+    def export_folder(self, foil_data_folder):
+        r"""Export the grid models of all the .ndf files of a folder
+
+        Returns
+        -------
+        int : number of exported models
+
+        """
+        return sum(self.export(join(foil_data_folder, f))
+                   for f in sorted(listdir(foil_data_folder))
+                   if f.endswith(".ndf"))
+
+    def close(self):
+        r"""Remove the export folder"""
+        shutil.rmtree(self.folder, ignore_errors=True)
+        self.index = dict()
+
+
+def attach_shared_models(export_folder):
+    r"""Put the exported models in the data_api model cache
+
+    Suitable as a multiprocessing.Pool initializer: the data_api functions
+    of the worker then use the memory-mapped models
+
+    Parameters
+    ----------
+    export_folder : str
+        The folder of a SharedModelExport
+
+    Returns
+    -------
+    int : number of attached models
+
+    """
+    with open(join(export_folder, _INDEX_FILE)) as f:
+        index = json.load(f)
+
+    nb_attached = 0
+    for ndf_file_path, (stem, mtime) in index.items():
+        # the workers build the models of the files changed since the export
+        if not isfile(ndf_file_path) or getmtime(ndf_file_path) != mtime:
+            continue
+        model = GridDataModel.load(join(export_folder, "%s.npy" % stem),
+                                   join(export_folder, "%s.npz" % stem))
+        if model.is_full_grid is False:
+            model.fallback = _rbf_fallback(ndf_file_path)
+        data_api.model_cache.put(data_api.model_key("grid", ndf_file_path),
+                                 ndf_file_path,
+                                 model)
+        nb_attached += 1
+    logger.info("Attached %i shared models" % nb_attached)
+    return nb_attached
+
+
+def _rbf_fallback(ndf_file_path):
+    return lambda: data_api.create_rbf_interpolation_model(ndf_file_path)
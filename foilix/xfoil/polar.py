@@ -8,7 +8,6 @@ import logging
 from os.path import basename, splitext
 
 import numpy as np
-import scipy.interpolate
 
 from foilix.xfoil.xfoil import oper_visc_alpha
 # from foilix.db_deprecated.query import data_from_db
@@ -18,6 +17,9 @@ logger = logging.getLogger(__name__)
 
 def build_interpolator(x, y):
     r"""Function to make interpolation logic switching easy"""
+    # imported here to keep the import of the module light
+    import scipy.interpolate
+
     # min drag from symmetrical is not at 0
     # return scipy.interpolate.Akima1DInterpolator(x, y)
 
@@ -82,6 +84,9 @@ class Polar(object):
         self._infodict = None
         self._warnings = list()
 
+        # angles added by extend() that are not in angles_of_attack_spec
+        self._extra_angles = np.empty(shape=(0,))
+
     def compute(self):
         r"""Compute the polar"""
         if self.use_precomputed_data is False:  # compute the values
@@ -114,35 +119,111 @@ class Polar(object):
         #                                          axis=0)
 
         else:
-            # import here so as to still be able to run the optimization step
-            # under python2 (since data_api import libra that is Python 3 only)
-            # The foilix.data_api import only happens when interpolating from
-            # pre-computed data
-            from foilix.data_api import get_data_tuple
-
-            # since we use the pre-computed data, we only need the id,
-            # not the whole filename
-            foil_id = splitext(basename(self._filename))[0]
-
-            for angle in self.angles_of_attack_spec:
-
-                cl, cd, cdp, cm, top_xtr, bot_xtr = \
-                    get_data_tuple(self.foil_data_folder,
-                                   foil_id,
-                                   mach=0,
-                                   ncrit=self._ncrit,
-                                   reynolds=self._reynolds_number,
-                                   aoa=angle)
-                self._data_array = np.append(self._data_array,
-                                             [[angle,
-                                               cl,
-                                               cd,
-                                               cdp,
-                                               cm,
-                                               top_xtr,
-                                               bot_xtr]],
-                                             axis=0)
+            self._data_array = \
+                self._precomputed_rows(self.angles_of_attack_spec)
+
+        self.computed = True
+
+    def extend(self, angles_of_attack_spec):
+        r"""Add angles of attack to the polar, only computing the angles
+        that have not been requested yet
+
+        Parameters
+        ----------
+        angles_of_attack_spec : list of 3 floats [start, stop, interval]
+            The angles of attack to add to the polar
+
+        """
+        if self.computed is False:
+            self._angles_of_attack_spec = angles_of_attack_spec
+            self.compute()
+            return
+
+        start, stop, step = angles_of_attack_spec
+        if self.use_precomputed_data is False:
+            # xfoil sequences include the stop angle, be consistent with
+            # what compute() does
+            stop += step / 2.
+        new_angles = np.arange(start, stop, step)
+        # xfoil also computes the stop angle of the spec, hence the union
+        computed = self._data_array[:, 0] if len(self._data_array) > 0 \
+            else []
+        requested = np.union1d(self.angles_of_attack_spec, computed)
+        missing = np.array([a for a in new_angles
+                            if not np.any(np.isclose(requested, a))])
+        logger.debug("Extending polar with %i new angles" % len(missing))
+        if len(missing) == 0:
+            return
+
+        self._extra_angles = np.union1d(self._extra_angles, missing)
+
+        if self.use_precomputed_data is False:
+            # xfoil sequences are computed for each run of consecutive
+            # missing angles so that no angle is computed twice
+            breaks = np.where(~np.isclose(np.diff(missing), step))[0] + 1
+            for run in np.split(missing, breaks):
+                data_array, _, _, warnings = \
+                    oper_visc_alpha(self._filename,
+                                    [run[0], run[-1], step],
+                                    self._reynolds_number,
+                                    iterlim=self._iterlim,
+                                    show_seconds=0,
+                                    n_crit=self._ncrit)
+                if len(data_array) > 0:
+                    self._data_array = \
+                        np.vstack((self._data_array.reshape(-1, 7),
+                                   data_array))
+                self._warnings.extend(warnings)
+        else:
+            self._data_array = np.vstack((self._data_array,
+                                          self._precomputed_rows(missing)))
+
+        # keep the angles sorted, interpolators require increasing x
+        self._data_array = self._data_array[np.argsort(self._data_array[:, 0])]
+
+    def _precomputed_rows(self, angles):
+        r"""Rows of the polar data array for the specified angles,
+        retrieved from the pre-computed data
+
+        Parameters
+        ----------
+        angles : ndarray
+            The angles of attack
+
+        Returns
+        -------
+        ndarray of shape (len(angles), 7)
 
+        """
+        # import here so as to still be able to run the optimization step
+        # under python2 (since data_api import libra that is Python 3 only)
+        # The foilix.data_api import only happens when interpolating from
+        # pre-computed data
+        from foilix.data_api import get_data_array
+
+        # since we use the pre-computed data, we only need the id,
+        # not the whole filename
+        foil_id = splitext(basename(self._filename))[0]
+
+        data = get_data_array(self.foil_data_folder,
+                              foil_id,
+                              mach=0,
+                              ncrits=[self._ncrit],
+                              reynolds=[self._reynolds_number],
+                              aoas=angles)
+        return np.column_stack((angles, data[0, 0]))
+
+    def set_data_array(self, data_array):
+        r"""Use data that has already been computed instead of calling
+        compute()
+
+        Parameters
+        ----------
+        data_array : ndarray of shape (n, 7)
+            [[aoa, cl, cd, cdp, cm, top_xtr, bot_xtr], ...]
+
+        """
+        self._data_array = np.asarray(data_array, dtype=float)
         self.computed = True
 
     @property
@@ -192,9 +273,12 @@ class Polar(object):
             Array of angles of attack where the polar is to be computed
 
         """
-        return np.arange(self._angles_of_attack_spec[0],
-                         self._angles_of_attack_spec[1],
-                         self._angles_of_attack_spec[2])
+        angles = np.arange(self._angles_of_attack_spec[0],
+                           self._angles_of_attack_spec[1],
+                           self._angles_of_attack_spec[2])
+        if len(self._extra_angles) == 0:
+            return angles
+        return np.union1d(angles, self._extra_angles)
 
     @property
     def angles_of_attack_computed(self):
@@ -265,6 +349,23 @@ class Polar(object):
         return build_interpolator(self.angles_of_attack_computed,
                                   self.coefficients_of_drag)
 
+    @property
+    def coefficients_of_moment(self):
+        r"""Coefficient of moment for each angle of attack
+
+        Returns
+        -------
+        A list of coefficients of moment
+        in the same order as self.angles_of_attack
+
+        """
+        if self.computed is False:
+            msg = "The Polar should have been computed before " \
+                  "calling coefficients_of_moment"
+            logger.error(msg)
+            raise AssertionError(msg)
+        return self._data_array[:, 4]
+
     @property
     def lift_to_drag(self):
         r"""Lift to drag for each angle of attack
@@ -336,6 +437,10 @@ class Polar(object):
 class PolarMatrix(object):
     r"""A 2D array of Polar objects
 
+    The matrix can be computed incrementally: cells that have not been
+    computed yet are None and the averages are computed over the computed
+    cells only (see coverage).
+
     Parameters
     ----------
     reynolds_numbers : list[float]
@@ -361,34 +466,171 @@ class PolarMatrix(object):
         # [start, stop, interval]}
         self._angles_of_attack_spec = angles_of_attack_spec
 
-        self._reynolds_numbers = reynolds_numbers
+        self._reynolds_numbers = list(reynolds_numbers)
         self._iterlim = iterlim
-        self._ncrits = ncrits
+        self._ncrits = list(ncrits)
         self.use_precomputed_data = use_precomputed_data
 
-        self.matrix = list()
+        self.matrix = [[None for _ in self._ncrits]
+                       for _ in self._reynolds_numbers]
+
+        self._cell_observers = list()
+
+        # angles of attack specs added by extend()
+        self._extra_angles_of_attack_specs = list()
 
         self.computed = False
 
+    def add_cell_observer(self, callback):
+        r"""Register a callable that is called each time a cell of the matrix
+        has been computed
+
+        Parameters
+        ----------
+        callback : callable
+            Called as callback(reynolds_number, ncrit, polar)
+
+        """
+        if not callable(callback):
+            msg = "A cell observer should be callable"
+            raise ValueError(msg)
+        self._cell_observers.append(callback)
+
     def compute(self):
         r"""Compute a polar for each Rn / ncrit combination.
-        Store the results in the 2d (Rn, ncrit) polar matrix"""
-        for rn in self._reynolds_numbers:
-            polars_for_given_reynolds = list()
-            for nc in self._ncrits:
-                polar = Polar(self.foil_data_folder,
-                              self._filename,
-                              self._angles_of_attack_spec,
-                              rn,
-                              nc,
-                              self._iterlim,
-                              use_precomputed_data=self.use_precomputed_data)
+        Store the results in the 2d (Rn, ncrit) polar matrix
+
+        Only the cells that have not been computed yet are computed
+
+        """
+        missing = [(i, j) for i, _ in enumerate(self._reynolds_numbers)
+                   for j, _ in enumerate(self._ncrits)
+                   if self.matrix[i][j] is None]
+
+        if self.use_precomputed_data is True and len(missing) > 0:
+            data, rows, columns = self._precomputed_data(missing)
+
+        for i, j in missing:
+            rn, nc = self._reynolds_numbers[i], self._ncrits[j]
+            polar = Polar(self.foil_data_folder,
+                          self._filename,
+                          self._angles_of_attack_spec,
+                          rn,
+                          nc,
+                          self._iterlim,
+                          use_precomputed_data=self.use_precomputed_data)
+            if self.use_precomputed_data is True:
+                polar.set_data_array(
+                    np.column_stack((polar.angles_of_attack_spec,
+                                     data[rows.index(i), columns.index(j)])))
+            else:
                 polar.compute()
-                polars_for_given_reynolds.append(polar)
-            self.matrix.append(polars_for_given_reynolds)
+            for spec in self._extra_angles_of_attack_specs:
+                polar.extend(spec)
+            self.matrix[i][j] = polar
+            for callback in self._cell_observers:
+                callback(rn, nc, polar)
 
         self.computed = True
 
+    def _precomputed_data(self, cells):
+        r"""Retrieve the pre-computed data of the cells in a single
+        vectorized query
+
+        Parameters
+        ----------
+        cells : list[tuple(int, int)]
+            (reynolds index, ncrit index) of the cells
+
+        Returns
+        -------
+        tuple(ndarray, list[int], list[int])
+            The (n_re, n_ncrit, n_aoa, 6) data array, the reynolds indices
+            and the ncrit indices corresponding to its first 2 axes
+
+        """
+        from foilix.data_api import get_data_array
+
+        foil_id = splitext(basename(self._filename))[0]
+
+        rows = sorted(set(i for i, _ in cells))
+        columns = sorted(set(j for _, j in cells))
+        angles = np.arange(self._angles_of_attack_spec[0],
+                           self._angles_of_attack_spec[1],
+                           self._angles_of_attack_spec[2])
+        data = get_data_array(self.foil_data_folder,
+                              foil_id,
+                              mach=0,
+                              ncrits=[self._ncrits[j] for j in columns],
+                              reynolds=[self._reynolds_numbers[i]
+                                        for i in rows],
+                              aoas=angles)
+        return data, rows, columns
+
+    def extend(self, reynolds=None, ncrits=None, aoas=None):
+        r"""Grow the matrix and compute the missing cells and angles only
+
+        Parameters
+        ----------
+        reynolds : list[float], optional
+            Reynolds numbers to add to the matrix
+        ncrits : list[float], optional
+            ncrits to add to the matrix
+        aoas : list of 3 floats [start, stop, interval], optional
+            Angles of attack to add to every polar of the matrix
+
+        """
+        if aoas is not None:
+            for row in self.matrix:
+                for polar in row:
+                    if polar is not None:
+                        polar.extend(aoas)
+            self._extra_angles_of_attack_specs.append(aoas)
+
+        for rn in reynolds if reynolds is not None else []:
+            if rn not in self._reynolds_numbers:
+                self._reynolds_numbers.append(rn)
+                self.matrix.append([None for _ in self._ncrits])
+
+        for nc in ncrits if ncrits is not None else []:
+            if nc not in self._ncrits:
+                self._ncrits.append(nc)
+                for row in self.matrix:
+                    row.append(None)
+
+        self.compute()
+
+    @property
+    def coverage(self):
+        r"""Number of computed cells and total number of cells in the matrix
+
+        Returns
+        -------
+        (int, int)
+
+        """
+        nb_computed = sum(1 for row in self.matrix
+                          for polar in row if polar is not None)
+        return nb_computed, len(self._reynolds_numbers) * len(self._ncrits)
+
+    def _computed_polars(self):
+        r"""The computed polars of the matrix
+
+        Returns
+        -------
+        list[Polar]
+
+        """
+        polars = [polar for row in self.matrix
+                  for polar in row if polar is not None]
+        if len(polars) == 0:
+            msg = "At least a cell of the PolarMatrix should have been " \
+                  "computed before calling averages"
+            logger.error(msg)
+            raise AssertionError(msg)
+        logger.debug("Averaging over %i of %i cells" % self.coverage)
+        return polars
+
     @property
     def avg_max_lift(self):
         r"""Average maximum lift in the matrix of polars
@@ -402,11 +644,10 @@ class PolarMatrix(object):
         accumulator_value = 0
         accumulator_angle = 0
         count = 0
-        for i, _ in enumerate(self._reynolds_numbers):
-            for j, _ in enumerate(self._ncrits):
-                accumulator_value += self.matrix[i][j].maximum_lift[0]
-                accumulator_angle += self.matrix[i][j].maximum_lift[1]
-                count += 1
+        for polar in self._computed_polars():
+            accumulator_value += polar.maximum_lift[0]
+            accumulator_angle += polar.maximum_lift[1]
+            count += 1
         return accumulator_value / count, accumulator_angle / count
 
     def avg_lift(self, angle_of_attack):
@@ -425,10 +666,9 @@ class PolarMatrix(object):
         """
         accumulator_value = 0
         count = 0
-        for i, _ in enumerate(self._reynolds_numbers):
-            for j, _ in enumerate(self._ncrits):
-                accumulator_value += self.matrix[i][j].coefficients_of_lift_interpolator(angle_of_attack)
-                count += 1
+        for polar in self._computed_polars():
+            accumulator_value += polar.coefficients_of_lift_interpolator(angle_of_attack)
+            count += 1
         return accumulator_value / count
 
     @property
@@ -444,11 +684,10 @@ class PolarMatrix(object):
         accumulator_value = 0
         accumulator_angle = 0
         count = 0
-        for i, _ in enumerate(self._reynolds_numbers):
-            for j, _ in enumerate(self._ncrits):
-                accumulator_value += self.matrix[i][j].max_lift_to_drag[0]
-                accumulator_angle += self.matrix[i][j].max_lift_to_drag[1]
-                count += 1
+        for polar in self._computed_polars():
+            accumulator_value += polar.max_lift_to_drag[0]
+            accumulator_angle += polar.max_lift_to_drag[1]
+            count += 1
         return accumulator_value / count, accumulator_angle / count
 
     def avg_lift_to_drag(self, angle_of_attack):
@@ -467,10 +706,9 @@ class PolarMatrix(object):
         """
         accumulator_value = 0
         count = 0
-        for i, rn in enumerate(self._reynolds_numbers):
-            for j, nc in enumerate(self._ncrits):
-                accumulator_value += self.matrix[i][j].lift_to_drag_interpolator(angle_of_attack)
-                count += 1
+        for polar in self._computed_polars():
+            accumulator_value += polar.lift_to_drag_interpolator(angle_of_attack)
+            count += 1
         return accumulator_value / count
 
     @property
@@ -486,9 +724,8 @@ class PolarMatrix(object):
         accumulator_value = 0
         accumulator_angle = 0
         count = 0
-        for i, rn in enumerate(self._reynolds_numbers):
-            for j, nc in enumerate(self._ncrits):
-                accumulator_value += self.matrix[i][j].minimum_drag[0]
-                accumulator_angle += self.matrix[i][j].minimum_drag[1]
-                count += 1
+        for polar in self._computed_polars():
+            accumulator_value += polar.minimum_drag[0]
+            accumulator_angle += polar.minimum_drag[1]
+            count += 1
         return accumulator_value / count, accumulator_angle / count
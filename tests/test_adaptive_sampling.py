@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""adaptive_sampling.py module tests (no xfoil run)"""
+
+import numpy as np
+
+from foilix.adaptive_sampling import AdaptiveSampler, initial_indices
+
+REYNOLDSS = np.arange(5e3, 3e5 + 1, 5e3)
+NCRITS = [1., 2., 3., 4.]
+
+
+def _compute(cl):
+    r"""Fake compute_records() function, cl = cl(ncrit, reynolds, aoa)"""
+    def compute(foil_id, ncrit, reynolds, mach, aoas, iterlim=200):
+        return [(mach, ncrit, reynolds, aoa,
+                 cl(ncrit, reynolds, aoa), 0.01, 0.005, 0., 0.5, 0.5, [])
+                for aoa in np.arange(aoas[0], aoas[1] + aoas[2] / 2., aoas[2])]
+    return compute
+
+
+def test_initial_indices():
+    r"""The ends are always selected"""
+    indices = initial_indices(REYNOLDSS, 5, log=True)
+    assert indices[0] == 0
+    assert indices[-1] == len(REYNOLDSS) - 1
+    assert len(indices) == 5
+    assert initial_indices(NCRITS, 2) == [0, 3]
+
+
+def test_linear_data_is_not_refined():
+    r"""Linear data needs no more than the initial grid and its checks"""
+    sampler = AdaptiveSampler("foo", NCRITS, REYNOLDSS, [0.], [0., 5., 1.],
+                              compute=_compute(lambda nc, re, a:
+                                               0.1 * a + re * 1e-7 + nc * 1e-2))
+    ncrits, reynoldss = sampler.run()
+    assert sampler.nb_sweeps == len(ncrits) * len(reynoldss)
+    assert sampler.nb_sweeps < sampler.nb_candidate_sweeps / 5
+    assert reynoldss == sorted(reynoldss)
+
+
+def test_refinement_where_the_error_is_large():
+    r"""The grid should be refined around a sharp change in reynolds"""
+    sampler = AdaptiveSampler("foo", NCRITS, REYNOLDSS, [0.], [0., 5., 1.],
+                              compute=_compute(lambda nc, re, a:
+                                               0.1 * a + np.tanh((re - 5e4) /
+                                                                 1e4)))
+    ncrits, reynoldss = sampler.run()
+    # the ncrit check value is kept, the ncrit axis is not refined further
+    assert len(ncrits) == 3
+    low = [re for re in reynoldss if re < 1e5]
+    high = [re for re in reynoldss if re >= 1e5]
+    assert len(low) > len(high)
+    # the written grid is a full tensor grid
+    lines = sampler.csv_lines()
+    assert len(lines) == len(ncrits) * len(reynoldss) * 6
+
+
+def test_refinement_where_xfoil_does_not_converge():
+    r"""A check sweep without any converged angle does not validate its
+    interval"""
+    compute = _compute(lambda nc, re, a: 0.1 * a + re * 1e-7)
+
+    def compute_with_zone(foil_id, ncrit, reynolds, mach, aoas, iterlim=200):
+        records = compute(foil_id, ncrit, reynolds, mach, aoas, iterlim)
+        if 1.6e5 <= reynolds <= 2e5:
+            return [r[:4] + (np.nan,) * 6 + r[10:] for r in records]
+        return records
+
+    _, reynoldss = AdaptiveSampler("foo", NCRITS, REYNOLDSS, [0.],
+                                   [0., 5., 1.], compute=compute).run()
+    _, reynoldss_with_zone = AdaptiveSampler("foo", NCRITS, REYNOLDSS, [0.],
+                                             [0., 5., 1.],
+                                             compute=compute_with_zone).run()
+    assert len(reynoldss_with_zone) > len(reynoldss)
+    # the intervals on both sides of the non converged check are checked
+    assert any(1.1e5 < re < 1.6e5 for re in reynoldss_with_zone)
+    assert any(2e5 < re < 3e5 for re in reynoldss_with_zone)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""binary_store.py module tests"""
+
+import os.path
+import shutil
+
+import numpy as np
+
+from foilix.binary_store import convert_foil, convert_folder, \
+    load_foil_data, is_up_to_date, columns
+from foilix.grid_data_model import GridDataModel
+
+FOIL_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "../foil_data")
+
+
+def _copy_foil_data(foil_id, folder):
+    shutil.copy(os.path.join(FOIL_DATA_FOLDER, "%s.csv" % foil_id), folder)
+    shutil.copy(os.path.join(FOIL_DATA_FOLDER, "%s.ndf" % foil_id), folder)
+
+
+def test_convert_foil(tmpdir):
+    r"""The binary data should be the numerical columns of the csv file,
+    including the rows of non converged computations"""
+    folder = str(tmpdir)
+    _copy_foil_data("e168", folder)
+    assert is_up_to_date(folder, "e168") is False
+
+    convert_foil(folder, "e168")
+    assert is_up_to_date(folder, "e168") is True
+
+    data = load_foil_data(folder, "e168")
+    assert isinstance(data, np.memmap)
+    assert data.shape == (3840, len(columns))
+    assert np.isnan(data[:, 4]).sum() == 82
+    assert np.array_equal(data[1], [0., 1., 5000., 1., 0.0889, 0.05462,
+                                    0.02321, -0.0045, 0.8169, 1.])
+
+
+def test_binary_vs_ndf_grid_model(tmpdir):
+    r"""Grid models built from the binary data and from the ndf file
+    should be identical"""
+    folder = str(tmpdir)
+    _copy_foil_data("e168", folder)
+    assert convert_folder(folder) == 1
+    assert convert_folder(folder) == 0
+
+    data = load_foil_data(folder, "e168")
+    gm_binary = GridDataModel.from_rows(columns[:4], data[:, :4],
+                                        columns[4:], data[:, 4:])
+    gm_ndf = GridDataModel.from_ndf_file(os.path.join(folder, "e168.ndf"))
+
+    assert np.array_equal(np.isnan(gm_binary.values),
+                          np.isnan(gm_ndf.values))
+    assert np.allclose(gm_binary.values, gm_ndf.values, equal_nan=True)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""data_api.py module tests (without XFOIL, see test_precomputed.py)"""
+
+import os.path
+import shutil
+import warnings
+
+import numpy as np
+
+from foilix import data_api
+from foilix.data_metadata import write_duplicate_metadata
+from foilix.grid_data_model import GridDataModel
+
+FOIL_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "../foil_data")
+
+
+class _RbfModel(object):
+    r"""Stands for the libra RBF model built from a .ndf file"""
+    def __init__(self, ndf_file_path):
+        self.ndf_file_path = ndf_file_path
+        self.input_continuous_ranges = {'aoa': (0., 1.)}
+
+
+def _write_ndf(path, inputs):
+    with open(path, 'w') as f:
+        f.write("0 0 0 0 2 2 2 2 2 2\n")
+        f.write("mach ncrit reynolds aoa cl cd cdp cm top_xtr bot_xtr\n")
+        for row in inputs:
+            f.write(" ".join("%f" % v for v in row) + " 0 0 0 0 0 0\n")
+
+
+def test_rbf_model_of_scattered_data(tmpdir, monkeypatch):
+    r"""A file that is not on a regular grid gets the RBF model"""
+    monkeypatch.setattr(data_api, "build_rbf_interpolation_model", _RbfModel)
+    data_api.model_cache.clear()
+
+    rng = np.random.RandomState(0)
+    scattered = str(tmpdir.join("scattered.ndf"))
+    _write_ndf(scattered, np.column_stack((np.zeros(40),
+                                           rng.uniform(1., 4., 40),
+                                           rng.uniform(5e4, 1e5, 40),
+                                           rng.uniform(0., 10., 40))))
+    model = data_api.create_interpolation_model(scattered)
+    assert isinstance(model, _RbfModel)
+    assert model is data_api.create_rbf_interpolation_model(scattered)
+    # cached once, under the rbf key
+    assert [key for key, entry in data_api.model_cache._entries.items()
+            if entry[0] is model] == [data_api.model_key("rbf", scattered)]
+    misses = data_api.model_cache.misses
+    assert data_api.create_interpolation_model(scattered) is model
+    assert data_api.model_cache.misses == misses
+
+    grid = str(tmpdir.join("grid.ndf"))
+    _write_ndf(grid, [[0., n, re, aoa] for n in (1., 2.) for re in (5e4, 1e5)
+                      for aoa in (0., 1., 2.)])
+    assert isinstance(data_api.create_interpolation_model(grid),
+                      GridDataModel)
+    data_api.model_cache.clear()
+
+
+def test_duplicate_foil(tmpdir):
+    r"""The data of a duplicate skipped by data_create is the data of the
+    kept foil"""
+    folder = str(tmpdir)
+    for extension in ("csv", "ndf"):
+        shutil.copy(os.path.join(FOIL_DATA_FOLDER, "e168.%s" % extension),
+                    folder)
+    write_duplicate_metadata(folder, "e168__p__200", "e168")
+    assert data_api.get_data_tuple(folder, "e168__p__200", 0., 2., 5e4, 3.) \
+        == data_api.get_data_tuple(folder, "e168", 0., 2., 5e4, 3.)
+    assert data_api.foil_file_summary_csv(folder, "e168__p__200") == \
+        data_api.foil_file_summary_csv(folder, "e168")
+    data_api.model_cache.clear()
+
+
+class _LinearModel(object):
+    r"""Data model of cl = 0.1 * aoa + 1e-6 * reynolds + 0.01 * ncrit"""
+    def interpolate(self, inputs):
+        cl = 0.1 * inputs["aoa"] + 1e-6 * inputs["reynolds"] + \
+            0.01 * inputs["ncrit"]
+        return dict((key, cl if key == "cl" else np.zeros_like(cl))
+                    for key in data_api.data_keys)
+
+
+def test_finite_difference_gradients_single_ncrit():
+    r"""The gradient along an axis of the data with a single value is 0"""
+    ir = {"mach": (0., 0.), "ncrit": (2., 2.), "reynolds": (5e4, 1e5),
+          "aoa": (0., 10.)}
+    points = np.array([[0., 2., 5e4, 0.], [0., 2., 7e4, 3.]])
+    columns = [list(data_api.input_columns).index(name)
+               for name in data_api.gradient_keys]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        values, gradients = data_api._finite_difference_gradients(
+            _LinearModel(), points, ir, columns)
+    assert np.allclose(values[:, 0], [0.07, 0.39])
+    # aoa, reynolds, ncrit
+    assert np.allclose(gradients[:, 0], [[0.1, 1e-6, 0.], [0.1, 1e-6, 0.]])
+    assert np.all(gradients[:, 1:] == 0.)
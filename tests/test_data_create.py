@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""data_create.py module tests (no xfoil run)"""
+
+import os.path
+
+import pytest
+
+from foilix.data_create import format_lines, merge_shards, shard_path
+
+NAN = float('nan')
+
+
+def _records(ncrit, reynolds):
+    return [(0., ncrit, reynolds, 0., 0., 0.01, 0.005, 0., 0.9, 0.9, []),
+            (0., ncrit, reynolds, 1., NAN, NAN, NAN, NAN, NAN, NAN,
+             ["could_not_be_computed"])]
+
+
+def test_format_lines():
+    r"""Non computed angles are only written to the csv format"""
+    csv_lines = format_lines(_records(2., 5e4), "csv")
+    ndf_lines = format_lines(_records(2., 5e4), "ndf")
+    assert len(csv_lines) == 2
+    assert len(ndf_lines) == 1
+    assert csv_lines[0] == "0.00,2.00,50000.0,0.00,0.000000,0.010000," \
+                           "0.005000,0.000000,0.900000,0.900000,[]\n"
+    assert ndf_lines[0] == "0.00 2.00 50000.0 0.00 0.000000 0.010000 " \
+                           "0.005000 0.000000 0.900000 0.900000\n"
+
+
+def test_merge_shards(tmpdir):
+    r"""The merged files should follow the mach, ncrit, reynolds order
+    whatever the order in which the shards were written"""
+    shard_folder = str(tmpdir.mkdir("shards"))
+    foil_data_folder = str(tmpdir.mkdir("foil_data"))
+    os.mkdir(os.path.join(shard_folder, "foo"))
+    for ncrit in (2., 1.):
+        for reynolds in (2e4, 1e4):
+            with open(shard_path(shard_folder, "foo", 0., ncrit, reynolds),
+                      'w') as f:
+                f.writelines(format_lines(_records(ncrit, reynolds), "csv"))
+
+    merge_shards("foo", [1., 2.], [1e4, 2e4], [0.],
+                 shard_folder, foil_data_folder, formats=["csv", "ndf"])
+
+    with open(os.path.join(foil_data_folder, "foo.csv")) as f:
+        csv_lines = f.readlines()
+    with open(os.path.join(foil_data_folder, "foo.ndf")) as f:
+        ndf_lines = f.readlines()
+    assert len(csv_lines) == 1 + 8
+    assert len(ndf_lines) == 2 + 4
+    assert [l.split(",")[1:3] for l in csv_lines[1::2]] == \
+        [["1.00", "10000.0"], ["1.00", "20000.0"],
+         ["2.00", "10000.0"], ["2.00", "20000.0"]]
+    assert ndf_lines[2:] == [l.replace(",", " ").replace(" []", "")
+                             for l in csv_lines[1::2]]
+
+
+def test_remove_merged_shards(tmpdir):
+    r"""The shards of a foil are removed once merged, but not if the merge
+    fails"""
+    shard_folder = str(tmpdir.mkdir("shards"))
+    foil_data_folder = str(tmpdir.mkdir("foil_data"))
+    os.mkdir(os.path.join(shard_folder, "foo"))
+    with open(shard_path(shard_folder, "foo", 0., 1., 1e4), 'w') as f:
+        f.writelines(format_lines(_records(1., 1e4), "csv"))
+
+    with pytest.raises(IOError):
+        merge_shards("foo", [1., 2.], [1e4], [0.],
+                     shard_folder, foil_data_folder, remove_shards=True)
+    assert os.path.isfile(shard_path(shard_folder, "foo", 0., 1., 1e4))
+
+    merge_shards("foo", [1.], [1e4], [0.],
+                 shard_folder, foil_data_folder, remove_shards=True)
+    assert os.path.isfile(os.path.join(foil_data_folder, "foo.ndf"))
+    assert not os.path.isdir(shard_folder)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""data_metadata.py module tests"""
+
+import os.path
+import shutil
+
+import numpy as np
+
+from foilix.data_metadata import write_metadata_from_csv, read_metadata, \
+    write_duplicate_metadata, resolve_foil_id
+
+FOIL_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "../foil_data")
+
+
+def test_metadata(tmpdir):
+    r"""The metadata should describe the csv and ndf files"""
+    folder = str(tmpdir)
+    shutil.copy(os.path.join(FOIL_DATA_FOLDER, "e168.csv"), folder)
+    shutil.copy(os.path.join(FOIL_DATA_FOLDER, "e168.ndf"), folder)
+    assert read_metadata(folder, "e168") is None
+
+    write_metadata_from_csv(folder, "e168")
+    metadata = read_metadata(folder, "e168")
+
+    csv_data = np.genfromtxt(os.path.join(folder, "e168.csv"), delimiter=",",
+                             skip_header=1, usecols=range(10))
+    ndf_data = np.loadtxt(os.path.join(folder, "e168.ndf"), skiprows=2)
+    assert metadata["nb_rows"] == csv_data.shape[0]
+    assert metadata["nb_valid_rows"] == ndf_data.shape[0]
+    assert metadata["valid_ranges"]["reynolds"] == [ndf_data[:, 2].min(),
+                                                    ndf_data[:, 2].max()]
+    assert metadata["ranges"]["aoa"] == [csv_data[:, 3].min(),
+                                         csv_data[:, 3].max()]
+    assert metadata["grid_shape"] == [len(np.unique(csv_data[:, i]))
+                                      for i in range(4)]
+    assert len(metadata["hash"]) == 40
+
+
+def test_out_of_date_metadata(tmpdir):
+    r"""The metadata should be ignored once a data file is newer"""
+    folder = str(tmpdir)
+    shutil.copy(os.path.join(FOIL_DATA_FOLDER, "e168.csv"), folder)
+    write_metadata_from_csv(folder, "e168")
+    assert read_metadata(folder, "e168") is not None
+
+    csv_file = os.path.join(folder, "e168.csv")
+    mtime = os.path.getmtime(csv_file)
+    os.utime(csv_file, (mtime + 10, mtime + 10))
+    assert read_metadata(folder, "e168") is None
+
+
+def test_cached_metadata(tmpdir):
+    r"""The metadata is parsed again only when a file changes"""
+    folder = str(tmpdir)
+    shutil.copy(os.path.join(FOIL_DATA_FOLDER, "e168.csv"), folder)
+    write_metadata_from_csv(folder, "e168")
+    metadata = read_metadata(folder, "e168")
+    assert read_metadata(folder, "e168") is metadata
+
+    json_file = os.path.join(folder, "e168.json")
+    mtime = os.path.getmtime(json_file)
+    os.utime(json_file, (mtime + 10, mtime + 10))
+    assert read_metadata(folder, "e168") is not metadata
+    assert read_metadata(folder, "e168") == metadata
+
+    # rewritten within the resolution of the modification times
+    write_metadata_from_csv(folder, "e168")
+    os.utime(json_file, (mtime + 10, mtime + 10))
+    assert read_metadata(folder, "e168") is not metadata
+
+
+def test_duplicate(tmpdir):
+    r"""A skipped duplicate resolves to the kept foil"""
+    folder = str(tmpdir)
+    shutil.copy(os.path.join(FOIL_DATA_FOLDER, "e168.csv"), folder)
+    write_metadata_from_csv(folder, "e168")
+    write_duplicate_metadata(folder, "e168__p__200", "e168")
+    assert resolve_foil_id(folder, "e168__p__200") == "e168"
+    assert resolve_foil_id(folder, "e168") == "e168"
+    assert resolve_foil_id(folder, "unknown") == "unknown"
@@ -4,8 +4,9 @@
 r"""foil.py module tests"""
 
 import pytest
+import numpy as np
 
-from foilix.foil import Foil
+from foilix.foil import Foil, parse_dat, _parse_dat_lines
 import os.path
 
 
@@ -108,3 +109,48 @@ def test_leading_edge_radius_naca_0006():
     ler = naca.pseudo_leading_edge_radius
     ler_theory = 1.1019 * (naca.y_spread ** 2)
     assert ler_theory == ler
+
+
+def test_points_array():
+    r"""Points are a read-only (N, 2) array, properties are cached"""
+    path = os.path.join(os.path.dirname(__file__), "../foil_dat/naca0006.dat")
+    naca = Foil.from_dat_file(path)
+    assert naca.points.shape == (len(naca.points), 2)
+    with pytest.raises(ValueError):
+        naca.points[0, 0] = 2.
+    with pytest.raises(AttributeError):
+        naca.thickness = 0.06
+    assert naca.y_spread is naca.y_spread
+
+    # setting the points resets the cached properties
+    naca.points = ((1., 0.), (0., 0.25), (1., -0.5))
+    assert naca.y_spread == 0.75
+    assert naca.is_symmetrical() is False
+
+
+def test_parse_dat():
+    r"""Header, Lednicer point counts and points above 1 are skipped"""
+    selig = b"NACA 0006\n1.0 0.0\n0.0 0.0\n\n1.0 -0.0\n"
+    points, lednicer_counts = parse_dat(selig)
+    assert points.tolist() == [[1., 0.], [0., 0.], [1., 0.]]
+    assert lednicer_counts is None
+
+    lednicer = b"LEDNICER\n 2.  2.\n\n0. 0.\n1. 0.1\n\n0. 0.\n1. -0.1\n"
+    points, lednicer_counts = parse_dat(lednicer)
+    assert points.shape == (4, 2)
+    assert lednicer_counts == (2, 2)
+
+    # text between the points
+    points, _ = parse_dat(b"FOIL\n1.0 0.0\nLOWER SURFACE\n1.0 -0.1\n")
+    assert points.tolist() == [[1., 0.], [1., -0.1]]
+
+
+def test_parse_dat_shipped_files():
+    r"""The bulk parser gives the same points as the line by line parser"""
+    folder = os.path.join(os.path.dirname(__file__), "../foil_dat")
+    for dat_file in os.listdir(folder):
+        if dat_file.endswith(".dat"):
+            with open(os.path.join(folder, dat_file), 'rb') as f:
+                data = f.read()
+            assert np.array_equal(parse_dat(data)[0],
+                                  _parse_dat_lines(data.split(b"\n")))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""foil_catalog.py module tests"""
+
+import multiprocessing
+import os.path
+import shutil
+import sqlite3
+
+from foilix.foil import Foil
+from foilix.foil_catalog import CHUNK_SIZE, FoilCatalog, list_dat_files, scan
+from foilix.filters import sort_foils_folder
+
+FOIL_DAT_FOLDER = os.path.join(os.path.dirname(__file__), "../foil_dat")
+
+DAT_FILES = ["naca0006.dat", "naca0010.dat", "clarky.dat", "sc20402.dat"]
+
+
+def _copy_dat_files(tmpdir):
+    folder = str(tmpdir)
+    for dat_file in DAT_FILES:
+        shutil.copy(os.path.join(FOIL_DAT_FOLDER, dat_file), folder)
+    return folder
+
+
+def test_catalog(tmpdir):
+    r"""The catalog rows should be the Foil properties"""
+    folder = _copy_dat_files(tmpdir)
+    with FoilCatalog(folder) as catalog:
+        rows = catalog.rows()
+    assert [row["file_name"] for row in rows] == sorted(DAT_FILES)
+    for row in rows:
+        foil = Foil.from_dat_file(os.path.join(folder, row["file_name"]))
+        assert row["nb_points"] == len(foil.points)
+        assert row["is_symmetrical"] == foil.is_symmetrical()
+        assert row["le_radius"] == foil.pseudo_leading_edge_radius
+    # thickness and its chordwise position, also for cambered foils
+    thicknesses = dict((row["file_name"], (row["thickness"],
+                                           row["thickness_x"]))
+                       for row in rows)
+    assert abs(thicknesses["naca0010.dat"][0] - 0.1) < 1e-3
+    assert abs(thicknesses["naca0010.dat"][1] - 0.3) < 0.01
+    assert abs(thicknesses["clarky.dat"][0] - 0.117) < 1e-3
+    assert abs(thicknesses["clarky.dat"][1] - 0.28) < 0.02
+
+    assert sort_foils_folder(folder) == (
+        [os.path.join(folder, "naca0006.dat"),
+         os.path.join(folder, "naca0010.dat")],
+        [os.path.join(folder, "clarky.dat"),
+         os.path.join(folder, "sc20402.dat")])
+
+
+def test_catalog_update(tmpdir):
+    r"""Only the changed files should be indexed again"""
+    folder = _copy_dat_files(tmpdir)
+    with FoilCatalog(folder) as catalog:
+        assert catalog.update() == (0, 0)
+
+    # clarky.dat content in naca0006.dat
+    shutil.copy(os.path.join(FOIL_DAT_FOLDER, "clarky.dat"),
+                os.path.join(folder, "naca0006.dat"))
+    os.utime(os.path.join(folder, "naca0006.dat"), (1., 1.))
+    os.remove(os.path.join(folder, "sc20402.dat"))
+
+    with FoilCatalog(folder, update=False) as catalog:
+        assert catalog.update() == (1, 1)
+        assert catalog.dat_files(symmetrical=True) == \
+            [os.path.join(folder, "naca0010.dat")]
+        assert catalog.dat_files(max_thickness=0.08, min_points=10) == []
+
+
+def test_parallel_scan(tmpdir):
+    r"""The parallel scan should give the rows of the sequential scan"""
+    folder = _copy_dat_files(tmpdir)
+    paths = [os.path.join(folder, f) for f in DAT_FILES]
+    sequential = [row for rows in scan(paths, processes=1) for row in rows]
+    parallel = [row for rows in scan(paths, processes=2, chunk_size=1)
+                for row in rows]
+    assert sorted(parallel) == sorted(sequential)
+
+    progress = []
+    with FoilCatalog(folder, update=False) as catalog:
+        catalog.update(processes=2,
+                       chunk_size=3,
+                       progress=lambda i, n: progress.append((i, n)))
+        assert len(catalog.rows()) == len(DAT_FILES)
+    assert sorted(progress) in ([(1, 4), (4, 4)], [(3, 4), (4, 4)])
+
+
+def test_catalog_columns_change(tmpdir):
+    r"""A catalog written with other columns is indexed again"""
+    folder = _copy_dat_files(tmpdir)
+    path = os.path.join(folder, "foil_catalog.sqlite")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE foils (file_name TEXT PRIMARY KEY, "
+                       "mtime REAL, y_spread REAL)")
+    connection.commit()
+    connection.close()
+    with FoilCatalog(folder) as catalog:
+        assert len(catalog.dat_files(max_thickness=0.08)) == 2
+
+
+def test_filters_in_a_worker_process(tmpdir):
+    r"""The filters index the new files sequentially, they can be called
+    from a (daemonic) pool worker"""
+    folder = str(tmpdir)
+    for dat_file in list_dat_files(FOIL_DAT_FOLDER)[:CHUNK_SIZE + 10]:
+        shutil.copy(os.path.join(FOIL_DAT_FOLDER, dat_file), folder)
+    pool = multiprocessing.Pool(1)
+    try:
+        symmetrical, unsymmetrical = pool.apply(sort_foils_folder, (folder,))
+    finally:
+        pool.close()
+        pool.join()
+    assert len(symmetrical) + len(unsymmetrical) == CHUNK_SIZE + 10
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Catalog blend foil generator tests"""
+
+from __future__ import division
+
+import os.path
+
+import numpy as np
+import pytest
+
+from foilix.foil import Foil
+from foilix.foil_generators.blend import CatalogBlend
+from foilix.shape_matrix import ShapeMatrix
+
+FOIL_DAT_FOLDER = os.path.join(os.path.dirname(__file__), "../../foil_dat")
+
+
+def _basis(*names):
+    return ShapeMatrix.from_foils(
+        [Foil.from_dat_file(os.path.join(FOIL_DAT_FOLDER, "%s.dat" % name))
+         for name in names])
+
+
+def test_blend():
+    r"""Blends of symmetrical foils"""
+    basis = _basis("naca0006", "naca0010")
+    foil = CatalogBlend(basis, [0., 2.])
+    assert np.allclose(foil.values, basis.values[1])
+
+    foil = CatalogBlend(basis, [0.5, 0.5])
+    assert foil.is_symmetrical() is True
+    assert foil.is_valid() is True
+    assert abs(foil.max_thickness() - 0.08) < 1e-3
+    x_l, y_l, x_u, y_u = foil.get_coords()
+    assert len(x_l) == 81
+    assert np.allclose(y_l, -y_u)
+    assert np.allclose(foil._thickness(basis.x), 0.5 * (basis.thickness[0] +
+                                                        basis.thickness[1]))
+
+
+def test_symmetrical_basis():
+    r"""The camber of a cambered basis foil can be removed"""
+    basis = _basis("naca0010", "clarky")
+    assert CatalogBlend(basis, [0.5, 0.5]).is_symmetrical() is False
+    foil = CatalogBlend(basis.symmetrical(), [0.5, 0.5])
+    assert foil.is_symmetrical() is True
+    assert np.allclose(foil._camberline(basis.x), 0.)
+
+
+def test_invalid_weights():
+    r"""Wrong number of weights, negative and zero weights"""
+    basis = _basis("naca0006", "naca0010")
+    with pytest.raises(ValueError):
+        CatalogBlend(basis, [1.])
+    with pytest.raises(ValueError):
+        CatalogBlend(basis, [1., -0.5])
+    assert CatalogBlend(basis, [0., 0.]).is_valid() is False
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Least squares fit of the PARSEC and NURBS parameters tests"""
+
+from __future__ import division
+
+import os.path
+
+import numpy as np
+
+from foilix.foil import Foil
+from foilix.foil_generators.fitting import fit_foil, fit_parsec, \
+    fit_symmetrical_parsec, fit_symmetrical_nurbs
+from foilix.foil_generators.parsec import PARSEC
+from foilix.shape_matrix import ShapeMatrix
+
+FOIL_DAT_FOLDER = os.path.join(os.path.dirname(__file__), "../../foil_dat")
+
+X = 0.5 * (1. - np.cos(np.linspace(0., np.pi, 121)))
+
+
+def _selig(x_u, y_u, x_l, y_l):
+    return np.vstack((np.column_stack((x_u[::-1], y_u[::-1])),
+                      np.column_stack((x_l[1:], y_l[1:]))))
+
+
+def _parsec_foil(k):
+    parsec = PARSEC(k)
+    return Foil("parsec", _selig(X, parsec._calc_coords(X, parsec.coeffs_upper),
+                                 X, parsec._calc_coords(X, parsec.coeffs_lower)))
+
+
+def _nurbs_surface(ta, tb, angle):
+    r"""Surface of NURBS._spline(): Hermite curve from (0, 0) to (1, 0),
+    tangents (0, ta) and tb * (cos(angle), -sin(angle))"""
+    u = np.linspace(0., 1., 100)
+    angle = np.radians(angle)
+    return (3 * u ** 2 - 2 * u ** 3 + (u ** 3 - u ** 2) * tb * np.cos(angle),
+            (u ** 3 - 2 * u ** 2 + u) * ta -
+            (u ** 3 - u ** 2) * tb * np.sin(angle))
+
+
+def test_fit_parsec():
+    r"""The parameters of a PARSEC foil are recovered"""
+    k = {'rle': .008, 'x_pre': 0.3, 'y_pre': -0.04, 'd2ydx2_pre': 0.35,
+         'th_pre': 7., 'x_suc': 0.35, 'y_suc': 0.06, 'd2ydx2_suc': -0.45,
+         'th_suc': -12., 'xte': 1., 'yte': 0.}
+    fitted, rms = fit_foil(_parsec_foil(k))
+    assert rms < 1e-5
+    for key in k:
+        assert abs(fitted[key] - k[key]) < 1e-3 * max(1., abs(k[key]))
+    # the fitted parameters build a PARSEC foil
+    PARSEC(fitted)
+
+
+def test_fit_symmetrical_parsec():
+    r"""Symmetrical PARSEC fit in the order of the symmetrical scorer"""
+    k = {'rle': .005, 'x_pre': 0.3, 'y_pre': -0.04, 'd2ydx2_pre': 0.3,
+         'th_pre': 8., 'x_suc': 0.3, 'y_suc': 0.04, 'd2ydx2_suc': -0.3,
+         'th_suc': -8., 'xte': 1., 'yte': 0.}
+    pts, rms = fit_foil(_parsec_foil(k), "SYM_PARSEC")
+    assert rms < 1e-5
+    assert np.allclose(pts, [0.08, 0.005, 0.3, -0.3, 8.], rtol=1e-3)
+
+
+def test_fit_nurbs():
+    r"""The parameters of a NURBS foil are recovered"""
+    k = {'ta_u': .1, 'ta_l': .08, 'tb_u': 1.2, 'tb_l': 0.9, 'alpha_b': 14.,
+         'alpha_c': -5.}
+    x_u, y_u = _nurbs_surface(k['ta_u'], k['tb_u'],
+                              k['alpha_b'] + k['alpha_c'])
+    x_l, y_l = _nurbs_surface(-k['ta_l'], k['tb_l'], k['alpha_c'])
+    fitted, rms = fit_foil(Foil("nurbs", _selig(x_u, y_u, x_l, y_l)), "NURBS")
+    assert rms < 1e-5
+    for key in k:
+        assert abs(fitted[key] - k[key]) < 0.02 * abs(k[key])
+
+    x, y = _nurbs_surface(0.1, 1.5, 6.)
+    pts, rms = fit_foil(Foil("nurbs", _selig(x, y, x, -y)), "SYM_NURBS")
+    assert np.allclose(pts, [0.1, 1.5, 6.], rtol=0.02)
+
+
+def test_batch():
+    r"""Fitting a batch gives the fit of each foil, NaN for invalid foils"""
+    foils = [Foil.from_dat_file(os.path.join(FOIL_DAT_FOLDER, "%s.dat" % n))
+             for n in ("naca0010", "clarky")] + [Foil("empty", [])]
+    shape_matrix = ShapeMatrix.from_foils(foils)
+    positions, rms = fit_symmetrical_parsec(shape_matrix)
+    assert positions.shape == (3, 5)
+    assert np.all(np.isnan(positions[2])) and np.isnan(rms[2])
+    assert np.allclose(positions[0], fit_foil(foils[0], "SYM_PARSEC")[0])
+    # NACA 0010 : 10% thick at 30% of the chord
+    assert np.allclose(positions[0, [0, 2]], [0.1, 0.3], atol=0.01)
+    assert np.all(rms[:2] < 1e-3)
+
+    k, _ = fit_parsec(shape_matrix)
+    assert k['y_suc'][1] > -k['y_pre'][1]  # cambered clarky
+    assert fit_symmetrical_nurbs(shape_matrix)[0].shape == (3, 3)
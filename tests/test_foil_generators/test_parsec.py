@@ -5,9 +5,11 @@ r"""PARSEC foil generator tests"""
 
 from __future__ import division, print_function
 
+import numpy as np
 import pytest
 
-from foilix.foil_generators.parsec import PARSEC
+from foilix.foil_generators.parsec import PARSEC, PARAMETERS, \
+    symmetrical_parameters
 
 
 @pytest.mark.parametrize("rle, x_pre, y_pre, d2ydx2_pre, th_pre, x_suc, y_suc,"
@@ -280,3 +282,75 @@ def test_symmetrical_parsec():
     foil = PARSEC(k)
     assert foil.is_symmetrical() is True
     assert foil.is_valid() is True
+
+
+def test_batch():
+    r"""A batch gives the coefficients, coordinates and validity of the
+    individual foils"""
+    # thickness, rle, x, curvature, te angle : the 4th foil is out of the
+    # PARSEC ranges, the 3rd and the 5th are invalid
+    positions = np.array([[0.06, .005, 0.25, -0.25, 6.],
+                          [0.1, .01, 0.3, -0.6, 10.],
+                          [0.06, .005, 0.25, -0.47, 6.],
+                          [0.06, .005, 0.25, -2.5, 6.],
+                          [0.02, .005, 0.25, -0.47, 6.]])
+    batch = PARSEC.batch(symmetrical_parameters(positions))
+    assert len(batch) == 5
+    assert np.all(batch.is_symmetrical())
+
+    x_l, y_l, x_u, y_u = batch.get_coords()
+    assert y_u.shape == y_l.shape == (5, len(x_u))
+    for i in (0, 1, 2, 4):
+        foil = batch.foil(i)
+        assert np.allclose(batch.coeffs_upper[i], foil.coeffs_upper)
+        assert np.allclose(batch.coeffs_lower[i], foil.coeffs_lower)
+        assert np.allclose(y_u[i], foil.get_coords()[3])
+        assert np.allclose(batch.max_thickness()[i], foil.max_thickness())
+        assert batch.is_valid()[i] == foil.is_valid()
+    assert np.all(np.isnan(y_u[3]))
+    assert batch.is_valid().tolist() == [True, True, False, False, False]
+
+    # dict of arrays
+    k = dict((name, batch.k[name][:2]) for name in PARAMETERS)
+    assert np.allclose(PARSEC.batch(k).coeffs_upper, batch.coeffs_upper[:2])
+
+
+def test_batch_random():
+    r"""The batch validity is the validity of the PARSEC instances"""
+    rng = np.random.RandomState(0)
+    positions = np.column_stack((rng.uniform(0.06, 0.14, 300),
+                                 rng.uniform(0.005, 0.02, 300),
+                                 rng.uniform(0.2, 0.45, 300),
+                                 rng.uniform(-1., 0., 300),
+                                 rng.uniform(2., 14., 300)))
+    parameters = symmetrical_parameters(positions)
+    expected = [PARSEC(dict(zip(PARAMETERS, row))).is_valid()
+                for row in parameters]
+    assert PARSEC.batch(parameters).is_valid().tolist() == expected
+
+
+def test_batch_cambered():
+    r"""Cambered sections get the general validity checks"""
+    k = {'rle': .008, 'x_pre': 0.3, 'y_pre': -0.04, 'd2ydx2_pre': 0.35,
+         'th_pre': 7., 'x_suc': 0.35, 'y_suc': 0.06, 'd2ydx2_suc': -0.45,
+         'th_suc': -12., 'xte': 1., 'yte': 0.}
+    # the pressure side crosses the suction side
+    crossing = dict(k, y_pre=-0.02, y_suc=0.02, th_suc=-2., th_pre=8.)
+    # thicker than specified
+    fat = dict(k, d2ydx2_suc=0.5)
+    # out of the PARSEC ranges
+    wrong = dict(k, xte=0.99)
+    batch = PARSEC.batch(dict((name, np.array([d[name] for d in
+                                               (k, crossing, fat, wrong)]))
+                              for name in PARAMETERS))
+    assert not np.any(batch.is_symmetrical())
+    assert batch.is_valid().tolist() == [True, False, False, False]
+    x_l, y_l, x_u, y_u = batch.get_coords()
+    assert np.allclose(y_u[0], PARSEC(k).get_coords()[3])
+
+
+def test_batch_wrong_shape():
+    r"""The batch parameters have 11 columns"""
+    parameters = symmetrical_parameters([0.06, .005, 0.25, -0.25, 6.])
+    with pytest.raises(ValueError):
+        PARSEC.batch(parameters[:, :5])
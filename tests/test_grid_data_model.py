@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""grid_data_model.py module tests"""
+
+import os.path
+
+import numpy as np
+import pytest
+
+from foilix.grid_data_model import GridDataModel
+
+NDF_FILE = os.path.join(os.path.dirname(__file__), "../foil_data/%s.ndf")
+
+
+def test_grid_nodes():
+    r"""The model should return the file values at the grid nodes"""
+    gm = GridDataModel.from_ndf_file(NDF_FILE % "naca0006")
+    data = np.loadtxt(NDF_FILE % "naca0006", skiprows=2)
+    rows = data[::37]
+    r = gm.interpolate({'mach': rows[:, 0],
+                        'ncrit': rows[:, 1],
+                        'reynolds': rows[:, 2],
+                        'aoa': rows[:, 3]})
+    for k, name in enumerate(['cl', 'cd', 'cdp', 'cm', 'top_xtr', 'bot_xtr']):
+        assert np.allclose(r[name], rows[:, 4 + k])
+
+
+def test_multilinear():
+    r"""Midway between 2 nodes along a single axis, the value should be the
+    average of the node values"""
+    gm = GridDataModel.from_ndf_file(NDF_FILE % "naca0006")
+    r_1 = gm.interpolate({'mach': 0., 'ncrit': 2., 'reynolds': 5e4, 'aoa': 2.})
+    r_2 = gm.interpolate({'mach': 0., 'ncrit': 2., 'reynolds': 5e4, 'aoa': 3.})
+    r_mid = gm.interpolate({'mach': 0., 'ncrit': 2., 'reynolds': 5e4,
+                            'aoa': 2.5})
+    assert abs(r_mid['cd'] - (r_1['cd'] + r_2['cd']) / 2.) < 1e-12
+    assert np.ndim(r_mid['cl']) == 0
+
+
+def test_holes():
+    r"""A hole in the grid gives NaN values around it, but not at its
+    neighbouring nodes"""
+    inputs = np.array([[x, y] for x in [0., 1., 2.] for y in [0., 1.]
+                       if not (x == 2. and y == 1.)])
+    outputs = inputs.sum(axis=1)[:, np.newaxis]
+    gm = GridDataModel.from_rows(['x', 'y'], inputs, ['z'], outputs)
+
+    assert gm.nb_holes == 1
+    assert gm.is_full_grid is False
+    assert gm.interpolate({'x': 0.5, 'y': 0.5})['z'] == 1.
+    assert gm.interpolate({'x': 2., 'y': 0.})['z'] == 2.
+    assert np.isnan(gm.interpolate({'x': 1.5, 'y': 0.5})['z'])
+
+
+def test_outside_range():
+    r"""Interpolating outside of the grid is an error"""
+    gm = GridDataModel.from_ndf_file(NDF_FILE % "naca0006")
+    assert gm.input_continuous_ranges['aoa'] == (0., 15.)
+    with pytest.raises(ValueError):
+        gm.interpolate({'mach': 0., 'ncrit': 2., 'reynolds': 5e4,
+                        'aoa': 16.})
+
+
+def test_not_a_grid():
+    r"""The same node twice is not a grid"""
+    inputs = np.array([[0.], [1.], [1.]])
+    with pytest.raises(ValueError):
+        GridDataModel.from_rows(['x'], inputs, ['z'], inputs)
+
+    # scattered points: a product grid of almost only holes
+    inputs = np.random.RandomState(0).uniform(0., 1., (50, 3))
+    with pytest.raises(ValueError):
+        GridDataModel.from_rows(['x', 'y', 'z'], inputs, ['z'], inputs)
+
+
+def test_save_load(tmpdir):
+    r"""A loaded model should be memory-mapped and interpolate
+    like the saved one"""
+    gm = GridDataModel.from_ndf_file(NDF_FILE % "e168")
+    values_path, axes_path = str(tmpdir.join("m.npy")), str(tmpdir.join("m.npz"))
+    gm.save(values_path, axes_path)
+    loaded = GridDataModel.load(values_path, axes_path)
+    assert isinstance(loaded.values, np.memmap)
+    assert loaded.input_names == gm.input_names
+    assert loaded.output_names == gm.output_names
+    point = {'mach': 0., 'ncrit': 2.5, 'reynolds': 4.2e4, 'aoa': 3.3}
+    assert loaded.interpolate(point) == gm.interpolate(point)
+    assert loaded.nbytes < gm.nbytes
+
+
+def test_gradient():
+    r"""Inside a grid cell, the analytic gradient should match finite
+    differences"""
+    gm = GridDataModel.from_ndf_file(NDF_FILE % "naca0006")
+    points = np.array([[0., 2.3, 5.3e4, 3.4], [0., 1.7, 1.21e5, 6.6]])
+    values, gradients = gm.interpolate_points_with_gradient(points)
+    assert np.allclose(values, gm.interpolate_points(points))
+    assert gradients.shape == (2, 6, 4)
+    assert np.all(gradients[:, :, 0] == 0.)  # single mach value
+    for i, step in [(1, 1e-3), (2, 1.), (3, 1e-3)]:
+        delta = np.zeros(4)
+        delta[i] = step
+        finite_differences = (gm.interpolate_points(points + delta) -
+                              gm.interpolate_points(points - delta)) / (2 * step)
+        assert np.allclose(gradients[:, :, i], finite_differences,
+                           rtol=1e-6, atol=1e-12)
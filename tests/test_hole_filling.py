@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""hole_filling.py module tests"""
+
+import os.path
+
+import numpy as np
+
+from foilix.hole_filling import interpolate_gaps, fill_holes
+from foilix.grid_data_model import GridDataModel
+
+NDF_FILE = os.path.join(os.path.dirname(__file__), "../foil_data/%s.ndf")
+
+NAN = float('nan')
+
+
+def test_interpolate_gaps():
+    r"""Interior gaps up to max_gap are interpolated, ends are not"""
+    values = np.array([[NAN, 1., NAN, 3., NAN, NAN, NAN, 7., NAN]])
+    x = np.arange(9.)
+    estimates = interpolate_gaps(values, x, axis=1, max_gap=2)
+    assert np.isnan(estimates[0, [0, 1, 3, 4, 5, 6, 7, 8]]).all()
+    assert estimates[0, 2] == 2.
+
+    estimates = interpolate_gaps(values, x, axis=1, max_gap=3)
+    assert np.allclose(estimates[0, 4:7], [4., 5., 6.])
+
+
+def test_fill_holes_log_axis():
+    r"""Along a log axis, the interpolation is linear in log"""
+    values = np.array([[1.], [NAN], [3.]])
+    filled, mask = fill_holes(values, [np.array([1e4, 1e5, 1e6])], [0], [0])
+    assert np.isclose(filled[1, 0], 2.)
+    assert mask.tolist() == [False, True, False]
+
+
+def test_filled_model():
+    r"""The filled model keeps the original data and has fewer holes"""
+    gm = GridDataModel.from_ndf_file(NDF_FILE % "e168")
+    filled = gm.with_filled_holes()
+    assert filled.nb_holes < gm.nb_holes
+    assert filled.filled_mask.sum() == gm.nb_holes - filled.nb_holes
+    known = ~np.isnan(gm.values)
+    assert np.array_equal(filled.values[known], gm.values[known])
+    assert not np.isnan(filled.values[filled.filled_mask]).any()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""The core modules should not import plotting, GUI or heavy scientific
+packages before they are used"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+DEFERRED_PACKAGES = ("matplotlib", "scipy", "pandas", "libra", "wx", "PyQt5")
+
+
+@pytest.mark.parametrize("module", ["foilix.foil",
+                                    "foilix.foil_generators.parsec",
+                                    "foilix.foil_generators.nurbs",
+                                    "foilix.xfoil.polar",
+                                    "foilix.optimization.scoring",
+                                    "foilix.grid_data_model"])
+def test_deferred_imports(module):
+    code = "import sys, %s; print(','.join(sorted(set(" \
+           "m.split('.')[0] for m in sys.modules))))" % module
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT)
+    imported = set(output.decode("utf-8").strip().split(","))
+    assert imported.isdisjoint(DEFERRED_PACKAGES)
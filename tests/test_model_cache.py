@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""model_cache.py module tests"""
+
+import os
+
+import numpy as np
+import pytest
+
+from foilix.grid_data_model import GridDataModel
+from foilix.model_cache import ModelCache, estimate_nbytes
+
+NDF_FILE = os.path.join(os.path.dirname(__file__), "../foil_data/%s.ndf")
+
+
+class _Model(object):
+    def __init__(self, size):
+        self.weights = np.zeros(size, dtype=np.uint8)
+        self.centers = [np.zeros(size, dtype=np.uint8)]
+
+    def interpolate(self, point):
+        return {'z': np.zeros(len(point['x']))}
+
+
+class _Wrapper(object):
+    def __init__(self, model):
+        self.model = model
+        self.same_model = model
+
+
+def _files(tmpdir, nb):
+    paths = []
+    for i in range(nb):
+        path = str(tmpdir.join("%i.ndf" % i))
+        with open(path, 'w') as f:
+            f.write("0\n")
+        paths.append(path)
+    return paths
+
+
+def test_estimate_nbytes():
+    r"""Arrays and lists of arrays among the attributes are counted"""
+    assert estimate_nbytes(_Model(100)) == 200
+    assert estimate_nbytes(np.zeros(10)) == 80
+    # nested objects are counted, each one once
+    assert estimate_nbytes(_Wrapper(_Model(100))) == 200
+
+
+def test_estimate_nbytes_rbf_model():
+    r"""The size of a libra RBF model includes at least its centers"""
+    data_model_import = pytest.importorskip("libra.data_model_import")
+    model = data_model_import.create_partial_data_model_from_file(
+        NDF_FILE % "e168")
+    data = np.loadtxt(NDF_FILE % "e168", skiprows=2, ndmin=2)
+    assert estimate_nbytes(model) >= data[:, :4].nbytes
+
+
+def test_lru_eviction(tmpdir):
+    r"""The least recently used models are evicted to meet the budget"""
+    paths = _files(tmpdir, 3)
+    cache = ModelCache(max_bytes=500)
+    for path in paths[:2]:
+        cache.get(path, path, lambda: _Model(100))
+    cache.get(paths[0], paths[0], lambda: _Model(100))
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 2
+
+    cache.get(paths[2], paths[2], lambda: _Model(100))
+    assert paths[1] not in cache
+    assert paths[0] in cache
+    assert cache.stats["evictions"] == 1
+    assert cache.nbytes <= 500
+
+
+def test_invalidation_on_file_change(tmpdir):
+    r"""A model is rebuilt when its file modification time changes"""
+    path = _files(tmpdir, 1)[0]
+    cache = ModelCache()
+    model = cache.get(path, path, lambda: _Model(10))
+    assert cache.get(path, path, lambda: _Model(10)) is model
+
+    mtime = os.path.getmtime(path)
+    os.utime(path, (mtime + 10, mtime + 10))
+    assert cache.get(path, path, lambda: _Model(10)) is not model
+    assert cache.stats["invalidations"] == 1
+    assert len(cache) == 1
+
+
+def test_fallback_counted_once(tmpdir):
+    r"""The fallback model of a grid model with holes is only held and
+    counted by the cache"""
+    path = _files(tmpdir, 1)[0]
+    inputs = np.array([[x, y] for x in [0., 1., 2.] for y in [0., 1.]
+                       if not (x == 2. and y == 1.)])
+    gm = GridDataModel.from_rows(['x', 'y'], inputs, ['z'],
+                                 inputs.sum(axis=1)[:, np.newaxis])
+    cache = ModelCache()
+    gm.fallback = lambda: cache.get(("rbf", path), path,
+                                    lambda: _Model(1000))
+    cache.put(("grid", path), path, gm)
+    grid_nbytes = gm.nbytes
+
+    assert gm.interpolate({'x': 1.5, 'y': 0.5})['z'] == 0.
+    assert gm.nbytes == grid_nbytes
+    assert cache.nbytes == grid_nbytes + 2000
+
+    # the evicted fallback model is not kept alive by the grid model
+    cache.max_bytes = grid_nbytes
+    cache.get(("grid", path), path, None)
+    cache._evict()
+    assert ("rbf", path) not in cache
+    assert ("grid", path) in cache
+    assert gm.interpolate({'x': 1.5, 'y': 0.5})['z'] == 0.
+    assert cache.stats["misses"] == 2
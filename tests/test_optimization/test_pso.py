@@ -7,7 +7,7 @@ from copy import copy
 
 import numpy as np
 
-from foilix.optimization.pso import Particle
+from foilix.optimization.pso import Particle, PsoAlgorithm
 
 
 def test_pso():
@@ -33,3 +33,36 @@ def test_pso():
     p.APSO((3, 1, 0), .5, 0)
     print(p.pts)
     np.testing.assert_array_almost_equal(p.pts, np.array([2.0, 4.0, 0.0]))
+
+
+class _RecordingScorer(object):
+    r"""Scorer that records the scored positions"""
+    parameterization_type = "foo"
+
+    def __init__(self):
+        self.scored = []
+
+    def score(self, pts):
+        self.scored.append(tuple(pts))
+        return 1. + float(np.sum(np.asarray(pts) ** 2))
+
+
+def test_initial_positions():
+    r"""The first particles start from the initial positions and are scored
+    there"""
+    c = ((1, 2), (4, 5), (0, 1))
+    algo = PsoAlgorithm(c, None, S=3,
+                        initial_positions=[(1.5, 4.5, 0.5), (3., 4.5, 0.5)])
+    np.testing.assert_array_almost_equal(algo.particles[0].pts, (1.5, 4.5, 0.5))
+    np.testing.assert_array_almost_equal(algo.particles[0].bestpts,
+                                         (1.5, 4.5, 0.5))
+    # bounded by the constraints
+    np.testing.assert_array_almost_equal(algo.particles[1].pts, (2., 4.5, 0.5))
+
+    scorer = _RecordingScorer()
+    seeds = [(1.1, 4.1, 0.1), (1.2, 4.2, 0.2), (1.3, 4.3, 0.3)]
+    algo = PsoAlgorithm(c, scorer, iterations=1, S=4, initial_positions=seeds)
+    algo.optimize()
+    np.testing.assert_array_almost_equal(scorer.scored[:3], seeds)
+    # 4 particles, iterations 0 and 1
+    assert len(scorer.scored) == 8
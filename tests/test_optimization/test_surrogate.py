@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Surrogate model tests"""
+
+import numpy as np
+
+from foilix.optimization.surrogate import SurrogateModel
+
+
+def _polars(x):
+    r"""Smooth (cl, cd, cm) of (thickness, reynolds, ncrit, aoa)"""
+    t, re, a = x[:, 0], x[:, 1], x[:, 3]
+    return np.column_stack((0.1 * a * (1 - t) + 0.05 * np.log(re / 1e4),
+                            0.01 + 0.2 * t ** 2 + 5e-4 * a ** 2 / np.log(re),
+                            -0.01 * a * t))
+
+
+def _inputs(rng, n):
+    return np.column_stack((rng.uniform(0.05, 0.15, n),
+                            np.exp(rng.uniform(np.log(1e4), np.log(3e5), n)),
+                            rng.uniform(1., 4., n),
+                            rng.uniform(0., 12., n)))
+
+
+def test_incremental_training():
+    r"""Predictions should improve as samples are added, and be uncertain
+    far from the training data"""
+    rng = np.random.RandomState(0)
+    x, x_test = _inputs(rng, 1200), _inputs(rng, 300)
+    model = SurrogateModel(nb_inducing=150)
+
+    model.add(x[:100], _polars(x[:100]))
+    error_100 = np.abs(model.predict(x_test)[0] - _polars(x_test)).mean()
+    model.add(x[100:150], _polars(x[100:150]))  # incremental update
+    model.add(x[150:], _polars(x[150:]))  # refit
+    mean, std = model.predict(x_test)
+    error_1200 = np.abs(mean - _polars(x_test)).mean(axis=0)
+
+    assert model.nb_samples == 1200
+    assert error_1200.mean() < error_100
+    assert error_1200[0] < 0.02
+    assert mean.shape == std.shape == (300, 3)
+
+    _, far_std = model.predict([[0.5, 1e7, 10., 40.]])
+    assert np.all(far_std[0] > 3 * std.mean(axis=0))
+
+
+def test_refit_when_the_samples_have_doubled():
+    r"""Small incremental adds trigger a refit once the number of samples
+    has doubled since the last fit"""
+    rng = np.random.RandomState(2)
+    x = _inputs(rng, 100)
+    model = SurrogateModel(nb_inducing=150)
+    model.add(x, _polars(x))
+    inducing = model._inducing
+    # samples at the inducing points, always covered
+    for i in range(9):
+        model.add(x[10 * i:10 * (i + 1)], _polars(x[10 * i:10 * (i + 1)]))
+        assert model._inducing is inducing
+    model.add(x[90:], _polars(x[90:]))
+    assert model.nb_samples == 200
+    assert model._inducing is not inducing
+
+
+def test_nan_rows_are_ignored():
+    rng = np.random.RandomState(1)
+    x = _inputs(rng, 50)
+    y = _polars(x)
+    y[::2, 1] = np.nan
+    model = SurrogateModel()
+    model.add(x, y)
+    assert model.nb_samples == 25
+
+
+def test_predict_grid(tmpdir):
+    r"""Grid predictions should match point predictions, also after a
+    save / load cycle"""
+    rng = np.random.RandomState(2)
+    x = _inputs(rng, 200)
+    model = SurrogateModel()
+    model.add(x, _polars(x))
+
+    mean, std = model.predict_grid([[0.08], [0.12]], [2e4, 5e4], [2.],
+                                   [0., 3., 6.])
+    assert mean.shape == (2, 2, 1, 3, 3)
+    point_mean, _ = model.predict([[0.12, 5e4, 2., 3.]])
+    assert np.allclose(mean[1, 1, 0, 1], point_mean[0])
+
+    path = str(tmpdir.join("surrogate.npz"))
+    model.save(path)
+    loaded = SurrogateModel.load(path)
+    assert np.allclose(loaded.predict([[0.12, 5e4, 2., 3.]])[0], point_mean)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""polar_table.py module tests"""
+
+import os.path
+import shutil
+
+import numpy as np
+import pytest
+
+from foilix.polar_table import PolarTable
+
+FOIL_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "../foil_data")
+FOIL_IDS = ["e168", "naca0006", "naca0007"]
+
+
+@pytest.fixture(scope="module")
+def table():
+    return PolarTable.from_folder(FOIL_DATA_FOLDER, foil_ids=FOIL_IDS)
+
+
+def _csv_rows(foil_id, ncrit, reynolds):
+    data = np.genfromtxt(os.path.join(FOIL_DATA_FOLDER, "%s.csv" % foil_id),
+                         delimiter=",",
+                         skip_header=1,
+                         usecols=range(10))
+    return data[(data[:, 1] == ncrit) & (data[:, 2] == reynolds)]
+
+
+def test_table_shape(table):
+    r"""The table has a foil axis followed by the grid axes"""
+    assert table.foil_ids == FOIL_IDS
+    assert table.values.shape == (3, 1, 4, 60, 16, 6)
+    assert table.get('cd', mach=0., ncrit=2., reynolds=5e4).shape == (3, 16)
+    assert table.remaining_axes(mach=0.) == ['ncrit', 'reynolds', 'aoa']
+
+
+def test_minimum_drag(table):
+    r"""Vectorized minimum drag vs minimum drag from the csv files"""
+    cd_min, aoa_at_cd_min = table.minimum('cd', over='aoa',
+                                          mach=0., ncrit=2., reynolds=5e4)
+    for i, foil_id in enumerate(FOIL_IDS):
+        rows = _csv_rows(foil_id, 2., 5e4)
+        assert cd_min[i] == np.nanmin(rows[:, 5])
+        assert aoa_at_cd_min[i] == rows[np.nanargmin(rows[:, 5]), 3]
+
+
+def test_mean_and_subset(table):
+    r"""Mean over reynolds and ncrit ignores the holes"""
+    sub = table.subset(["naca0006"])
+    assert sub.foil_ids == ["naca0006"]
+    means = sub.mean('cd', over=('reynolds', 'ncrit'), mach=0.)
+    assert means.shape == (1, 16)
+    assert np.isclose(means[0, 0],
+                      np.nanmean(sub.get('cd', mach=0., aoa=0.)))
+
+
+def test_not_on_grid(table):
+    r"""Selections have to be grid values"""
+    with pytest.raises(ValueError):
+        table.get('cd', reynolds=5.1e4)
+
+
+def test_scattered_data_is_left_out(tmpdir):
+    r"""A .ndf file that is not on a regular grid is left out"""
+    shutil.copy(os.path.join(FOIL_DATA_FOLDER, "naca0006.ndf"), str(tmpdir))
+    rng = np.random.RandomState(0)
+    with open(str(tmpdir.join("scattered.ndf")), 'w') as f:
+        f.write("0 0 0 0 2 2 2 2 2 2\n")
+        f.write("mach ncrit reynolds aoa cl cd cdp cm top_xtr bot_xtr\n")
+        for ncrit, reynolds, aoa in zip(rng.uniform(1., 4., 40),
+                                        rng.uniform(5e4, 1e5, 40),
+                                        rng.uniform(0., 10., 40)):
+            f.write("0 %f %f %f 0 0 0 0 0 0\n" % (ncrit, reynolds, aoa))
+    assert PolarTable.from_folder(str(tmpdir)).foil_ids == ["naca0006"]
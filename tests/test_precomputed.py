@@ -5,7 +5,10 @@ r"""test xfoil.py module"""
 
 import os
 
-from foilix.data_api import get_data_tuple
+import numpy as np
+
+from foilix.data_api import get_data_tuple, get_data_array, \
+    get_data_with_gradient
 from foilix.xfoil.xfoil import oper_visc_alpha
 
 XFOIL_EXE_TO_DAT_RELPATH = '../../foil_dat/%s.dat'
@@ -56,3 +59,56 @@ def test_precomputed():
     assert abs(bot_xtr_pre - bot_xtr) < tolerance_default
 
     os.chdir(cwd)
+
+
+def test_get_data_array_vs_get_data_tuple():
+    r"""The vectorized query should return the same values as
+    the point by point query"""
+    foil_data_folder = os.path.join(os.path.dirname(__file__), "../foil_data")
+    foil_id = "naca0006"
+    ncrits = [1., 2.5]
+    reynolds = [2e4, 5e4, 7.5e4]
+    aoas = [0., 2.5, 5.]
+
+    data = get_data_array(foil_data_folder=foil_data_folder,
+                          foil_id=foil_id,
+                          mach=0.,
+                          ncrits=ncrits,
+                          reynolds=reynolds,
+                          aoas=aoas)
+
+    assert data.shape == (3, 2, 3, 6)
+
+    for i, rn in enumerate(reynolds):
+        for j, nc in enumerate(ncrits):
+            for k, aoa in enumerate(aoas):
+                expected = get_data_tuple(foil_data_folder=foil_data_folder,
+                                          foil_id=foil_id,
+                                          mach=0.,
+                                          ncrit=nc,
+                                          reynolds=rn,
+                                          aoa=aoa)
+                for value, expected_value in zip(data[i, j, k], expected):
+                    assert abs(value - expected_value) < 1e-8
+
+
+def test_get_data_with_gradient():
+    r"""The values should be the get_data_tuple values and the gradients
+    have one row per output and one column per gradient key"""
+    values, gradients = get_data_with_gradient(
+        foil_data_folder=os.path.join(os.path.dirname(__file__),
+                                      "../foil_data"),
+        foil_id="naca0006",
+        mach=0.,
+        ncrit=[2.3, 2.7],
+        reynolds=5.3e4,
+        aoa=3.4)
+    assert values.shape == (2, 6)
+    assert gradients.shape == (2, 6, 3)
+    expected = get_data_tuple(
+        foil_data_folder=os.path.join(os.path.dirname(__file__),
+                                      "../foil_data"),
+        foil_id="naca0006", mach=0., ncrit=2.3, reynolds=5.3e4, aoa=3.4)
+    assert np.allclose(values[0], expected)
+    # cl increases with the angle of attack
+    assert gradients[0, 0, 0] > 0.
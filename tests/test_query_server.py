@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""query_server.py module tests"""
+
+import os.path
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from foilix import data_api
+from foilix.query_server import QueryServer, QueryClient, _HEADER, \
+    receive_message
+
+FOIL_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "../foil_data")
+
+
+@pytest.fixture
+def server(tmpdir):
+    s = QueryServer(str(tmpdir.join("foilix.sock")))
+    thread = threading.Thread(target=s.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield s
+    s.shutdown()
+
+
+def test_points(server):
+    r"""The server should answer like data_api"""
+    points = np.array([[0., 2., 5e4, 3.], [0., 2.5, 6e4, 4.5]])
+    client = QueryClient(server.address)
+    data = client.get_data_points(FOIL_DATA_FOLDER, "naca0006", points)
+    assert data.shape == (2, 6)
+    assert np.allclose(data, data_api.get_data_points(FOIL_DATA_FOLDER,
+                                                      "naca0006", points))
+    stats = client.stats()
+    assert stats["requests"] == 1
+    assert stats["points"] == 2
+    assert stats["latency_max_ms"] > 0
+    client.close()
+
+
+def test_get_data_tuple_through_server(server):
+    r"""get_data_tuple should use the server once it is set"""
+    expected = data_api.get_data_tuple(FOIL_DATA_FOLDER, "naca0006",
+                                       0., 2., 5e4, 3.)
+    data_api.set_query_server(server.address)
+    try:
+        assert data_api.get_data_tuple(FOIL_DATA_FOLDER, "naca0006",
+                                       0., 2., 5e4, 3.) == expected
+        with pytest.raises(ValueError):
+            data_api.get_data_tuple(FOIL_DATA_FOLDER, "naca0006",
+                                    0., 2., 1e7, 3.)
+    finally:
+        data_api.set_query_server(None)
+
+
+@pytest.mark.parametrize("json_part, binary_part",
+                         [(b"{not json", b""),
+                          (b'{"command": "points"}', b"12345")])
+def test_malformed_message(server, json_part, binary_part):
+    r"""A malformed message gets an error response and the connection is
+    closed, the server keeps serving the other clients"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(server.address)
+    sock.sendall(_HEADER.pack(len(json_part), len(binary_part)) +
+                 json_part + binary_part)
+    header, _ = receive_message(sock)
+    assert header["error"] == "ValueError"
+    assert sock.recv(1) == b""
+    sock.close()
+
+    client = QueryClient(server.address)
+    assert client.stats()["errors"] == 1
+    client.close()
+
+
+def test_client_gone(server):
+    r"""An error response to a disconnected client does not raise"""
+    sock, client_sock = socket.socketpair()
+    client_sock.close()
+    try:
+        assert server.handle_query(sock, {"command": "foo"},
+                                   np.zeros(0)) is False
+    finally:
+        sock.close()
+    assert server.nb_errors == 1
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""repanel.py module tests"""
+
+import os.path
+
+import numpy as np
+
+from foilix.foil import Foil
+from foilix.repanel import ArcLengthSpline, repanel, repanel_foils, \
+    repanel_points, selig_order
+
+FOIL_DAT_FOLDER = os.path.join(os.path.dirname(__file__), "../foil_dat")
+
+
+def _foil(name):
+    return Foil.from_dat_file(os.path.join(FOIL_DAT_FOLDER, "%s.dat" % name))
+
+
+def _segment_lengths(points):
+    return np.linalg.norm(np.diff(points, axis=0), axis=1)
+
+
+def test_repanel():
+    r"""Number of points, trailing edge points and panel sizes"""
+    foil = repanel(os.path.join(FOIL_DAT_FOLDER, "naca0010.dat"), 161)
+    assert foil.name == "naca0010__p__161"
+    assert foil.points.shape == (161, 2)
+    original = _foil("naca0010").points
+    assert np.allclose(foil.points[0], original[0])
+    assert np.allclose(foil.points[-1], original[-1])
+    assert foil.is_symmetrical(tolerance=1e-6)
+
+    lengths = _segment_lengths(foil.points)
+    ratios = lengths[1:] / lengths[:-1]
+    assert np.all((ratios < 1.5) & (ratios > 1. / 1.5))
+    # refined at the leading edge and at the trailing edge
+    le = int(np.argmin(foil.points[:, 0]))
+    assert lengths[le] < 0.5 * lengths.mean()
+    assert lengths[0] < lengths.mean()
+
+
+def _naca00(thickness, x):
+    return 5. * thickness * (0.2969 * np.sqrt(x) - 0.1260 * x - 0.3516 * x ** 2
+                             + 0.2843 * x ** 3 - 0.1015 * x ** 4)
+
+
+def test_repanel_on_the_section():
+    r"""The repaneled points are on the section"""
+    x = 0.5 * (1. - np.cos(np.linspace(0., np.pi, 101)))
+    points = np.vstack((np.column_stack((x[::-1], _naca00(0.12, x[::-1]))),
+                        np.column_stack((x[1:], -_naca00(0.12, x[1:])))))
+    repaneled = repanel_foils([points], 61)[0]
+    assert np.allclose(np.abs(repaneled[:, 1]),
+                       _naca00(0.12, np.clip(repaneled[:, 0], 0., 1.)),
+                       atol=1e-5)
+
+
+def test_batch():
+    r"""Repaneling a batch gives the repaneling of each foil"""
+    foils = [_foil("naca0006"), _foil("naca0010")]
+    batch = repanel_points(np.array([f.points for f in foils]), 81)
+    for foil, points in zip(foils, batch):
+        assert np.allclose(repanel_points(foil.points[np.newaxis], 81)[0],
+                           points)
+
+
+def test_lednicer():
+    r"""Lednicer and Selig orders give the same repaneled foil"""
+    selig = _foil("naca0010").points
+    le = int(np.argmin(selig[:, 0]))
+    lednicer = np.vstack((selig[:le + 1][::-1], selig[le:]))
+    assert np.array_equal(selig_order(lednicer), selig)
+    repaneled = repanel_foils([selig, lednicer], 81)
+    assert np.allclose(repaneled[0], repaneled[1])
+
+
+def _double_wedge(half_angle=20., nb_points=21):
+    r"""Double wedge section (corners at mid-chord and at the leading edge),
+    linearly sampled"""
+    x = np.linspace(0., 1., nb_points)
+    y = np.tan(np.radians(half_angle)) * np.minimum(x, 1. - x)
+    return np.vstack((np.column_stack((x[::-1], y[::-1])),
+                      np.column_stack((x[1:], -y[1:]))))
+
+
+def test_corners():
+    r"""The mid-chord corners are detected, not the leading edge"""
+    points = _double_wedge()
+    spline = ArcLengthSpline(points[np.newaxis])
+    corners = points[1:-1][spline.corners[0]]
+    assert np.allclose(corners, [[0.5, 0.182], [0.5, -0.182]], atol=1e-3)
+    assert not np.any(ArcLengthSpline(points[np.newaxis],
+                                      corner_angle=60.).corners)
+
+
+def test_corner_refinement():
+    r"""The panels are refined around the corners, the edges stay
+    straight"""
+    points = _double_wedge()
+    corner = np.array([0.5, np.tan(np.radians(20.)) * 0.5])
+    refined = repanel_foils([points], 81)[0]
+    plain = repanel_foils([points], 81, corner_weight=0.)[0]
+
+    def _corner_panel(repaneled):
+        i = int(np.argmin(np.linalg.norm(repaneled - corner, axis=1)))
+        return _segment_lengths(repaneled)[i - 1:i + 1].max()
+
+    assert _corner_panel(refined) < 0.5 * _corner_panel(plain)
+    # straight edges on both sides of the corners (the leading edge zone is
+    # rounded)
+    x, y = refined[refined[:, 0] > 0.05].T
+    assert np.allclose(np.abs(y), np.tan(np.radians(20.)) *
+                       np.minimum(x, 1. - x), atol=1e-6)
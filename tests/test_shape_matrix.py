@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""shape_matrix.py module tests"""
+
+import os.path
+
+import numpy as np
+
+from foilix.foil import Foil
+from foilix.shape_matrix import ShapeMatrix
+
+FOIL_DAT_FOLDER = os.path.join(os.path.dirname(__file__), "../foil_dat")
+
+
+def _foils(*names):
+    return [Foil.from_dat_file(os.path.join(FOIL_DAT_FOLDER, "%s.dat" % name))
+            for name in names]
+
+
+def test_features():
+    r"""Geometric features of NACA 4 digit foils"""
+    sm = ShapeMatrix.from_foils(_foils("naca0006", "naca0010", "clarky"))
+    assert sm.values.shape == (3, 101, 2)
+    assert np.all(sm.is_valid)
+    assert np.all(sm.thickness >= 0.)
+
+    max_thickness, max_thickness_x = sm.max_thickness
+    assert np.allclose(max_thickness[:2], [0.06, 0.1], atol=1e-4)
+    assert np.allclose(max_thickness_x[:2], 0.3, atol=0.01)
+    assert np.allclose(sm.camber[:2], 0., atol=1e-5)
+    assert sm.camber[2].max() > 0.03
+
+    # NACA 4 digit leading edge radius : 1.1019 t^2
+    assert np.allclose(sm.leading_edge_radius()[:2],
+                       1.1019 * max_thickness[:2] ** 2,
+                       rtol=0.05)
+    angles = sm.trailing_edge_angle()
+    assert 5. < angles[0] < angles[1] < 15.
+
+
+def test_lednicer_order():
+    r"""Selig and Lednicer orders give the same resampled foil"""
+    selig = _foils("naca0010")[0]
+    le = int(np.argmin(selig.points[:, 0]))
+    lednicer = Foil("lednicer", np.vstack((selig.points[:le + 1][::-1],
+                                           selig.points[le:])))
+    sm = ShapeMatrix.from_foils([selig, lednicer])
+    assert np.allclose(sm.values[0], sm.values[1])
+
+
+def test_save_load(tmpdir):
+    sm = ShapeMatrix.from_foils(_foils("naca0006", "clarky"))
+    path = os.path.join(str(tmpdir), "shapes.npz")
+    sm.save(path)
+    loaded = ShapeMatrix.load(path)
+    assert loaded.names == ["naca0006", "clarky"]
+    assert np.array_equal(loaded.values, sm.values)
+    assert loaded.subset(["clarky"]).values.shape == (1, 101, 2)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""shape_search.py module tests"""
+
+import os.path
+import shutil
+
+import numpy as np
+
+from foilix.foil import Foil
+from foilix.shape_search import ShapeIndex, unique_foil_ids, \
+    duplicate_foil_ids
+
+FOIL_DAT_FOLDER = os.path.join(os.path.dirname(__file__), "../foil_dat")
+
+DAT_FILES = ["naca0006.dat", "naca0010.dat", "clarky.dat", "sc20402.dat"]
+
+
+def _dat_folder(tmpdir):
+    r"""Some foils and a slightly perturbed copy of naca0010"""
+    folder = str(tmpdir)
+    for dat_file in DAT_FILES:
+        shutil.copy(os.path.join(FOIL_DAT_FOLDER, dat_file), folder)
+    foil = Foil.from_dat_file(os.path.join(folder, "naca0010.dat"))
+    points = foil.points + [0., 1e-5]
+    np.savetxt(os.path.join(folder, "naca0010__p__281.dat"), points,
+               header="NACA 0010 repaneled", comments="")
+    return folder
+
+
+def test_query(tmpdir):
+    r"""The closest foils of an indexed foil"""
+    folder = _dat_folder(tmpdir)
+    index = ShapeIndex.from_folder(folder)
+    neighbours = index.query(Foil.from_dat_file(
+        os.path.join(folder, "naca0010.dat")), k=3)
+    assert [name for name, _ in neighbours[:2]] == ["naca0010",
+                                                    "naca0010__p__281"]
+    assert neighbours[0][1] == 0.
+    assert neighbours[1][1] < 1e-4 < neighbours[2][1]
+
+
+def test_duplicates(tmpdir):
+    r"""The repaneled copy is a duplicate, the original is kept"""
+    folder = _dat_folder(tmpdir)
+    index = ShapeIndex.from_folder(folder)
+    assert index.duplicates() == [["naca0010", "naca0010__p__281"]]
+    assert len(index.duplicate_report()) == 1
+    assert unique_foil_ids(folder, ["naca0010__p__281",
+                                    "naca0006",
+                                    "naca0010",
+                                    "ht05"]) == ["naca0006", "naca0010", "ht05"]
+    assert duplicate_foil_ids(folder, ["naca0010__p__281",
+                                       "naca0006",
+                                       "naca0010"]) == \
+        {"naca0010__p__281": "naca0010"}
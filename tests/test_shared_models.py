@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""shared_models.py module tests"""
+
+import os.path
+
+import numpy as np
+
+from foilix import data_api
+from foilix.shared_models import SharedModelExport, attach_shared_models
+
+FOIL_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "../foil_data")
+
+
+def test_export_attach():
+    r"""The attached models should be memory-mapped and give the same
+    results as the models built from the .ndf files"""
+    expected = data_api.get_data_tuple(FOIL_DATA_FOLDER, "naca0006",
+                                       0., 2., 5e4, 3.)
+    with SharedModelExport() as export:
+        assert export.export(os.path.join(FOIL_DATA_FOLDER, "naca0006.ndf"))
+        folder = export.folder
+        data_api.model_cache.clear()
+        assert attach_shared_models(folder) == 1
+        model = data_api.create_interpolation_model(
+            os.path.join(FOIL_DATA_FOLDER, "naca0006.ndf"))
+        assert isinstance(model.values, np.memmap)
+        assert data_api.get_data_tuple(FOIL_DATA_FOLDER, "naca0006",
+                                       0., 2., 5e4, 3.) == expected
+    assert not os.path.isdir(folder)
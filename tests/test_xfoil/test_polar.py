@@ -130,3 +130,45 @@ def test_polar_vs_polar_matrix():
     assert abs(polar_min_drag_angle - polar_matrix_min_drag_angle) < tolerance
 
     os.chdir(cwd)
+
+
+def test_polar_matrix_extend():
+    r"""A matrix grown with extend() should give the same averages as a
+    matrix computed in one go, and the cell observers should be notified
+    once per newly computed cell
+
+    """
+    os.chdir(xfoil_exe_dir)
+
+    foil = 's1010.dat'
+    aos_spec = [0., 10., 1.]
+    full = PolarMatrix("",
+                       filename=XFOIL_EXE_TO_DAT_RELPATH % foil,
+                       angles_of_attack_spec=aos_spec,
+                       reynolds_numbers=[10000, 20000],
+                       ncrits=[2., 3.])
+    full.compute()
+
+    partial = PolarMatrix("",
+                          filename=XFOIL_EXE_TO_DAT_RELPATH % foil,
+                          angles_of_attack_spec=[0., 5., 1.],
+                          reynolds_numbers=[10000],
+                          ncrits=[2.])
+    notified = list()
+    partial.add_cell_observer(
+        lambda rn, nc, polar: notified.append((rn, nc)))
+    partial.compute()
+    assert partial.coverage == (1, 1)
+
+    partial.extend(reynolds=[20000], ncrits=[3.], aoas=[5., 10., 1.])
+    assert partial.coverage == (4, 4)
+    assert sorted(notified) == [(10000, 2.), (10000, 3.),
+                                (20000, 2.), (20000, 3.)]
+
+    tolerance = 1e-5
+
+    assert abs(full.avg_max_lift_to_drag[0] -
+               partial.avg_max_lift_to_drag[0]) < tolerance
+    assert abs(full.avg_min_drag[0] - partial.avg_min_drag[0]) < tolerance
+
+    os.chdir(cwd)